@@ -223,12 +223,12 @@ def base_power_modifiers_items(move: Move, move_type: PokemonType, attacker: Pok
     if attacker.item == "poisonbarb" and move_type is PokemonType.POISON:
         base_power_modifier *= 1.2
 
-    # The "sharp beek" item boosts the power of flying-type moves
-    if attacker.item == "sharpbeek" and move_type is PokemonType.FLYING:
+    # The "sharp beak" item boosts the power of flying-type moves
+    if attacker.item == "sharpbeak" and move_type is PokemonType.FLYING:
         base_power_modifier *= 1.2
 
     # The "silkscarf" item boosts the power of normal-type moves
-    if attacker.item == "slikscarf" and move_type is PokemonType.NORMAL:
+    if attacker.item == "silkscarf" and move_type is PokemonType.NORMAL:
         base_power_modifier *= 1.2
 
     # The "silver powder" item boosts the power of bug-type moves
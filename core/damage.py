@@ -98,7 +98,7 @@ def compute_other_damage_modifiers(move: Move,
         return 0
 
     # Pokémon with the "sap sipper" ability suffer no damage from grass type moves
-    if move_type is PokemonType.GRASS and "sapsipperr" in defender.possible_abilities:
+    if move_type is PokemonType.GRASS and "sapsipper" in defender.possible_abilities:
         return 0
 
     # Pokémon with the "wonder guard" ability can only take damage from super-effective moves
@@ -170,7 +170,7 @@ def compute_other_damage_modifiers(move: Move,
 
     # Pokémon with the "merciless" ability deal 1.5 more damage to poisoned Pokémon
     if attacker.ability == "merciless" and defender.status in [Status.PSN, Status.TOX] \
-            and defender.ability not in ["battlearmor", "shellarmour"]:
+            and defender.ability not in ["battlearmor", "shellarmor"]:
         damage_modifier *= 1.5
 
     # Pokémon with the "flashfire" effect deal 1.5 more damage when using a fire-type move
@@ -189,14 +189,12 @@ def compute_other_damage_modifiers(move: Move,
     if move.id in ["behemothblade", "behemothbash", "dynamaxcannon"] and defender.is_dynamaxed:
         damage_modifier *= 2
 
-    # Some side conditions on the opponent's side halve the move's damage
+    # Some side conditions on the opponent's side halve the move's damage, Aurora Veil doesn't stack with the screens
     if SideCondition.REFLECT in defender_conditions and move.category is MoveCategory.PHYSICAL:
         damage_modifier *= 0.5
-
-    if SideCondition.AURORA_VEIL in defender.effects and move.category is not MoveCategory.Status:
+    elif SideCondition.LIGHT_SCREEN in defender_conditions and move.category is MoveCategory.SPECIAL:
         damage_modifier *= 0.5
-
-    if SideCondition.LIGHT_SCREEN in defender_conditions and move.category is MoveCategory.SPECIAL:
+    elif SideCondition.AURORA_VEIL in defender_conditions and move.category is not MoveCategory.STATUS:
         damage_modifier *= 0.5
 
     # Pokémon with the "life orb" item deal increased damage
@@ -368,7 +366,7 @@ def compute_damage(move: Move,
     damage = int(damage * other_damage_modifiers)
 
     # Some moves have a perfect critical hit rate
-    if move.crit_ratio == 6 and defender.ability not in ["battlearmor", "shellarmour"]:
+    if move.crit_ratio == 6 and defender.ability not in ["battlearmor", "shellarmor"]:
         damage *= 1.5
 
     # Define lower and upper bound for the damage after considering moves that hit more than once
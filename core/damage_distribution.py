@@ -0,0 +1,224 @@
+from poke_env.environment import Pokemon, Move, Weather, Field, SideCondition
+from core.damage import compute_damage
+from core.utils import compute_move_accuracy
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+# Damage rolls of the damage formula, in percentage of the highest damage
+DAMAGE_ROLLS = np.arange(85, 101)
+
+# Critical hit chance for each stage of the critical hit ratio
+CRIT_CHANCES = [1 / 24, 1 / 8, 1 / 2, 1, 1]
+
+# Probability of a knock out above which the agents consider it certain
+LIKELY_KO = 0.9
+
+# Moves whose n-th hit has n times the base power of the first one
+ESCALATING_MOVES = ["triplekick", "tripleaxel"]
+
+"""
+Discrete distribution of the damage dealt by a move: every damage roll, the critical hits and the misses, with their
+probabilities
+Parameters: damage: the possible damage values, sorted
+Parameters: probabilities: the probability of each damage value
+"""
+class DamageDistribution:
+
+    def __init__(self, damage: np.ndarray, probabilities: np.ndarray):
+        self.damage: np.ndarray = damage
+        self.probabilities: np.ndarray = probabilities
+
+    def expected(self) -> float:
+        return float(np.dot(self.damage, self.probabilities))
+
+    """
+    Compute the probability that the move knocks out a Pokémon in at most each number of hits
+    Parameters: hp: the health points of the Pokémon
+    Parameters: max_hits: the max number of hits
+    Returns: the probabilities of the 1HKO, 2HKO, ..., nHKO
+    """
+    def ko_probabilities(self, hp: int, max_hits: int = 4) -> List[float]:
+        return ko_probabilities(tuple(self.damage), tuple(self.probabilities), int(hp), max_hits).tolist()
+
+    def __repr__(self) -> str:
+        return "DamageDistribution({0}-{1}, expected {2:.1f})".format(self.damage[0], self.damage[-1],
+                                                                       self.expected())
+
+
+"""
+Compute the probability of a critical hit of a move
+Parameters: move: the move
+Parameters: defender: the defending Pokémon
+Returns: the critical hit chance, 0 for the moves that always crit since compute_damage already accounts for them
+"""
+def crit_chance(move: Move, defender: Pokemon) -> float:
+    if move.crit_ratio >= 6 or move.damage or defender.ability in ["battlearmor", "shellarmor"]:
+        return 0
+
+    return CRIT_CHANCES[min(max(move.crit_ratio - 1, 0), len(CRIT_CHANCES) - 1)]
+
+# Probabilities of the number of hits of the moves that hit from two to five times
+MULTI_HIT_COUNTS = ((2, 0.35), (3, 0.35), (4, 0.15), (5, 0.15))
+
+"""
+Compute the distribution of the damage dealt by a single hit of a move, with its damage rolls and critical hits
+Parameters: hit_damage: the highest damage of the hit without critical hits
+Parameters: fixed: whether the damage is fixed, so without rolls and critical hits
+Parameters: crit_p: the critical hit chance
+Returns: the probability of each damage value, indexed by the damage
+"""
+@lru_cache(maxsize=65536)
+def hit_distribution(hit_damage: int, fixed: bool, crit_p: float) -> np.ndarray:
+    if fixed or hit_damage == 0:
+        distribution = np.zeros(hit_damage + 1)
+        distribution[hit_damage] = 1.0
+        return distribution
+
+    rolls = np.floor(hit_damage * DAMAGE_ROLLS / 100).astype(np.int64)
+    crit_rolls = np.floor(int(hit_damage * 1.5) * DAMAGE_ROLLS / 100).astype(np.int64)
+    distribution = np.zeros(crit_rolls[-1] + 1)
+    np.add.at(distribution, rolls, (1 - crit_p) / len(rolls))
+    np.add.at(distribution, crit_rolls, crit_p / len(crit_rolls))
+    return distribution
+
+"""
+Compute the distribution of the damage dealt by a move given the highest damage of a hit without critical hits.
+Every hit has its own damage roll and critical hit, so the distribution of the total damage is the convolution of
+the distributions of the hits, weighted by the probability of each number of hits. The distribution only depends on
+a few numbers, so it is cached on them
+Parameters: hit_damage: the highest damage of a hit, without critical hits
+Parameters: fixed: whether the damage is fixed, so without rolls and critical hits
+Parameters: hit_counts: the probability of each number of hits, 0 hits being a miss
+Parameters: crit_p: the critical hit chance of each hit
+Parameters: escalating: whether the n-th hit deals n times the damage of the first one, as Triple Kick does
+Returns: the damage values and their probabilities
+"""
+@lru_cache(maxsize=65536)
+def roll_distribution(hit_damage: int, fixed: bool, hit_counts: Tuple[Tuple[int, float], ...], crit_p: float,
+                      escalating: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    total = np.ones(1)
+    merged = np.zeros(1)
+    hits = 0
+    for count, probability in sorted(hit_counts):
+        while hits < count:
+            hits += 1
+            total = np.convolve(total, hit_distribution(hit_damage * (hits if escalating else 1), fixed, crit_p))
+        if len(merged) < len(total):
+            merged = np.pad(merged, (0, len(total) - len(merged)))
+        merged[:len(total)] += probability * total
+
+    values = np.flatnonzero(merged)
+    return values, merged[values]
+
+"""
+Compute the probabilities of knocking out a Pokémon in at most each number of hits. The distribution of the total
+damage is clipped at the health points, so that every convolution has the size of the health points
+Parameters: damage: the possible damage values of a hit
+Parameters: probabilities: the probability of each damage value
+Parameters: hp: the health points of the Pokémon
+Parameters: max_hits: the max number of hits
+Returns: the probabilities of the 1HKO, 2HKO, ..., nHKO
+"""
+@lru_cache(maxsize=65536)
+def ko_probabilities(damage: Tuple[int, ...], probabilities: Tuple[float, ...], hp: int, max_hits: int = 4) \
+        -> np.ndarray:
+    if hp <= 0:
+        return np.ones(max_hits)
+
+    hit = np.zeros(hp + 1)
+    np.add.at(hit, np.minimum(np.array(damage, dtype=np.int64), hp), np.array(probabilities))
+
+    # The mass at the health points is the one of the Pokémon already knocked out, the others take the next hit
+    result = np.zeros(max_hits)
+    total = hit
+    for n in range(max_hits):
+        if n > 0:
+            total = np.convolve(total[:hp], hit)
+            total[hp] += total[hp + 1:].sum()
+            total = total[:hp + 1]
+        result[n] = total[hp] + (result[n - 1] if n > 0 else 0)
+
+    return np.minimum(result, 1)
+
+"""
+Compute the probability of each number of hits of a move, 0 hits being a miss. The moves that hit from two to five
+times always hit five times with Skill Link, and the ones whose every hit checks the accuracy stop at the first miss
+Parameters: move: the move
+Parameters: attacker: the attacking Pokémon
+Parameters: accuracy: the probability that the move hits
+Returns: the number of hits with their probabilities
+"""
+def hit_counts(move: Move, attacker: Pokemon, accuracy: float) -> Tuple[Tuple[int, float], ...]:
+    min_hits, max_hits = move.n_hit
+    if move.entry.get("multiaccuracy"):
+        counts = [(hits, accuracy ** hits * (1 - accuracy)) for hits in range(1, max_hits)]
+        counts.append((max_hits, accuracy ** max_hits))
+    elif min_hits == max_hits or attacker.ability == "skilllink":
+        counts = [(max_hits, accuracy)]
+    else:
+        counts = [(hits, probability * accuracy) for hits, probability in MULTI_HIT_COUNTS]
+
+    if accuracy < 1:
+        counts.insert(0, (0, 1 - accuracy))
+    return tuple(counts)
+
+"""
+Compute the distribution of the damage dealt by a move, with the same parameters of compute_damage
+Parameters: move: the move under consideration
+Parameters: attacker: attacking Pokémon
+Parameters: defender: defending Pokémon
+Parameters: weather: current battle weather
+Parameters: terrains: current terrains on the battle
+Parameters: defender_conditions: conditions on the opponent's side
+Parameters: attacker_boosts: attacker's stat boosts
+Parameters: defender_boosts: defender's stat boosts
+Parameters: is_bot: whether the bot is the attacking Pokémon
+Parameters: damage: the lowest and the highest damage of the move, such as the exact ones of the oracle, computed with
+compute_damage if None
+Returns: the distribution of the damage
+"""
+def damage_distribution(move: Move,
+                        attacker: Pokemon,
+                        defender: Pokemon,
+                        weather: Weather = None,
+                        terrains: List[Field] = None,
+                        defender_conditions: List[SideCondition] = None,
+                        attacker_boosts: Dict[str, int] = None,
+                        defender_boosts: Dict[str, int] = None,
+                        is_bot: bool = False,
+                        damage: Optional[Dict[str, int]] = None) -> DamageDistribution:
+    if damage is None:
+        damage = compute_damage(move, attacker, defender, weather, terrains, defender_conditions, attacker_boosts,
+                                defender_boosts, is_bot)
+    accuracy_boost = None if attacker_boosts is None else attacker_boosts["accuracy"]
+    evasion_boost = None if defender_boosts is None else defender_boosts["evasion"]
+    accuracy = min(1.0, float(compute_move_accuracy(move, attacker, defender, weather, terrains, accuracy_boost,
+                                                    evasion_boost)))
+    fixed = damage["lb"] == damage["ub"]
+    # The damage of compute_damage is the one of a hit times the expected hits, rounded down
+    hit_damage = int(damage["ub"]) // max(1, int(move.expected_hits))
+    values, probabilities = roll_distribution(hit_damage, fixed, hit_counts(move, attacker, accuracy),
+                                              crit_chance(move, defender), move.id in ESCALATING_MOVES)
+    return DamageDistribution(values, probabilities)
+
+"""
+Compute the probability that a move knocks out a Pokémon with a single hit
+Parameters: hp: the health points of the defending Pokémon
+Parameters: the others are the same of damage_distribution
+Returns: the probability of the 1HKO
+"""
+def ko_probability(move: Move,
+                   attacker: Pokemon,
+                   defender: Pokemon,
+                   hp: int,
+                   weather: Weather = None,
+                   terrains: List[Field] = None,
+                   defender_conditions: List[SideCondition] = None,
+                   attacker_boosts: Dict[str, int] = None,
+                   defender_boosts: Dict[str, int] = None,
+                   is_bot: bool = False,
+                   damage: Optional[Dict[str, int]] = None) -> float:
+    distribution = damage_distribution(move, attacker, defender, weather, terrains, defender_conditions,
+                                       attacker_boosts, defender_boosts, is_bot, damage)
+    return distribution.ko_probabilities(hp, 1)[0]
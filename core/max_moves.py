@@ -0,0 +1,103 @@
+from poke_env.environment import Move, MoveCategory, PokemonType
+from poke_env.environment.move import DynamaxMove
+from core.move_registry import get_move
+from typing import Dict, Optional, Tuple
+
+# Max moves built so far, by id of the move they come from, shared by the whole process like the move registry
+__MAX_MOVES: Dict[str, DynamaxMove] = dict()
+
+# Ids of the max moves of each type, the damaging moves become the one of their type and the status moves Max Guard
+MAX_MOVE_IDS = {PokemonType.BUG: "maxflutterby", PokemonType.DARK: "maxdarkness", PokemonType.DRAGON: "maxwyrmwind",
+                PokemonType.ELECTRIC: "maxlightning", PokemonType.FAIRY: "maxstarfall",
+                PokemonType.FIGHTING: "maxknuckle", PokemonType.FIRE: "maxflare", PokemonType.FLYING: "maxairstream",
+                PokemonType.GHOST: "maxphantasm", PokemonType.GRASS: "maxovergrowth", PokemonType.GROUND: "maxquake",
+                PokemonType.ICE: "maxhailstorm", PokemonType.NORMAL: "maxstrike", PokemonType.POISON: "maxooze",
+                PokemonType.PSYCHIC: "maxmindstorm", PokemonType.ROCK: "maxrockfall",
+                PokemonType.STEEL: "maxsteelspike", PokemonType.WATER: "maxgeyser"}
+MAX_GUARD_ID = "maxguard"
+
+"""
+Max move whose power and secondary effects are computed once. The poke-env max move computes them from the table of
+its type at every access, which the damage computation does for every node of the search tree. The poke-env max move
+also takes from the move it comes from every attribute it doesn't override, the id among them, so the effects of the
+damage computation keyed on the id, the drain, the recoil, the healing, the fixed damage and the self destruction
+would apply to the max move: they are overridden with the ones of the max move
+Parameters: parent: the move the max move comes from
+"""
+class MaxMove(DynamaxMove):
+
+    def __init__(self, parent: Move):
+        super(MaxMove, self).__init__(parent)
+        self._base_power: int = DynamaxMove.base_power.fget(self)
+        self._boosts: Optional[Dict[str, float]] = DynamaxMove.boosts.fget(self)
+        self._self_boost: Optional[Dict[str, float]] = DynamaxMove.self_boost.fget(self)
+
+    @property
+    def base_power(self) -> int:
+        return self._base_power
+
+    @property
+    def boosts(self) -> Optional[Dict[str, float]]:
+        return self._boosts
+
+    @property
+    def self_boost(self) -> Optional[Dict[str, float]]:
+        return self._self_boost
+
+    @property
+    def id(self) -> str:
+        return MAX_GUARD_ID if self._parent.category is MoveCategory.STATUS else MAX_MOVE_IDS[self._parent.type]
+
+    @property
+    def drain(self) -> float:
+        return 0
+
+    @property
+    def recoil(self) -> float:
+        return 0
+
+    @property
+    def heal(self) -> float:
+        return 0
+
+    @property
+    def damage(self) -> int:
+        return 0
+
+    @property
+    def self_destruct(self) -> Optional[str]:
+        return None
+
+
+"""
+Retrieve the max move a move becomes when its user is dynamaxed. The max move is built the first time it is
+requested and then reused; it comes from the move of the registry, so that it never keeps a battle alive
+Parameters: move: a move
+Returns: the max move
+"""
+def get_max_move(move: Move) -> DynamaxMove:
+    max_move = __MAX_MOVES.get(move.id)
+    if max_move is None:
+        max_move = MaxMove(get_move(move.id))
+        __MAX_MOVES[move.id] = max_move
+
+    return max_move
+
+"""
+Apply the secondary effect of a max move on the boosts: the ones of the target are lowered and the ones of the
+user are raised, whatever the target of the move it comes from
+Parameters: move: a max move
+Parameters: att_boosts: the boosts of the user
+Parameters: def_boosts: the boosts of the target
+Returns: the updated boosts of the user and of the target
+"""
+def max_move_boosts(move: DynamaxMove, att_boosts: Dict[str, int], def_boosts: Dict[str, int]) \
+        -> Tuple[Dict[str, int], Dict[str, int]]:
+    att_upd_boosts = att_boosts.copy()
+    def_upd_boosts = def_boosts.copy()
+    for stat, boost in (move.self_boost or {}).items():
+        att_upd_boosts[stat] = min(6, att_upd_boosts[stat] + boost)
+    for stat, boost in (move.boosts or {}).items():
+        def_upd_boosts[stat] = max(-6, def_upd_boosts[stat] + boost)
+
+    return att_upd_boosts, def_upd_boosts
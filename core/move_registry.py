@@ -0,0 +1,39 @@
+from poke_env.environment import Gen8Move
+from core.useful_data import DEFAULT_MOVES_IDS
+from typing import Dict, Iterable
+
+# Moves built so far, shared by the whole process. The objects are treated as read-only: they are never used to keep
+# track of the pp of a battle, so they can be shared among battles and inherited by forked worker processes
+__MOVES: Dict[str, Gen8Move] = dict()
+
+"""
+Retrieve a move given its id. The move is built the first time it is requested and then reused
+Parameters: move_id: the id of the move
+Returns: the move
+"""
+def get_move(move_id: str) -> Gen8Move:
+    move = __MOVES.get(move_id)
+    if move is None:
+        move = Gen8Move(move_id)
+        __MOVES[move_id] = move
+
+    return move
+
+"""
+Build all the moves the agents need before their first decision: the default moves of each type and the
+placeholder move of the minimax root. Calling this function before forking worker processes lets them inherit the
+moves instead of building them again
+Parameters: move_ids: other move ids to build
+Returns: the number of moves in the registry
+"""
+def preload(move_ids: Iterable[str] = ()) -> int:
+    get_move("splash")
+    for moves_by_category in DEFAULT_MOVES_IDS.values():
+        for move_id in moves_by_category.values():
+            # Access the data entry so that the lookups in the poke-env dex are done once in the parent process
+            get_move(move_id).entry
+
+    for move_id in move_ids:
+        get_move(move_id).entry
+
+    return len(__MOVES)
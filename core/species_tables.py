@@ -0,0 +1,216 @@
+from poke_env.environment import Pokemon, MoveCategory
+from poke_env.data import GEN8_POKEDEX, to_id_str
+from core.move_registry import get_move
+from core.stats import estimate_stat
+from functools import lru_cache
+from typing import Dict, List, Optional
+import numpy as np
+import argparse
+import hashlib
+import json
+import os
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Sets of the random battles vendored with the Showdown server, and the directory of the tables built from them
+RANDOM_BATTLE_DATA = os.path.join(ROOT, "pokemon-showdown", "data", "random-battles", "gen8", "data.json")
+TABLES_DIR = os.path.join(ROOT, "core", "tables")
+
+"""
+Tables of the species of the random battles, indexed by pair of species: the type advantage, the comparison of the
+speed stats and the damage of the best STAB move. The species of the random battles have a fixed level, 84 EVs and
+31 IVs in every stat, so these values only depend on the two species. The tables are memory-mapped, so the processes
+that load them share the same pages
+Parameters: tables_dir: the directory of the tables
+"""
+class SpeciesTables:
+
+    def __init__(self, tables_dir: str = TABLES_DIR):
+        with open(os.path.join(tables_dir, "species.json"), "r") as file:
+            species = json.load(file)
+        self.version: Optional[str] = species.get("version")
+        self.index: Dict[str, int] = {name: i for i, name in enumerate(species["species"])}
+        self.levels: np.ndarray = np.array(species["levels"], dtype=np.int16)
+        self.type_gain: np.ndarray = np.load(os.path.join(tables_dir, "type_gain.npy"), mmap_mode="r")
+        self.speed: np.ndarray = np.load(os.path.join(tables_dir, "speed.npy"), mmap_mode="r")
+        self.speed_comparison: np.ndarray = np.load(os.path.join(tables_dir, "speed_comparison.npy"), mmap_mode="r")
+        self.stab_damage: np.ndarray = np.load(os.path.join(tables_dir, "stab_damage.npy"), mmap_mode="r")
+
+
+__tables: Optional[SpeciesTables] = None
+__tables_loaded: bool = False
+
+"""
+Compute the version of the species tables, a digest of the sets they are built from and of the source files of core,
+whose damage computation fills them
+Parameters: data_path: the sets of the random battles
+Returns: the version
+"""
+@lru_cache(maxsize=None)
+def tables_version(data_path: str = RANDOM_BATTLE_DATA) -> str:
+    digest = hashlib.sha1()
+    with open(data_path, "rb") as data:
+        digest.update(data.read())
+    core_dir = os.path.join(ROOT, "core")
+    for file in sorted(os.listdir(core_dir)):
+        if file.endswith(".py"):
+            digest.update(file.encode())
+            with open(os.path.join(core_dir, file), "rb") as source:
+                digest.update(source.read())
+
+    return digest.hexdigest()[:12]
+
+"""
+Retrieve the species tables, loading them the first time. Tables built by another version of the code or from other
+sets are stale and ignored, so that the live computation is used until they are built again
+Returns: the tables, None if they were not built or are stale
+"""
+def get_species_tables() -> Optional[SpeciesTables]:
+    global __tables, __tables_loaded
+    if not __tables_loaded:
+        __tables_loaded = True
+        if os.path.exists(os.path.join(TABLES_DIR, "species.json")):
+            tables = SpeciesTables(TABLES_DIR)
+            if tables.version == tables_version():
+                __tables = tables
+            else:
+                warnings.warn("The species tables in {0} are stale, rebuild them with `python -m core.species_tables`"
+                              .format(TABLES_DIR))
+
+    return __tables
+
+def __species_index(pokemon: Pokemon, check_level: bool = False) -> Optional[int]:
+    tables = get_species_tables()
+    if tables is None:
+        return None
+
+    index = tables.index.get(pokemon.species)
+    if index is None or (check_level and pokemon.level != tables.levels[index]):
+        return None
+    return index
+
+"""
+Retrieve the type advantage of a Pokémon on another one, the max multiplier of its types on the types of the other
+Parameters: attacker: the attacking Pokémon
+Parameters: defender: the defending Pokémon
+Returns: the type advantage, None if one of the species is not in the tables
+"""
+def lookup_type_gain(attacker: Pokemon, defender: Pokemon) -> Optional[float]:
+    attacker_index = __species_index(attacker)
+    defender_index = __species_index(defender)
+    if attacker_index is None or defender_index is None:
+        return None
+
+    return float(get_species_tables().type_gain[attacker_index, defender_index])
+
+"""
+Retrieve the speed stat of a Pokémon of the random battles, without boosts and modifiers
+Parameters: pokemon: the Pokémon
+Returns: the speed stat, None if the species is not in the tables or its level is not the one of the random battles
+"""
+def lookup_speed(pokemon: Pokemon) -> Optional[int]:
+    index = __species_index(pokemon, check_level=True)
+    return None if index is None else int(get_species_tables().speed[index])
+
+"""
+Retrieve the comparison of the speed stats of two Pokémon of the random battles, without boosts and modifiers
+Parameters: bot_pokemon: the bot's Pokémon
+Parameters: opp_pokemon: the opponent's Pokémon
+Returns: 1 if the bot's Pokémon is faster, 0 on a speed tie, -1 if it is slower, None if one of the species is not
+in the tables or its level is not the one of the random battles
+"""
+def lookup_speed_comparison(bot_pokemon: Pokemon, opp_pokemon: Pokemon) -> Optional[int]:
+    bot_index = __species_index(bot_pokemon, check_level=True)
+    opp_index = __species_index(opp_pokemon, check_level=True)
+    if bot_index is None or opp_index is None:
+        return None
+
+    return int(get_species_tables().speed_comparison[bot_index, opp_index])
+
+"""
+Retrieve the fraction of the health points of a Pokémon that the best STAB move of the random battle set of another
+one deals, without boosts, items and field
+Parameters: attacker: the attacking Pokémon
+Parameters: defender: the defending Pokémon
+Returns: the fraction of health points, None if one of the species is not in the tables
+"""
+def lookup_stab_damage(attacker: Pokemon, defender: Pokemon) -> Optional[float]:
+    attacker_index = __species_index(attacker)
+    defender_index = __species_index(defender)
+    if attacker_index is None or defender_index is None:
+        return None
+
+    return float(get_species_tables().stab_damage[attacker_index, defender_index])
+
+"""
+Build a Pokémon of the random battles as if it was in the team of the bot, with its stats estimated, so that the
+damage computation can use it on both sides
+Parameters: species: the species of the Pokémon
+Parameters: level: the level of the species in the random battles
+Returns: the Pokémon
+"""
+def __random_battle_pokemon(species: str, level: int) -> Pokemon:
+    details = "{0}, L{1}".format(GEN8_POKEDEX[species]["name"], level)
+    pokemon = Pokemon(details=details)
+    hp = estimate_stat(pokemon, "hp")
+    stats = {stat: estimate_stat(pokemon, stat) for stat in ["atk", "def", "spa", "spd", "spe"]}
+    ability = to_id_str(GEN8_POKEDEX[species]["abilities"]["0"])
+    return Pokemon(request_pokemon={"ident": "p1: " + GEN8_POKEDEX[species]["name"], "details": details,
+                                    "condition": "{0}/{0}".format(hp), "active": False, "stats": stats, "moves": [],
+                                    "baseAbility": ability, "ability": ability, "item": ""})
+
+"""
+Build the species tables from the sets of the random battles
+Parameters: data_path: the sets of the random battles
+Parameters: tables_dir: the directory where the tables are written
+Returns: the number of species in the tables
+"""
+def build_tables(data_path: str = RANDOM_BATTLE_DATA, tables_dir: str = TABLES_DIR) -> int:
+    # The damage computation needs core.utils, which looks up these tables
+    from core.damage import compute_damage
+
+    with open(data_path, "r") as file:
+        sets = json.load(file)
+
+    species: List[str] = [name for name, entry in sets.items() if "level" in entry and name in GEN8_POKEDEX]
+    pokemon: List[Pokemon] = [__random_battle_pokemon(name, sets[name]["level"]) for name in species]
+    stab_moves: List[List] = []
+    for name, poke in zip(species, pokemon):
+        moves = [get_move(move_id) for move_id in sets[name].get("moves", [])]
+        stab_moves.append([move for move in moves
+                           if move.category is not MoveCategory.STATUS and move.type in poke.types])
+
+    size = len(species)
+    type_gain = np.zeros((size, size), dtype=np.float16)
+    stab_damage = np.zeros((size, size), dtype=np.float16)
+    speed = np.array([estimate_stat(poke, "spe") for poke in pokemon], dtype=np.int16)
+    hp = [estimate_stat(poke, "hp") for poke in pokemon]
+    for i, attacker in enumerate(pokemon):
+        for j, defender in enumerate(pokemon):
+            type_gain[i, j] = max([defender.damage_multiplier(attacker_type)
+                                   for attacker_type in attacker.types if attacker_type is not None])
+            damage = [compute_damage(move, attacker, defender, None, [], [], attacker.boosts, defender.boosts,
+                                     True)["ub"]
+                      for move in stab_moves[i]]
+            stab_damage[i, j] = min(max(damage, default=0) / hp[j], 10)
+
+    os.makedirs(tables_dir, exist_ok=True)
+    np.save(os.path.join(tables_dir, "type_gain.npy"), type_gain)
+    np.save(os.path.join(tables_dir, "speed.npy"), speed)
+    np.save(os.path.join(tables_dir, "speed_comparison.npy"), np.sign(speed[:, None] - speed[None, :]).astype(np.int8))
+    np.save(os.path.join(tables_dir, "stab_damage.npy"), stab_damage)
+    with open(os.path.join(tables_dir, "species.json"), "w") as file:
+        json.dump({"version": tables_version(data_path), "species": species,
+                   "levels": [sets[name]["level"] for name in species]}, file)
+
+    return size
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build the species tables from the sets of the random battles")
+    parser.add_argument("--data", default=RANDOM_BATTLE_DATA)
+    parser.add_argument("--out", default=TABLES_DIR)
+    args = parser.parse_args()
+
+    print("{0} species".format(build_tables(args.data, args.out)))
@@ -272,7 +272,7 @@ def __compute_evasion_modifiers(pokemon: Pokemon, weather: Weather = None) -> fl
         evasion_modifier *= 1.2
 
     # Pokémon with the "bright powder" item have their evasion increased
-    if pokemon.item == "brigthpowder":
+    if pokemon.item == "brightpowder":
         evasion_modifier *= 1.1
 
     # Pokémon with the "lax incense" item have their evasion increased
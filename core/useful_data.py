@@ -1,4 +1,4 @@
-from poke_env.environment import SideCondition, Gen8Move, Status
+from poke_env.environment import SideCondition, Status
 from poke_env.environment.move_category import MoveCategory
 from poke_env.environment.pokemon_type import PokemonType
 
@@ -9,39 +9,41 @@ HEALING_MOVES = ["healorder", "milkdrink", "moonlight", "morningsun", "purify",
 ENTRY_HAZARDS = {"spikes": SideCondition.SPIKES, "stealhrock": SideCondition.STEALTH_ROCK,
                  "stickyweb": SideCondition.STICKY_WEB, "toxicspikes": SideCondition.TOXIC_SPIKES}
 ANTI_HAZARDS_MOVES = ["rapidspin", "defog"]
-DEFAULT_MOVES_IDS = {PokemonType.BUG: {MoveCategory.PHYSICAL: Gen8Move("xscissor"),
-                                       MoveCategory.SPECIAL: Gen8Move("bugbuzz")},
-                     PokemonType.DARK: {MoveCategory.PHYSICAL: Gen8Move("crunch"),
-                                        MoveCategory.SPECIAL: Gen8Move("darkpulse")},
-                     PokemonType.DRAGON: {MoveCategory.PHYSICAL: Gen8Move("outrage"),
-                                          MoveCategory.SPECIAL: Gen8Move("dragonpulse")},
-                     PokemonType.ELECTRIC: {MoveCategory.PHYSICAL: Gen8Move("wildcharge"),
-                                            MoveCategory.SPECIAL: Gen8Move("thunderbolt")},
-                     PokemonType.FAIRY: {MoveCategory.PHYSICAL: Gen8Move("playrough"),
-                                         MoveCategory.SPECIAL: Gen8Move("moonblast")},
-                     PokemonType.FIGHTING: {MoveCategory.PHYSICAL: Gen8Move("closecombat"),
-                                            MoveCategory.SPECIAL: Gen8Move("focusblast")},
-                     PokemonType.FIRE: {MoveCategory.PHYSICAL: Gen8Move("flareblitz"),
-                                        MoveCategory.SPECIAL: Gen8Move("fireblast")},
-                     PokemonType.FLYING: {MoveCategory.PHYSICAL: Gen8Move("fly"),
-                                          MoveCategory.SPECIAL: Gen8Move("hurricane")},
-                     PokemonType.GHOST: {MoveCategory.PHYSICAL: Gen8Move("shadowclaw"),
-                                         MoveCategory.SPECIAL: Gen8Move("shadowball")},
-                     PokemonType.GRASS: {MoveCategory.PHYSICAL: Gen8Move("powerwhip"),
-                                         MoveCategory.SPECIAL: Gen8Move("energyball")},
-                     PokemonType.GROUND: {MoveCategory.PHYSICAL: Gen8Move("earthquake"),
-                                          MoveCategory.SPECIAL: Gen8Move("earthpower")},
-                     PokemonType.ICE: {MoveCategory.PHYSICAL: Gen8Move("icefang"),
-                                       MoveCategory.SPECIAL: Gen8Move("icebeam")},
-                     PokemonType.NORMAL: {MoveCategory.PHYSICAL: Gen8Move("doubleedge"),
-                                          MoveCategory.SPECIAL: Gen8Move("hypervoice")},
-                     PokemonType.POISON: {MoveCategory.PHYSICAL: Gen8Move("gunkshot"),
-                                          MoveCategory.SPECIAL: Gen8Move("sludgebomb")},
-                     PokemonType.PSYCHIC: {MoveCategory.PHYSICAL: Gen8Move("zenheadbutt"),
-                                           MoveCategory.SPECIAL: Gen8Move("psychic")},
-                     PokemonType.ROCK: {MoveCategory.PHYSICAL: Gen8Move("stoneedge"),
-                                        MoveCategory.SPECIAL: Gen8Move("powergem")},
-                     PokemonType.STEEL: {MoveCategory.PHYSICAL: Gen8Move("ironhead"),
-                                         MoveCategory.SPECIAL: Gen8Move("flashcannon")},
-                     PokemonType.WATER: {MoveCategory.PHYSICAL: Gen8Move("waterfall"),
-                                         MoveCategory.SPECIAL: Gen8Move("surf")}}
+# Moves given to the opponent's Pokémon when none of its known moves has the same type of the Pokémon, see
+# core.move_registry.get_move to retrieve the corresponding move objects
+DEFAULT_MOVES_IDS = {PokemonType.BUG: {MoveCategory.PHYSICAL: "xscissor",
+                                       MoveCategory.SPECIAL: "bugbuzz"},
+                     PokemonType.DARK: {MoveCategory.PHYSICAL: "crunch",
+                                        MoveCategory.SPECIAL: "darkpulse"},
+                     PokemonType.DRAGON: {MoveCategory.PHYSICAL: "outrage",
+                                          MoveCategory.SPECIAL: "dragonpulse"},
+                     PokemonType.ELECTRIC: {MoveCategory.PHYSICAL: "wildcharge",
+                                            MoveCategory.SPECIAL: "thunderbolt"},
+                     PokemonType.FAIRY: {MoveCategory.PHYSICAL: "playrough",
+                                         MoveCategory.SPECIAL: "moonblast"},
+                     PokemonType.FIGHTING: {MoveCategory.PHYSICAL: "closecombat",
+                                            MoveCategory.SPECIAL: "focusblast"},
+                     PokemonType.FIRE: {MoveCategory.PHYSICAL: "flareblitz",
+                                        MoveCategory.SPECIAL: "fireblast"},
+                     PokemonType.FLYING: {MoveCategory.PHYSICAL: "fly",
+                                          MoveCategory.SPECIAL: "hurricane"},
+                     PokemonType.GHOST: {MoveCategory.PHYSICAL: "shadowclaw",
+                                         MoveCategory.SPECIAL: "shadowball"},
+                     PokemonType.GRASS: {MoveCategory.PHYSICAL: "powerwhip",
+                                         MoveCategory.SPECIAL: "energyball"},
+                     PokemonType.GROUND: {MoveCategory.PHYSICAL: "earthquake",
+                                          MoveCategory.SPECIAL: "earthpower"},
+                     PokemonType.ICE: {MoveCategory.PHYSICAL: "icefang",
+                                       MoveCategory.SPECIAL: "icebeam"},
+                     PokemonType.NORMAL: {MoveCategory.PHYSICAL: "doubleedge",
+                                          MoveCategory.SPECIAL: "hypervoice"},
+                     PokemonType.POISON: {MoveCategory.PHYSICAL: "gunkshot",
+                                          MoveCategory.SPECIAL: "sludgebomb"},
+                     PokemonType.PSYCHIC: {MoveCategory.PHYSICAL: "zenheadbutt",
+                                           MoveCategory.SPECIAL: "psychic"},
+                     PokemonType.ROCK: {MoveCategory.PHYSICAL: "stoneedge",
+                                        MoveCategory.SPECIAL: "powergem"},
+                     PokemonType.STEEL: {MoveCategory.PHYSICAL: "ironhead",
+                                         MoveCategory.SPECIAL: "flashcannon"},
+                     PokemonType.WATER: {MoveCategory.PHYSICAL: "waterfall",
+                                         MoveCategory.SPECIAL: "surf"}}
@@ -1,9 +1,41 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
 from poke_env.environment import Pokemon, Move, Weather, Field, AbstractBattle
 from poke_env.environment.move_category import MoveCategory
-from core.stats import compute_stat, stats_to_string
+from core.stats import compute_stat, compute_stat_modifiers, stats_to_string
+from core.species_tables import lookup_speed, lookup_speed_comparison
 from utils.utils import types_to_string
 
+"""
+Retrieve the probability of outspeeding the opponent's Pokémon from the species tables. The precomputed comparison
+holds in random battles when both Pokémon have the stats of their random battle set, no speed boost and no speed
+modifier, and the opponent is not known to have a set with the minimum speed
+Parameters: bot_pokemon: bot's active Pokémon
+Parameters: opp_pokemon: opponent's active Pokémon
+Parameters: weather: current battle weather
+Parameters: terrains: current battle terrains
+Returns: Outspeed probability, lower and upper bound of the opponent's "spe" stat, None if the comparison is not
+precomputed
+"""
+def __precomputed_outspeed(bot_pokemon: Pokemon,
+                           opp_pokemon: Pokemon,
+                           weather: Weather = None,
+                           terrains: List[Field] = None) -> Optional[Dict[str, float]]:
+    if bot_pokemon.boosts["spe"] != 0 or opp_pokemon.boosts["spe"] != 0 \
+            or "trickroom" in opp_pokemon.moves or "gyroball" in opp_pokemon.moves:
+        return None
+
+    opp_spe = lookup_speed(opp_pokemon)
+    if opp_spe is None or bot_pokemon.stats["spe"] != lookup_speed(bot_pokemon) \
+            or compute_stat_modifiers(bot_pokemon, "spe", weather, terrains) != 1 \
+            or compute_stat_modifiers(opp_pokemon, "spe", weather, terrains) != 1:
+        return None
+
+    outspeed_p = {1: 1, 0: 0.5, -1: 0}[lookup_speed_comparison(bot_pokemon, opp_pokemon)]
+    if Field.TRICK_ROOM in terrains:
+        outspeed_p = 1 - outspeed_p
+
+    return {"outspeed_p": outspeed_p, "lb": opp_spe, "ub": opp_spe}
+
 """
 Computes the probability of outspeeding the opponent's Pokémon
 Parameters: bot_pokemon: bot's active Pokémon
@@ -23,6 +55,11 @@ def outspeed_prob(bot_pokemon: Pokemon,
                   random_battle: bool = True,
                   verbose: bool = False) -> Dict[str, float]:
 
+    if random_battle and boost is None and not verbose:
+        precomputed = __precomputed_outspeed(bot_pokemon, opp_pokemon, weather, terrains)
+        if precomputed is not None:
+            return precomputed
+
     # Compute the stats for both Pokémon
     bot_spe = compute_stat(bot_pokemon, "spe", weather, terrains, True, boost=boost)
     opp_moves = opp_pokemon.moves.keys()
@@ -0,0 +1,256 @@
+from poke_env import PlayerConfiguration, ServerConfiguration, LocalhostServerConfiguration
+from poke_env.environment import AbstractBattle, Pokemon
+from poke_env.player import Gen8EnvSinglePlayer, Player
+from poke_env.player.battle_order import BattleOrder
+from gym import Env
+from gym.spaces import Box, Space
+from gym.vector import VectorEnv
+from core.damage import compute_damage
+from core.stats import compute_stat
+from core.utils import get_battle_info
+from strategy.matchup import matchup_on_types
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
+import os
+import shutil
+import socket
+import subprocess
+import time
+import uuid
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Showdown server vendored with the project
+SHOWDOWN_DIR = os.path.join(ROOT, "pokemon-showdown")
+
+# Actions of the environment: the four moves, the four moves while dynamaxing and the five switches
+N_MOVES = 4
+N_SWITCHES = 5
+N_ACTIONS = 2 * N_MOVES + N_SWITCHES
+
+# Size of the observations: for each move its damage and type multiplier, the health points, the matchup and the
+# alive Pokémon of both sides, the field, the dynamax state and the matchup of each switch
+OBSERVATION_SIZE = 2 * N_MOVES + 2 + 1 + 2 + 4 + 3 + N_SWITCHES
+
+"""
+Encode a battle as the observation of the environment, from the battle info, the matchups on types and the damage
+of the available moves
+Parameters: battle: current state of the battle
+Returns: the observation
+"""
+def encode_observation(battle: AbstractBattle) -> np.ndarray:
+    observation = np.zeros(OBSERVATION_SIZE, dtype=np.float32)
+    bot_pokemon: Pokemon = battle.active_pokemon
+    opp_pokemon: Pokemon = battle.opponent_active_pokemon
+    if bot_pokemon is None or opp_pokemon is None:
+        return observation
+
+    weather, terrains, bot_conditions, opp_conditions = get_battle_info(battle).values()
+    opp_max_hp = compute_stat(opp_pokemon, "hp", weather, terrains)
+    for i, move in enumerate(battle.available_moves[:N_MOVES]):
+        damage = compute_damage(move, bot_pokemon, opp_pokemon, weather, terrains, opp_conditions,
+                                bot_pokemon.boosts, opp_pokemon.boosts, True)["lb"]
+        observation[2 * i] = min(damage / max(opp_max_hp, 1), 3)
+        observation[2 * i + 1] = opp_pokemon.damage_multiplier(move) / 4 if move.base_power > 0 else 0
+
+    offset = 2 * N_MOVES
+    bot_alive = len([pokemon for pokemon in battle.team.values() if not pokemon.fainted])
+    opp_alive = 6 - len([pokemon for pokemon in battle.opponent_team.values() if pokemon.fainted])
+    observation[offset:offset + 12] = [bot_pokemon.current_hp_fraction, opp_pokemon.current_hp_fraction,
+                                       matchup_on_types(bot_pokemon, opp_pokemon) / 8, bot_alive / 6, opp_alive / 6,
+                                       float(weather is not None), len(terrains) / 2, len(bot_conditions) / 4,
+                                       len(opp_conditions) / 4, float(battle.can_dynamax),
+                                       float(bot_pokemon.is_dynamaxed), float(opp_pokemon.is_dynamaxed)]
+    offset += 12
+    for i, pokemon in enumerate(battle.available_switches[:N_SWITCHES]):
+        observation[offset + i] = matchup_on_types(pokemon, opp_pokemon) / 8
+
+    return observation
+
+
+"""
+Environment of a single battle against one of the agents, with the observations of encode_observation and
+thirteen discrete actions: the four moves, the four moves while dynamaxing and the five switches. Illegal actions
+are replaced by a random legal order
+"""
+class BattleEnv(Gen8EnvSinglePlayer):
+
+    _ACTION_SPACE = list(range(N_ACTIONS))
+
+    def calc_reward(self, last_battle: AbstractBattle, current_battle: AbstractBattle) -> float:
+        return self.reward_computing_helper(current_battle, fainted_value=2, hp_value=1, victory_value=30)
+
+    def embed_battle(self, battle: AbstractBattle) -> np.ndarray:
+        return encode_observation(battle)
+
+    def describe_embedding(self) -> Space:
+        return Box(low=-4, high=4, shape=(OBSERVATION_SIZE,), dtype=np.float32)
+
+    def action_to_move(self, action: int, battle: AbstractBattle) -> BattleOrder:
+        if action == -1:
+            return super(BattleEnv, self).action_to_move(action, battle)
+        if action < 2 * N_MOVES and not battle.force_switch and action % N_MOVES < len(battle.available_moves):
+            dynamax = action >= N_MOVES and battle.can_dynamax
+            return self.agent.create_order(battle.available_moves[action % N_MOVES], dynamax=dynamax)
+        if 0 <= action - 2 * N_MOVES < len(battle.available_switches):
+            return self.agent.create_order(battle.available_switches[action - 2 * N_MOVES])
+
+        return self.agent.choose_random_move(battle)
+
+
+"""
+Check whether a server is listening on a local port
+Parameters: port: the port
+Returns: true if the port accepts connections, false otherwise
+"""
+def port_open(port: int) -> bool:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        return sock.connect_ex(("localhost", port)) == 0
+
+"""
+Start the vendored Showdown server as a local process, when Node.js and the dependencies of the server are installed
+Parameters: port: the port of the server
+Parameters: timeout: the max seconds to wait for the server to listen
+Returns: the process of the server, None if it can't be started
+"""
+def start_local_server(port: int = 8000, timeout: float = 60) -> Optional[subprocess.Popen]:
+    if shutil.which("node") is None or not os.path.isdir(os.path.join(SHOWDOWN_DIR, "node_modules")):
+        return None
+
+    process = subprocess.Popen(["node", "pokemon-showdown", "start", "--no-security", str(port)], cwd=SHOWDOWN_DIR,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if port_open(port):
+            return process
+        if process.poll() is not None:
+            return None
+        time.sleep(0.5)
+
+    process.terminate()
+    return None
+
+
+"""
+Vectorized environment that plays a battle in each of its environments against the agents of the project. Each
+environment is reset and stepped through the public gym API of poke-env 0.5 in its own thread, so the battles
+progress in parallel on the server and a step costs the slowest battle instead of the sum of them. A finished battle
+is reset automatically, and its last observation is returned in the info of the step. When no server is given and
+none is listening on the local port, the vendored Showdown server is started as a local process
+Parameters: num_envs: the number of battles played in parallel
+Parameters: opponents: the play modes of the opponents, assigned to the environments in turn
+Parameters: server_configuration: the server the battles are played on
+Parameters: port: the port of the local server
+Parameters: envs: the environments of the battles, built against the opponents if None
+"""
+class VectorBattleEnv(VectorEnv):
+
+    def __init__(self,
+                 num_envs: int,
+                 opponents: List[str] = None,
+                 server_configuration: Optional[ServerConfiguration] = None,
+                 port: int = 8000,
+                 envs: Optional[List[Env]] = None):
+        self.server_process: Optional[subprocess.Popen] = None
+        self.opponents: List[Player] = []
+        if envs is None:
+            envs = self.build_envs(num_envs, opponents, server_configuration, port)
+        self.envs: List[Env] = envs
+        super(VectorBattleEnv, self).__init__(len(envs), envs[0].observation_space, envs[0].action_space)
+        self.executor: ThreadPoolExecutor = ThreadPoolExecutor(len(envs), thread_name_prefix="battle-env")
+        self.pending: List[Future] = []
+
+    """
+    Build an environment for each battle against the agents, starting the local server if needed
+    Parameters: num_envs: the number of battles played in parallel
+    Parameters: opponents: the play modes of the opponents, assigned to the environments in turn
+    Parameters: server_configuration: the server the battles are played on
+    Parameters: port: the port of the local server
+    Returns: the environments
+    """
+    def build_envs(self, num_envs: int, opponents: Optional[List[str]],
+                   server_configuration: Optional[ServerConfiguration], port: int) -> List[Env]:
+        from players.agents import build_agent
+
+        if server_configuration is None:
+            server_configuration = LocalhostServerConfiguration
+            if port != 8000:
+                server_configuration = ServerConfiguration("localhost:{0}".format(port),
+                                                           LocalhostServerConfiguration.authentication_url)
+            if not port_open(port):
+                self.server_process = start_local_server(port)
+
+        tag = uuid.uuid4().hex[:8]
+        opponents = ["DM"] if opponents is None else opponents
+        self.opponents = [build_agent(opponents[i % len(opponents)], 1, username="Opp{0}{1}".format(i, tag),
+                                      server_configuration=server_configuration)
+                          for i in range(num_envs)]
+        return [BattleEnv(opponent, PlayerConfiguration("Env{0}{1}".format(i, tag), None),
+                          server_configuration=server_configuration, use_old_gym_api=False)
+                for i, opponent in enumerate(self.opponents)]
+
+    """
+    Reset an environment, in its thread
+    Parameters: env: the environment
+    Parameters: seed: the seed of the environment, None to leave it unseeded
+    Parameters: options: the options of the reset
+    Returns: the first observation of the new battle
+    """
+    @staticmethod
+    def reset_env(env: Env, seed: Optional[int], options: Optional[Dict]) -> np.ndarray:
+        observation, _ = env.reset(seed=seed, options=options, return_info=True)
+        return observation
+
+    """
+    Step an environment, in its thread, resetting it when its battle is over
+    Parameters: env: the environment
+    Parameters: action: the action
+    Returns: a tuple made up of the observation, the reward, whether the battle is terminated or truncated and the
+    last observation of the battle, None if it's not over
+    """
+    @classmethod
+    def step_env(cls, env: Env, action: int) -> Tuple[np.ndarray, float, bool, bool, Optional[np.ndarray]]:
+        observation, reward, terminated, truncated, _ = env.step(action)
+        final_observation = None
+        if terminated or truncated:
+            final_observation, observation = observation, cls.reset_env(env, None, None)
+        return observation, reward, terminated, truncated, final_observation
+
+    def reset_async(self, seed: Optional[Union[int, List[int]]] = None, options: Optional[Dict] = None) -> None:
+        # As in the vector environments of gym, an integer seed seeds the i-th environment with seed + i
+        if seed is None or isinstance(seed, int):
+            seed = [None if seed is None else seed + i for i in range(self.num_envs)]
+        self.pending = [self.executor.submit(self.reset_env, env, env_seed, options)
+                        for env, env_seed in zip(self.envs, seed)]
+
+    def reset_wait(self, seed: Optional[Union[int, List[int]]] = None, options: Optional[Dict] = None) \
+            -> Tuple[np.ndarray, Dict]:
+        pending, self.pending = self.pending, []
+        return np.stack([future.result() for future in pending]), {}
+
+    def step_async(self, actions: np.ndarray) -> None:
+        self.pending = [self.executor.submit(self.step_env, env, int(action))
+                        for env, action in zip(self.envs, actions)]
+
+    def step_wait(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict]:
+        observations = np.zeros((self.num_envs, OBSERVATION_SIZE), dtype=np.float32)
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        terminated = np.zeros(self.num_envs, dtype=bool)
+        truncated = np.zeros(self.num_envs, dtype=bool)
+        infos: Dict = dict()
+        pending, self.pending = self.pending, []
+        for i, future in enumerate(pending):
+            observations[i], rewards[i], terminated[i], truncated[i], final_observation = future.result()
+            if final_observation is not None:
+                infos.setdefault("final_observation", [None] * self.num_envs)[i] = final_observation
+
+        return observations, rewards, terminated, truncated, infos
+
+    def close_extras(self, **kwargs) -> None:
+        for env in self.envs:
+            env.close()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        if self.server_process is not None:
+            self.server_process.terminate()
+            self.server_process.wait()
@@ -0,0 +1,177 @@
+from poke_env import PlayerConfiguration, ServerConfiguration, LocalhostServerConfiguration
+from poke_env.environment import Gen8Battle, Pokemon
+from poke_env.data import GEN8_POKEDEX, to_id_str
+from players.agents import build_agent
+from players.MiniMaxPlayer import MiniMaxPlayer
+from mm.BattleStatus import BattleStatus
+from mm.Heuristic import Heuristic
+from mm.LearnedHeuristic import LearnedHeuristic
+from mm.NodePokemon import NodePokemon
+from mm.TeamHeuristic import TeamHeuristic
+from core.move_registry import get_move
+from core.species_tables import RANDOM_BATTLE_DATA
+from core.stats import estimate_stat
+from core.utils import get_battle_info
+from utils.utils import wilson_interval
+from tabulate import tabulate
+from time import perf_counter
+from typing import Dict, List, Tuple
+import argparse
+import asyncio
+import json
+import logging
+import random
+
+"""
+Describe a Pokémon of a random battle set as in the requests of the server, with its stats estimated as the agents
+do for the ones of the opponent
+Parameters: species: the species
+Parameters: entry: the random battle set of the species
+Parameters: rng: the random generator that picks four of its moves
+Parameters: active: whether the Pokémon is the active one
+Returns: the description of the Pokémon
+"""
+def request_pokemon(species: str, entry: Dict, rng: random.Random, active: bool) -> Dict:
+    details = "{0}, L{1}".format(GEN8_POKEDEX[species]["name"], entry["level"])
+    pokemon = Pokemon(details=details)
+    moves = entry["moves"] if len(entry["moves"]) <= 4 else rng.sample(entry["moves"], 4)
+    ability = to_id_str(GEN8_POKEDEX[species]["abilities"]["0"])
+    return {"ident": "p1: " + GEN8_POKEDEX[species]["name"], "details": details,
+            "condition": "{0}/{0}".format(estimate_stat(pokemon, "hp")), "active": active,
+            "stats": {stat: estimate_stat(pokemon, stat) for stat in ["atk", "def", "spa", "spd", "spe"]},
+            "moves": moves, "baseAbility": ability, "ability": ability, "item": "leftovers", "pokeball": "pokeball"}
+
+"""
+Build random positions at the start of a battle from the random battle sets: three Pokémon of the bot against an
+opponent Pokémon whose moves are all known, so that the search explores the replies of the opponent
+Parameters: count: the number of positions
+Parameters: seed: the seed of the random generator
+Parameters: data_path: the sets of the random battles
+Returns: the battles of the positions
+"""
+def random_positions(count: int, seed: int = 0, data_path: str = RANDOM_BATTLE_DATA) -> List[Gen8Battle]:
+    with open(data_path, "r") as file:
+        sets = json.load(file)
+    species = sorted(name for name, entry in sets.items()
+                     if "level" in entry and len(entry.get("moves", [])) >= 4 and name in GEN8_POKEDEX)
+    rng = random.Random(seed)
+    logger = logging.getLogger("heuristic_benchmark")
+
+    battles = []
+    while len(battles) < count:
+        team_species = rng.sample(species, 4)
+        team = [request_pokemon(name, sets[name], rng, i == 0) for i, name in enumerate(team_species[:3])]
+        opponent = request_pokemon(team_species[3], sets[team_species[3]], rng, True)
+        try:
+            battle = Gen8Battle(battle_tag="battle-benchmark-{0}".format(len(battles)), username="bot", logger=logger,
+                                save_replays=False)
+            for message in [["", "player", "p1", "bot", "1", ""], ["", "player", "p2", "opp", "1", ""],
+                            ["", "switch", "p2a: " + opponent["ident"][4:], opponent["details"], "100/100"]]:
+                battle._parse_message(message)
+            for move in opponent["moves"]:
+                battle._parse_message(["", "move", "p2a: " + opponent["ident"][4:], get_move(move).entry["name"], ""])
+            moves = [{"move": move, "id": move, "pp": 10, "maxpp": 10, "target": "normal", "disabled": False}
+                     for move in team[0]["moves"]]
+            battle._parse_request({"active": [{"moves": moves}],
+                                   "side": {"name": "bot", "id": "p1", "pokemon": team}, "rqid": 1})
+            battle._parse_message(["", "switch", "p1a: " + team[0]["ident"][4:], team[0]["details"],
+                                   team[0]["condition"]])
+            battle._parse_message(["", "turn", "1"])
+        except (ValueError, KeyError, NotImplementedError):
+            continue  # a move or a form the simulation doesn't know
+        battles.append(battle)
+
+    return battles
+
+"""
+Build the root of the search of a position, as the MM agent does
+Parameters: battle: the battle of the position
+Returns: the root node
+"""
+def root_node(battle: Gen8Battle) -> BattleStatus:
+    weather, terrains, _, opp_conditions = get_battle_info(battle).values()
+    opp_pokemon = battle.opponent_active_pokemon
+    available_moves = sorted(battle.available_moves, reverse=True, key=lambda move: int(move.base_power))
+    return BattleStatus(NodePokemon(battle.active_pokemon, is_act_poke=True, moves=available_moves),
+                        NodePokemon(opp_pokemon, is_act_poke=False, moves=list(opp_pokemon.moves.values())),
+                        battle.available_switches, [poke for poke in battle.opponent_team.values() if not poke.active],
+                        battle.weather, terrains, opp_conditions, None, get_move('splash'), True)
+
+"""
+Measure the nodes a heuristic lets the search visit per second, searching the same positions at the same depth
+Parameters: heuristic: the heuristic
+Parameters: battles: the positions
+Parameters: max_depth: the depth of the search
+Returns: a tuple made up of the nodes searched, the search time in seconds and the nodes per second
+"""
+def nodes_per_second(heuristic: Heuristic, battles: List[Gen8Battle], max_depth: int = 2) -> Tuple[int, float, float]:
+    player = MiniMaxPlayer(player_configuration=PlayerConfiguration("benchmark", None), start_listening=False,
+                           heuristic=heuristic, max_depth=max_depth)
+    for battle in battles:
+        root = root_node(battle)
+        start = perf_counter()
+        heuristic.prepare(root)
+        player.alphabeta(root, 0, float('-inf'), float('+inf'), True)
+        player.record_search(0, perf_counter() - start)
+
+    return player.nodes_searched, player.search_time, player.nodes_searched / max(player.search_time, 1e-9)
+
+"""
+Play the MM agent with the learned heuristic against the MM agent with TeamHeuristic, at the same depth, and report
+the win rate of the learned heuristic with its 95% Wilson interval and the nodes per second of both agents during the
+battles. The learned heuristic is stronger if the interval is above 50%
+Parameters: model_path: the .npz file of the value network
+Parameters: matches: the number of battles
+Parameters: max_depth: the depth of the searches of both agents
+Parameters: concurrency: max concurrent battles of the agents
+Parameters: server_configuration: the server the agents connect to
+Returns: the results, with the wins, the battles, the interval and the nodes per second of both agents
+"""
+async def evaluate_heuristics(model_path: str,
+                              matches: int = 100,
+                              max_depth: int = 2,
+                              concurrency: int = 10,
+                              server_configuration: ServerConfiguration = LocalhostServerConfiguration) -> Dict:
+    tag = random.randint(0, 100000)
+    learned = build_agent("MM", concurrency, username="MMLearned{0}".format(tag),
+                          server_configuration=server_configuration, heuristic=LearnedHeuristic(model_path),
+                          max_depth=max_depth, keep_battles=concurrency)
+    team = build_agent("MM", concurrency, username="MMTeam{0}".format(tag), server_configuration=server_configuration,
+                       heuristic=TeamHeuristic(), max_depth=max_depth, keep_battles=concurrency)
+    await learned.battle_against(team, matches)
+
+    wins, games = learned.n_won_battles, learned.n_won_battles + learned.n_lost_battles
+    lower, upper = wilson_interval(wins, games)
+    results = {"wins": wins, "games": games, "interval": (lower, upper), "stronger": lower > 0.5}
+    for name, agent in [("learned", learned), ("team", team)]:
+        results[name + "_nodes_per_second"] = agent.nodes_searched / max(agent.search_time, 1e-9)
+
+    print(tabulate([["agent", "win rate", "95% interval", "nodes/s"],
+                    ["LearnedHeuristic", round(wins / games, 3) if games > 0 else None,
+                     "[{0:.3f}, {1:.3f}]".format(lower, upper), round(results["learned_nodes_per_second"])],
+                    ["TeamHeuristic", round(1 - wins / games, 3) if games > 0 else None,
+                     "[{0:.3f}, {1:.3f}]".format(1 - upper, 1 - lower), round(results["team_nodes_per_second"])]]))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare the learned heuristic with TeamHeuristic: nodes per second "
+                                                 "on random positions and, with --matches, MM against MM battles")
+    parser.add_argument("--model", default="results/value_network.npz")
+    parser.add_argument("--positions", type=int, default=50)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--matches", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    positions = random_positions(args.positions, args.seed)
+    table = [["heuristic", "nodes", "seconds", "nodes/s"]]
+    for heuristic in [TeamHeuristic(), LearnedHeuristic(args.model)]:
+        nodes, seconds, speed = nodes_per_second(heuristic, positions, args.depth)
+        table.append([type(heuristic).__name__, nodes, round(seconds, 3), round(speed)])
+    print(tabulate(table))
+
+    if args.matches > 0:
+        asyncio.new_event_loop().run_until_complete(evaluate_heuristics(args.model, args.matches, args.depth,
+                                                                        args.concurrency))
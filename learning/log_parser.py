@@ -0,0 +1,365 @@
+from concurrent.futures import as_completed
+from utils.workers import worker_pool
+from poke_env.environment import AbstractBattle, Gen8Battle, Pokemon
+from poke_env.environment.move import MOVES, Move
+from poke_env.data import to_id_str
+from core.stats import estimate_stat
+from core.max_moves import MAX_GUARD_ID
+from core.species_tables import RANDOM_BATTLE_DATA
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import argparse
+import bz2
+import gzip
+import json
+import logging
+import lzma
+import os
+import numpy as np
+
+# Sides of a singles battle
+SIDES = ["p1", "p2"]
+
+# Extensions of the log files read by the parser
+LOG_EXTENSIONS = (".log", ".txt", ".json", ".jsonl", ".html")
+
+"""
+Open a log file as text, decompressing it on the fly according to its extension
+Parameters: path: the path of the file
+Returns: the file object
+"""
+def open_log(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rt", encoding="utf-8", errors="replace")
+    if path.endswith(".xz") or path.endswith(".lzma"):
+        return lzma.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, "r", encoding="utf-8", errors="replace")
+
+"""
+Retrieve the protocol lines of a log file, one at a time. The file can hold plain protocol lines, the replays saved
+by the agents, whose first line starts with the room of the battle, or JSON battle logs, one per line, with the
+protocol in their "log" field, as a list or as a single string
+Parameters: file: the file object
+Returns: an iterator over tuples made up of the room of the battle, if it is known, and a protocol line
+"""
+def protocol_lines(file) -> Iterator[Tuple[Optional[str], str]]:
+    for line in file:
+        line = line.rstrip("\n")
+        if line.startswith("|"):
+            yield None, line
+        elif line.startswith(">"):
+            room, _, rest = line[1:].partition("|")
+            yield room.strip(), "|" + rest if rest else "|"
+        elif line.startswith("{"):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            log = entry.get("log", [])
+            room = entry.get("roomid", entry.get("id"))
+            for log_line in log.split("\n") if isinstance(log, str) else log:
+                if log_line.startswith("|"):
+                    yield room, log_line
+            # A JSON log always contains a whole battle
+            yield room, "|end"
+
+
+"""
+Encode the position of a side with the position encoder, the default features of the decision records
+Parameters: battle: the battle seen from the side that takes the decision
+Returns: the feature vector
+"""
+def encode_position(battle: AbstractBattle) -> List[float]:
+    from mm.PositionEncoder import PositionEncoder
+
+    return PositionEncoder().encode_battle(battle).tolist()
+
+
+"""
+Rebuild the battles of a stream of protocol lines and extract the decisions of both sides. Every battle is followed
+from the point of view of each side with a Gen8Battle, the same state the agents use, so the core functions can be
+applied to it. A decision is recorded at the start of every turn and when the active Pokémon of a side faints, and
+is completed by the first move or switch of the side that follows it; when the battle finishes its decisions are
+labelled with the outcome for the side
+Parameters: featurize: the function that computes the features of the state of a decision, None to record no features
+"""
+class LogParser:
+
+    def __init__(self, featurize: Optional[Callable[[AbstractBattle], List[float]]] = encode_position):
+        self.featurize: Optional[Callable[[AbstractBattle], List[float]]] = featurize
+        self.logger: logging.Logger = logging.getLogger("log_parser")
+        self.battles: Dict[str, Gen8Battle] = dict()
+        self.players: Dict[str, str] = dict()
+        self.pending: Dict[str, Dict] = dict()
+        self.records: List[Dict] = []
+        self.room: Optional[str] = None
+        self.started: int = 0
+        self.finished: int = 0
+        self.skipped_lines: int = 0
+        self.failed_features: int = 0
+
+    def new_battle(self, room: Optional[str]) -> None:
+        self.started += 1
+        self.room = room if room else "battle-{0}".format(self.started)
+        self.battles, self.players, self.pending, self.records = dict(), dict(), dict(), []
+        for side in SIDES:
+            battle = Gen8Battle(battle_tag=self.room, username=side, logger=self.logger, save_replays=False)
+            battle._player_role = side
+            self.battles[side] = battle
+
+    """
+    Feed a protocol line to the parser
+    Parameters: room: the room of the battle the line belongs to, None if it is not known
+    Parameters: line: the protocol line
+    Returns: the labelled decisions of the battle, when the line finishes it
+    """
+    def feed(self, room: Optional[str], line: str) -> List[Dict]:
+        split_message = line.split("|")
+        if len(split_message) < 2 or split_message[1] == "":
+            return []
+        message = split_message[1]
+        # The header of a battle can come before its init message, which only starts a new battle after a finished one
+        restarted = message == "init" and len(self.battles) > 0 and self.battles["p1"].turn > 0
+        if len(self.battles) == 0 or (room is not None and room != self.room) or restarted:
+            if message in ["end", "win", "tie"]:
+                return []
+            self.new_battle(room)
+
+        if message == "player" and len(split_message) >= 4:
+            self.players[split_message[3]] = split_message[2]
+            return []
+        if message in ["win", "tie", "end"]:
+            return self.finish(split_message[2] if message == "win" and len(split_message) > 2 else None,
+                               message != "end")
+
+        side = split_message[2][:2] if len(split_message) > 2 and split_message[2][:2] in SIDES else None
+        if side is not None and side in self.pending:
+            self.complete(side, split_message)
+
+        for battle in self.battles.values():
+            try:
+                battle._parse_message(split_message)
+            except (NotImplementedError, ValueError, KeyError, IndexError, AttributeError):
+                self.skipped_lines += 1
+
+        if message == "turn":
+            for side in SIDES:
+                self.start_decision(side, False)
+        elif message == "faint" and side is not None:
+            self.start_decision(side, True)
+        return []
+
+    """
+    Record the state of a side at a decision, waiting for the action that completes it. The logs do not show the
+    stats of the Pokémon of a side, so they are estimated as the agents do for the ones of the opponent
+    Parameters: side: the side of the decision
+    Parameters: forced: whether the decision is a switch forced by a knock out
+    """
+    def start_decision(self, side: str, forced: bool) -> None:
+        battle = self.battles[side]
+        if battle.active_pokemon is None or battle.opponent_active_pokemon is None:
+            return
+
+        for pokemon in battle.team.values():
+            if pokemon.stats["spe"] is None:
+                pokemon._last_request["stats"] = {stat: estimate_stat(pokemon, stat)
+                                                  for stat in ["atk", "def", "spa", "spd", "spe"]}
+
+        features = None
+        if self.featurize is not None:
+            try:
+                features = self.featurize(battle)
+            except Exception as error:
+                self.failed_features += 1
+                self.logger.debug("Could not encode turn %s of %s for %s: %r", battle.turn, self.room, side, error)
+        self.pending[side] = {"battle": self.room, "turn": battle.turn, "player": side, "forced": forced,
+                              "dynamax": False, "features": features}
+
+    """
+    Complete the pending decision of a side with its first move or switch
+    Parameters: side: the side of the decision
+    Parameters: split_message: the protocol message
+    """
+    def complete(self, side: str, split_message: List[str]) -> None:
+        message = split_message[1]
+        if message == "-start" and len(split_message) > 3 and split_message[3] == "Dynamax":
+            self.pending[side]["dynamax"] = True
+        elif (message == "move" and not any(part.startswith("[from]") for part in split_message[4:])) \
+                or message == "switch":
+            record = self.pending.pop(side)
+            if message == "move":
+                # A dynamaxed Pokémon uses the max moves, the decision is the move it comes from
+                move_id = to_id_str(split_message[3])
+                if move_id in MOVES and Move.is_max_move(move_id) and self.battles[side].active_pokemon is not None:
+                    move_id = base_move(self.battles[side].active_pokemon, move_id)
+                record["action"], record["choice"] = "move", move_id
+            else:
+                record["action"], record["choice"] = "switch", to_id_str(split_message[3].split(",")[0])
+            self.records.append(record)
+        elif message == "cant":
+            self.pending.pop(side)
+
+    """
+    Label the decisions of the current battle with its outcome
+    Parameters: winner: the username of the winner, None on a tie or if it is not known
+    Parameters: known: whether the outcome is known
+    Returns: the labelled decisions
+    """
+    def finish(self, winner: Optional[str], known: bool) -> List[Dict]:
+        if len(self.battles) == 0:
+            return []
+
+        winner_side = self.players.get(winner) if winner is not None else None
+        records = []
+        if known:
+            for record in self.records:
+                record["outcome"] = 0 if winner_side is None else 1 if record["player"] == winner_side else -1
+                records.append(record)
+            self.finished += 1
+
+        self.battles, self.players, self.pending, self.records = dict(), dict(), dict(), []
+        return records
+
+
+"""
+Retrieve the moves of the random battle sets, the ones of the dynamax sets included
+Parameters: data_path: the sets of the random battles
+Returns: the ids of the moves by species, empty if the sets are not available
+"""
+@lru_cache(maxsize=4)
+def random_battle_moves(data_path: str = RANDOM_BATTLE_DATA) -> Dict[str, List[str]]:
+    if not os.path.exists(data_path):
+        return dict()
+
+    with open(data_path, "r") as file:
+        sets = json.load(file)
+    return {species: sorted(set(entry.get("moves", [])) | set(entry.get("noDynamaxMoves", [])))
+            for species, entry in sets.items()}
+
+"""
+Find the move a max move comes from, among the known moves of the Pokémon and then the ones of its random battle
+sets: Max Guard comes from a status move, the other max moves from a damaging move of their type
+Parameters: pokemon: the dynamaxed Pokémon
+Parameters: max_move_id: the id of the max move
+Returns: the id of the move, the one of the max move if it can't be told
+"""
+def base_move(pokemon: Pokemon, max_move_id: str) -> str:
+    if max_move_id not in MOVES:
+        return max_move_id
+
+    def becomes_max_move(move_id: str) -> bool:
+        entry = MOVES.get(move_id)
+        if entry is None or Move.is_max_move(move_id):
+            return False
+        if max_move_id == MAX_GUARD_ID:
+            return entry["category"] == "Status"
+        return entry["category"] != "Status" and entry["type"] == MOVES[max_move_id]["type"]
+
+    set_moves = random_battle_moves()
+    for candidates in [list(pokemon.moves.keys()),
+                       set_moves.get(pokemon.species, set_moves.get(pokemon.species + "gmax", []))]:
+        matches = [move_id for move_id in candidates if becomes_max_move(move_id)]
+        if len(matches) == 1:
+            return matches[0]
+        if len(matches) > 1:
+            break
+
+    return max_move_id
+
+
+"""
+Parse a log file and write its decisions in a compressed JSON lines file. The file is read as a stream and only the
+decisions of the current battle are kept in memory
+Parameters: path: the log file
+Parameters: out_dir: the directory of the decisions
+Parameters: features: whether the decisions include the features of the position encoder
+Returns: a tuple made up of the battles and the decisions extracted
+"""
+def parse_file(path: str, out_dir: str, features: bool = True) -> Tuple[int, int]:
+    parser = LogParser(encode_position if features else None)
+    os.makedirs(out_dir, exist_ok=True)
+    out_path = os.path.join(out_dir, os.path.basename(path) + ".decisions.jsonl.gz")
+    decisions = 0
+    with open_log(path) as file, gzip.open(out_path + ".tmp", "wt", encoding="utf-8") as out:
+        for room, line in protocol_lines(file):
+            for record in parser.feed(room, line):
+                out.write(json.dumps(record) + "\n")
+                decisions += 1
+    os.replace(out_path + ".tmp", out_path)
+    if parser.skipped_lines > 0 or parser.failed_features > 0:
+        parser.logger.warning("%s: %d lines skipped, %d positions not encoded", path, parser.skipped_lines,
+                              parser.failed_features)
+
+    return parser.finished, decisions
+
+"""
+Find the log files in a list of files and directories
+Parameters: paths: the files and directories
+Returns: the log files, compressed or not
+"""
+def find_logs(paths: List[str]) -> List[str]:
+    logs = []
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, files in sorted(os.walk(path)):
+                for file in sorted(files):
+                    name = file
+                    for extension in [".gz", ".bz2", ".xz", ".lzma"]:
+                        name = name[:-len(extension)] if name.endswith(extension) else name
+                    if name.endswith(LOG_EXTENSIONS):
+                        logs.append(os.path.join(directory, file))
+        else:
+            logs.append(path)
+
+    return logs
+
+"""
+Parse the log files in parallel, a file per job
+Parameters: paths: the log files and the directories that contain them
+Parameters: out_dir: the directory of the decisions
+Parameters: workers: the number of worker processes
+Parameters: features: whether the decisions include the features of the position encoder
+Returns: a tuple made up of the battles and the decisions extracted
+"""
+def parse_logs(paths: List[str], out_dir: str, workers: int = 4, features: bool = True) -> Tuple[int, int]:
+    battles, decisions = 0, 0
+    with worker_pool(workers) as executor:
+        futures = [executor.submit(parse_file, path, out_dir, features) for path in find_logs(paths)]
+        for future in as_completed(futures):
+            file_battles, file_decisions = future.result()
+            battles += file_battles
+            decisions += file_decisions
+            print("{0} battles, {1} decisions".format(battles, decisions))
+
+    return battles, decisions
+
+"""
+Load the decisions written by the parser as arrays, dropping the ones without features
+Parameters: decisions_dir: the directory of the decisions
+Returns: a tuple made up of the feature matrix and the outcomes
+"""
+def load_decisions(decisions_dir: str) -> Tuple[np.ndarray, np.ndarray]:
+    features, outcomes = [], []
+    for name in sorted(os.listdir(decisions_dir)):
+        if name.endswith(".decisions.jsonl.gz"):
+            with gzip.open(os.path.join(decisions_dir, name), "rt", encoding="utf-8") as file:
+                for line in file:
+                    record = json.loads(line)
+                    if record["features"] is not None:
+                        features.append(record["features"])
+                        outcomes.append(record["outcome"])
+
+    return np.array(features, dtype=np.float32), np.array(outcomes, dtype=np.int8)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Extract the decisions of the battles in Showdown logs")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--out", default="results/decisions")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--no-features", action="store_true")
+    args = parser.parse_args()
+
+    parse_logs(args.paths, args.out, args.workers, not args.no_features)
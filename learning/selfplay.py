@@ -0,0 +1,225 @@
+from concurrent.futures import as_completed
+from utils.workers import worker_pool
+from poke_env import ServerConfiguration, LocalhostServerConfiguration
+from poke_env.player import Player
+from typing import Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import os
+import uuid
+import numpy as np
+
+"""
+Writer of the labelled positions in compressed NumPy shards. The positions are buffered until a shard is full, so
+the memory used by a writer is bounded by the size of a shard whatever the number of positions generated
+Parameters: out_dir: the directory of the shards
+Parameters: prefix: the prefix of the names of the shards, unique for every writer
+Parameters: shard_size: the number of positions of a shard
+"""
+class ShardWriter:
+
+    def __init__(self, out_dir: str, prefix: str, shard_size: int = 100000):
+        self.out_dir: str = out_dir
+        self.prefix: str = prefix
+        self.shard_size: int = shard_size
+        self.features: List[np.ndarray] = []
+        self.outcomes: List[np.ndarray] = []
+        self.turns: List[np.ndarray] = []
+        self.buffered: int = 0
+        self.shards: int = 0
+        self.positions: int = 0
+        os.makedirs(out_dir, exist_ok=True)
+
+    """
+    Add the positions of a side of a battle
+    Parameters: features: the feature vectors of the positions, one per row
+    Parameters: outcome: the result of the battle for the side, 1 if it won, -1 if it lost and 0 on a tie
+    Parameters: turns: the turn of each position
+    """
+    def add(self, features: np.ndarray, outcome: int, turns: List[int]) -> None:
+        if len(features) == 0:
+            return
+
+        self.features.append(features)
+        self.outcomes.append(np.full(len(features), outcome, dtype=np.int8))
+        self.turns.append(np.array(turns, dtype=np.int16))
+        self.buffered += len(features)
+        self.positions += len(features)
+        if self.buffered >= self.shard_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.buffered == 0:
+            return
+
+        path = os.path.join(self.out_dir, "{0}-{1:05d}.npz".format(self.prefix, self.shards))
+        np.savez_compressed(path, features=np.concatenate(self.features), outcomes=np.concatenate(self.outcomes),
+                            turns=np.concatenate(self.turns))
+        self.features, self.outcomes, self.turns = [], [], []
+        self.buffered = 0
+        self.shards += 1
+
+
+"""
+Record the positions in which an agent takes a decision, encoded by the position encoder, until the battles finish
+and their outcome is known
+Parameters: agent: the agent
+"""
+class PositionRecorder:
+
+    def __init__(self, agent: Player):
+        from mm.PositionEncoder import PositionEncoder
+
+        self.agent: Player = agent
+        self.encoder: PositionEncoder = PositionEncoder()
+        self.positions: Dict[str, List[Tuple[int, np.ndarray]]] = dict()
+        self.choose_move = agent.choose_move
+        # The decisions of the agent go through the recorder, which encodes the position first
+        agent.choose_move = self.record
+
+    def record(self, battle):
+        if battle.active_pokemon is not None and battle.opponent_active_pokemon is not None:
+            self.positions.setdefault(battle.battle_tag, []).append((battle.turn, self.encoder.encode_battle(battle)))
+
+        return self.choose_move(battle)
+
+    """
+    Label the positions of the finished battles with their outcome and hand them to a writer
+    Parameters: writer: the writer of the shards
+    Returns: the number of finished battles
+    """
+    def label(self, writer: ShardWriter) -> int:
+        finished = [battle_tag for battle_tag in self.positions
+                    if battle_tag in self.agent.battles and self.agent.battles[battle_tag].finished]
+        for battle_tag in finished:
+            battle = self.agent.battles[battle_tag]
+            positions = self.positions.pop(battle_tag)
+            outcome = 1 if battle.won else -1 if battle.lost else 0
+            writer.add(np.stack([features for _, features in positions]), outcome, [turn for turn, _ in positions])
+
+        return len(finished)
+
+
+"""
+Play the self-play battles of a matchup and write the positions of both sides in shards. The function runs in a
+worker process, so every call builds its own agents, with a unique username, and its own event loop
+Parameters: playmode: the play mode of the first agent
+Parameters: opp_playmode: the play mode of the second agent
+Parameters: games: the number of battles
+Parameters: out_dir: the directory of the shards
+Parameters: shard_size: the number of positions of a shard
+Parameters: server_configuration: the server the agents connect to
+Parameters: concurrency: max concurrent battles of the agents
+Returns: a tuple made up of the battles played and the positions written
+"""
+def play_selfplay(playmode: str,
+                  opp_playmode: str,
+                  games: int,
+                  out_dir: str,
+                  shard_size: int = 100000,
+                  server_configuration: ServerConfiguration = LocalhostServerConfiguration,
+                  concurrency: int = 10) -> Tuple[int, int]:
+    from players.agents import build_agent
+
+    async def play() -> Tuple[int, int]:
+        tag = uuid.uuid4().hex[:8]
+        writer = ShardWriter(out_dir, "{0}-{1}-{2}".format(playmode, opp_playmode, tag), shard_size)
+        agent = build_agent(playmode, concurrency, username="Self{0}1{1}".format(playmode, tag),
+                            server_configuration=server_configuration, keep_battles=concurrency)
+        opponent = build_agent(opp_playmode, concurrency, username="Self{0}2{1}".format(opp_playmode, tag),
+                               server_configuration=server_configuration, keep_battles=concurrency)
+        recorders = [PositionRecorder(agent), PositionRecorder(opponent)]
+
+        # The battles are played in rounds, so that the positions of the finished ones are labelled before their
+        # battles are evicted by the retention policy of the agents
+        played = 0
+        while played < games:
+            n_battles = min(concurrency, games - played)
+            await agent.battle_against(opponent, n_battles=n_battles)
+            played += n_battles
+            for recorder in recorders:
+                recorder.label(writer)
+
+        writer.flush()
+        return played, writer.positions
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(play())
+    finally:
+        loop.close()
+
+"""
+Generate labelled positions by self-play among the agents: every pair of play modes, the mirror ones included, plays
+the given number of battles split in jobs run by worker processes
+Parameters: playmodes: the play modes of the agents
+Parameters: games: the number of battles of every pair of play modes
+Parameters: out_dir: the directory of the shards
+Parameters: workers: the number of worker processes
+Parameters: games_per_job: the number of battles of a job
+Parameters: shard_size: the number of positions of a shard
+Parameters: server_configuration: the server the agents connect to
+Returns: a tuple made up of the battles played and the positions written
+"""
+def generate(playmodes: List[str],
+             games: int,
+             out_dir: str,
+             workers: int = 4,
+             games_per_job: int = 50,
+             shard_size: int = 100000,
+             server_configuration: ServerConfiguration = LocalhostServerConfiguration) -> Tuple[int, int]:
+    jobs = []
+    for i in range(len(playmodes)):
+        for j in range(i, len(playmodes)):
+            for start in range(0, games, games_per_job):
+                jobs.append((playmodes[i], playmodes[j], min(games_per_job, games - start)))
+
+    played, positions = 0, 0
+    with worker_pool(workers) as executor:
+        futures = [executor.submit(play_selfplay, playmode, opp_playmode, job_games, out_dir, shard_size,
+                                   server_configuration) for playmode, opp_playmode, job_games in jobs]
+        for future in as_completed(futures):
+            job_played, job_positions = future.result()
+            played += job_played
+            positions += job_positions
+            print("{0} battles, {1} positions".format(played, positions))
+
+    return played, positions
+
+"""
+Load the positions of the shards in a directory
+Parameters: shards_dir: the directory of the shards
+Parameters: max_positions: the max number of positions to load, all of them if None
+Returns: a tuple made up of the feature matrix, the outcomes and the turns
+"""
+def load_shards(shards_dir: str, max_positions: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    features, outcomes, turns = [], [], []
+    loaded = 0
+    for name in sorted(os.listdir(shards_dir)):
+        if not name.endswith(".npz") or (max_positions is not None and loaded >= max_positions):
+            continue
+
+        with np.load(os.path.join(shards_dir, name)) as shard:
+            features.append(shard["features"])
+            outcomes.append(shard["outcomes"])
+            turns.append(shard["turns"])
+        loaded += len(features[-1])
+
+    if len(features) == 0:
+        return np.zeros((0, 0), dtype=np.float32), np.zeros(0, dtype=np.int8), np.zeros(0, dtype=np.int16)
+
+    return np.concatenate(features)[:max_positions], np.concatenate(outcomes)[:max_positions], \
+        np.concatenate(turns)[:max_positions]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate labelled positions by self-play among the agents")
+    parser.add_argument("--out", default="results/selfplay")
+    parser.add_argument("--playmodes", nargs="+", default=["DM", "MM"])
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--games-per-job", type=int, default=50)
+    parser.add_argument("--shard-size", type=int, default=100000)
+    args = parser.parse_args()
+
+    generate(args.playmodes, args.games, args.out, args.workers, args.games_per_job, args.shard_size)
@@ -0,0 +1,122 @@
+from learning.selfplay import load_shards
+from mm.LearnedHeuristic import ValueNetwork
+from typing import List, Tuple
+import argparse
+import numpy as np
+
+"""
+Initialize a value network with He initialization and the statistics of the training features
+Parameters: features: the training features
+Parameters: hidden: the sizes of the hidden layers
+Parameters: rng: the random generator
+Returns: the value network
+"""
+def init_network(features: np.ndarray, hidden: List[int], rng: np.random.Generator) -> ValueNetwork:
+    sizes = [features.shape[1]] + hidden + [1]
+    weights = [rng.normal(0, np.sqrt(2 / n_in), (n_in, n_out)) for n_in, n_out in zip(sizes[:-1], sizes[1:])]
+    biases = [np.zeros(n_out) for n_out in sizes[1:]]
+    return ValueNetwork(weights, biases, features.mean(axis=0), features.std(axis=0))
+
+"""
+Compute the mean squared error between the outputs of a network and the outcomes, and its gradients
+Parameters: network: the value network
+Parameters: features: a batch of features
+Parameters: outcomes: the outcomes of the batch
+Returns: a tuple made up of the loss and the gradients of the weights and biases
+"""
+def loss_and_gradients(network: ValueNetwork, features: np.ndarray, outcomes: np.ndarray) \
+        -> Tuple[float, List[np.ndarray], List[np.ndarray]]:
+    activations = [(features - network.mean) / network.std]
+    for w, b in zip(network.weights[:-1], network.biases[:-1]):
+        activations.append(np.maximum(activations[-1] @ w + b, 0))
+    output = np.tanh(activations[-1] @ network.weights[-1] + network.biases[-1])[:, 0]
+
+    error = output - outcomes
+    delta = (2 * error * (1 - output ** 2) / len(outcomes))[:, None]
+    weight_gradients, bias_gradients = [], []
+    for i in reversed(range(len(network.weights))):
+        weight_gradients.insert(0, activations[i].T @ delta)
+        bias_gradients.insert(0, delta.sum(axis=0))
+        if i > 0:
+            delta = (delta @ network.weights[i].T) * (activations[i] > 0)
+
+    return float(np.mean(error ** 2)), weight_gradients, bias_gradients
+
+"""
+Train a value network on self-play positions with Adam, keeping the network with the lowest validation loss
+Parameters: features: the features of the positions
+Parameters: outcomes: the outcomes of the positions
+Parameters: hidden: the sizes of the hidden layers
+Parameters: epochs: the number of passes over the training positions
+Parameters: batch_size: the number of positions of a step
+Parameters: learning_rate: the learning rate of Adam
+Parameters: validation: the fraction of the positions kept for validation
+Parameters: seed: the seed of the random generator
+Returns: the trained value network
+"""
+def train(features: np.ndarray,
+          outcomes: np.ndarray,
+          hidden: List[int],
+          epochs: int = 20,
+          batch_size: int = 256,
+          learning_rate: float = 1e-3,
+          validation: float = 0.1,
+          seed: int = 0) -> ValueNetwork:
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(features))
+    n_val = int(len(features) * validation)
+    val_x, val_y = features[order[:n_val]], outcomes[order[:n_val]].astype(np.float32)
+    train_x, train_y = features[order[n_val:]], outcomes[order[n_val:]].astype(np.float32)
+
+    network = init_network(train_x, hidden, rng)
+    params = network.weights + network.biases
+    moments = [np.zeros_like(param) for param in params]
+    velocities = [np.zeros_like(param) for param in params]
+    beta1, beta2, step = 0.9, 0.999, 0
+    best_loss, best_params = float("inf"), [param.copy() for param in params]
+
+    for epoch in range(epochs):
+        batches = rng.permutation(len(train_x))
+        for start in range(0, len(batches), batch_size):
+            batch = batches[start:start + batch_size]
+            _, weight_gradients, bias_gradients = loss_and_gradients(network, train_x[batch], train_y[batch])
+            step += 1
+            for param, gradient, moment, velocity in zip(params, weight_gradients + bias_gradients, moments,
+                                                         velocities):
+                moment *= beta1
+                moment += (1 - beta1) * gradient
+                velocity *= beta2
+                velocity += (1 - beta2) * gradient ** 2
+                param -= learning_rate * (moment / (1 - beta1 ** step)) / \
+                    (np.sqrt(velocity / (1 - beta2 ** step)) + 1e-8)
+
+        if n_val > 0:
+            val_output = network.forward(val_x)
+            val_loss = float(np.mean((val_output - val_y) ** 2))
+            accuracy = float(np.mean(np.sign(val_output) == val_y))
+            print("Epoch {0}: validation loss {1:.4f}, accuracy {2:.3f}".format(epoch + 1, val_loss, accuracy))
+            if val_loss < best_loss:
+                best_loss, best_params = val_loss, [param.copy() for param in params]
+
+    if n_val > 0:
+        for param, best_param in zip(params, best_params):
+            param[...] = best_param
+
+    return network
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Train the value network of the learned heuristic")
+    parser.add_argument("--shards", default="results/selfplay")
+    parser.add_argument("--out", default="results/value_network.npz")
+    parser.add_argument("--hidden", type=int, nargs="*", default=[32, 32])
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--learning-rate", type=float, default=1e-3)
+    parser.add_argument("--max-positions", type=int, default=None)
+    args = parser.parse_args()
+
+    features, outcomes, _ = load_shards(args.shards, args.max_positions)
+    network = train(features, outcomes, args.hidden, args.epochs, args.batch_size, args.learning_rate)
+    network.save(args.out)
+    print("Saved {0} trained on {1} positions".format(network, len(features)))
@@ -1,11 +1,6 @@
-from poke_env import PlayerConfiguration
-from players.BasePowerMaximumPlayer import BasePowerMaximumPlayer
-from players.DamageMaximumPlayer import DamageMaximumPlayer
-from players.MiniMaxPlayer import MiniMaxPlayer
-from utils.utils import evaluate
-from mm.TeamHeuristic import TeamHeuristic
+from players.agents import build_agent
+from utils.utils import evaluate, sequential_evaluate
 import asyncio
-import random
 
 async def main():
 
@@ -15,33 +10,21 @@ async def main():
     concurrency = 10
     # whether save the results, the default value is true
     save_results = True
+    # whether each pair stops as soon as its result is settled, with matches as the max number of matches
+    sequential = False
     #In this agent, we define 4 play modes: BasePowerMaximumPlayer,
     #DamageMaximumPlayer, MiniMaxPlayer
     playmodes = ["BPM", "DM", "MM"]
 
+    if sequential:
+        await sequential_evaluate(playmodes, matches, concurrency=concurrency, save_results=save_results)
+        return
+
     agents = list()
 
     for i in range(0, len(playmodes)):
-        if playmodes[i] == "BPM":
-            username = "BPMPlayer" + str(random.randint(0, 1000))
-            agent = BasePowerMaximumPlayer(player_configuration=PlayerConfiguration(username, None),
-                                        max_concurrent_battles=concurrency)
-
-        elif playmodes[i] == "DM":
-            username = "DMPlayer" + str(random.randint(0, 1000))
-            agent = DamageMaximumPlayer(player_configuration=PlayerConfiguration(username, None),
-                                      max_concurrent_battles=concurrency)
-            agent.can_switch = True
-
-        elif playmodes[i] == "MM":
-            username = "MMPlayer" + str(random.randint(0, 1000))
-            heuristic = TeamHeuristic()
-            agent = MiniMaxPlayer(player_configuration=PlayerConfiguration(username, None),
-                                   max_concurrent_battles=concurrency, heuristic=heuristic, max_depth=2)
-        else:
-            raise ValueError
-
-        agents.append(agent)
+        # the agents only keep their last finished battles, the win rates still count all of them
+        agents.append(build_agent(playmodes[i], concurrency, keep_battles=concurrency))
 
     await evaluate(agents, matches, save_results)
 
@@ -1,9 +1,11 @@
 import math
 from poke_env.environment import SideCondition
+from poke_env.environment.move import DynamaxMove
 from mm.Heuristic import Heuristic
 from mm.NodePokemon import NodePokemon
 from core.damage import compute_damage
 from core.useful_data import HEALING_MOVES
+from core.max_moves import max_move_boosts
 from core.utils import *
 from core.stats import *
 
@@ -40,6 +42,14 @@ class BattleStatus:
         self.move: Move | Pokemon = move
         self.poke_switched: bool = poke_switched
         self.move_first = self.can_outspeed(0.8)
+        # Values precomputed by the heuristic at the root, shared by the whole tree
+        self.heuristic_cache: Dict = {} if ancestor is None else ancestor.heuristic_cache
+        # Children already simulated, by action, when the search tree is kept across turns
+        self.children: Dict = dict()
+        # Node in the same place of the tree searched in the previous turn, whose children order the actions
+        self.previous: Optional[BattleStatus] = None
+        # Max moves the bot can use by dynamaxing, searched only at the root
+        self.dynamax_actions: List[Move] = []
         self.id = self.last_id
         self.inc_id()
 
@@ -56,7 +66,7 @@ class BattleStatus:
         # outspeed_p = outspeed_prob(self.act_poke.pokemon, self.opp_poke.pokemon)["outspeed_p"]
         all_actions: List[Move | Pokemon] = []  # self.avail_switches
         if not self.act_poke.is_fainted() and len(self.act_poke.moves) > 0:
-            all_actions = self.act_poke.moves + all_actions
+            all_actions = self.act_poke.moves + self.dynamax_actions + all_actions
 
         return all_actions
 
@@ -93,26 +103,31 @@ class BattleStatus:
         weather = None if len(self.weather.keys()) == 0 else next(iter(self.weather.keys()))
         if is_my_turn:
             if isinstance(move, Move):
+                # A max move chosen by a Pokémon that is not dynamaxed yet starts the dynamax
+                attacker = self.act_poke
+                if isinstance(move, DynamaxMove) and attacker.dynamax_turns == 0 and not attacker.pokemon.is_dynamaxed:
+                    attacker = attacker.dynamaxed()
+
                 damage = self.guess_damage(is_my_turn, move, weather)
 
                 self.weather = self.get_active_weather(move, update_turn=False)
                 opp_poke_updated_hp = self.opp_poke.current_hp - damage
 
-                att_boost, def_boost = self.compute_updated_boosts(self.act_poke, self.opp_poke, move)
-                act_poke_upd_hp = self.act_poke.current_hp
+                att_boost, def_boost = self.compute_updated_boosts(attacker, self.opp_poke, move)
+                act_poke_upd_hp = attacker.current_hp
 
-                heal, _ = self.compute_healing(self.act_poke, move, weather, self.terrains)
+                heal, _ = self.compute_healing(attacker, move, weather, self.terrains)
                 act_poke_upd_hp += heal
 
-                recoil: int = self.compute_recoil(self.act_poke, move, damage)
+                recoil: int = self.compute_recoil(attacker, move, damage)
                 act_poke_upd_hp = act_poke_upd_hp - recoil
 
                 # Compute drain dealt by the move
-                drain, _ = self.compute_drain(self.act_poke, move, damage)
+                drain, _ = self.compute_drain(attacker, move, damage)
                 act_poke_upd_hp += drain
 
                 opp_poke = self.opp_poke.clone(current_hp=opp_poke_updated_hp, boosts=def_boost)
-                act_poke = self.act_poke.clone(current_hp=act_poke_upd_hp, boosts=att_boost)
+                act_poke = attacker.clone(current_hp=act_poke_upd_hp, boosts=att_boost)
                 opp_team = self.remove_poke_from_switches(opp_poke, self.opp_team)
                 child = BattleStatus(act_poke, opp_poke,
                                      self.avail_switches, opp_team, self.weather, self.terrains,
@@ -129,7 +144,7 @@ class BattleStatus:
                     "ub"]
 
                 att_boost, def_boost = self.compute_updated_boosts(self.opp_poke, self.act_poke, move)
-                opp_poke_updated_hp = self.act_poke.current_hp - damage
+                opp_poke_updated_hp = self.act_poke.current_hp - self.act_poke.damage_taken(damage)
 
                 act_poke_upd_hp = self.opp_poke.current_hp
                 heal, _ = self.compute_healing(self.opp_poke, move, weather, self.terrains)
@@ -142,6 +157,7 @@ class BattleStatus:
                 act_poke_upd_hp += drain
 
                 act_poke = self.act_poke.clone(current_hp=opp_poke_updated_hp, boosts=def_boost)
+                act_poke.end_turn()
                 opp_poke = self.opp_poke.clone(current_hp=act_poke_upd_hp, boosts=att_boost)
                 avail_switches = self.remove_poke_from_switches(act_poke, self.avail_switches)
                 self.weather = self.get_active_weather(move, update_turn=True)
@@ -347,6 +363,9 @@ class BattleStatus:
     """
     @staticmethod
     def compute_updated_boosts(att_poke: NodePokemon, def_poke: NodePokemon, move: Move):
+        if isinstance(move, DynamaxMove):
+            return max_move_boosts(move, att_poke.boosts, def_poke.boosts)
+
         att_upd_boosts = att_poke.boosts.copy()
         def_upd_boosts = def_poke.boosts.copy()
         boosts = move.self_boost if move.boosts is None else move.boosts
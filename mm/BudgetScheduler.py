@@ -0,0 +1,131 @@
+from typing import Dict, Optional
+import math
+import re
+
+TIMER_MESSAGE = re.compile(r"Time left: (\d+) sec this turn \| (\d+) sec total")
+
+"""
+Share a global search time budget among the battles a player is playing at the same time. Every decision asks for
+a share proportional to its priority with respect to the other active battles: endgames, big trees and positions
+where the best root moves are close get more time, while the time left on the battle timer caps it. The time not
+used by cheap decisions is banked and given to the following ones
+Parameters: budget_per_decision: the average search time of a decision, in seconds
+Parameters: min_time: the minimum search time of a decision, in seconds
+Parameters: max_time: the maximum search time of a decision, in seconds
+Parameters: timer_fraction: the max fraction of the remaining battle timer a decision can use
+Parameters: max_bank: the max search time that can be banked, in seconds
+Parameters: gap_scale: the difference between the two best root scores under which a decision is considered close
+"""
+class BudgetScheduler:
+
+    def __init__(self,
+                 budget_per_decision: float = 1.0,
+                 min_time: float = 0.05,
+                 max_time: float = 10.0,
+                 timer_fraction: float = 0.1,
+                 max_bank: float = 30.0,
+                 gap_scale: float = 0.05):
+        self.budget_per_decision: float = budget_per_decision
+        self.min_time: float = min_time
+        self.max_time: float = max_time
+        self.timer_fraction: float = timer_fraction
+        self.max_bank: float = max_bank
+        self.gap_scale: float = gap_scale
+        self.bank: float = 0
+        self.priorities: Dict[str, float] = dict()
+        self.root_gaps: Dict[str, float] = dict()
+        self.time_left: Dict[str, int] = dict()
+
+    """
+    Retrieve the total seconds left on the battle timer from a message of the server
+    Parameters: message: the content of an "inactive" message
+    Returns: the seconds left, None if the message doesn't report them
+    """
+    @staticmethod
+    def parse_timer(message: str) -> Optional[int]:
+        match = TIMER_MESSAGE.search(message)
+        return int(match.group(2)) if match else None
+
+    def observe_timer(self, battle_tag: str, message: str) -> None:
+        time_left = self.parse_timer(message)
+        if time_left is not None:
+            self.time_left[battle_tag] = time_left
+
+    """
+    Compute the priority of a decision
+    Parameters: battle_tag: the tag of the battle
+    Parameters: alive_pokemon: the number of Pokémon still alive on both sides
+    Parameters: branching: the number of actions of both active Pokémon at the root, multiplied together
+    Returns: the priority of the decision
+    """
+    def priority(self, battle_tag: str, alive_pokemon: int, branching: int) -> float:
+        # Fewer Pokémon left means that every decision weighs more on the result
+        phase = 1 + max(0, 12 - alive_pokemon) / 12
+
+        # Bigger trees need more time to reach the same depth
+        size = math.sqrt(max(branching, 1) / 16)
+
+        # If the best root moves were close in the previous decision, the position is critical
+        gap = self.root_gaps.get(battle_tag)
+        closeness = 0.5 if gap is None else 1 / (1 + gap / self.gap_scale)
+
+        return phase * size * (0.5 + closeness)
+
+    """
+    Allocate the search time of a decision, given its priority with respect to the other active battles
+    Parameters: battle_tag: the tag of the battle
+    Parameters: priority: the priority of the decision
+    Returns: the search time, in seconds
+    """
+    def allocate(self, battle_tag: str, priority: float) -> float:
+        self.priorities[battle_tag] = priority
+        mean_priority = sum(self.priorities.values()) / len(self.priorities)
+        share = self.budget_per_decision * priority / mean_priority
+
+        # Decisions above the mean priority can draw on the banked time
+        if priority > mean_priority and self.bank > 0:
+            extra = min(self.bank, share * (priority / mean_priority - 1))
+            self.bank -= extra
+            share += extra
+
+        time_left = self.time_left.get(battle_tag)
+        if time_left is not None:
+            share = min(share, self.timer_fraction * time_left)
+
+        return min(max(share, self.min_time), self.max_time)
+
+    """
+    Compute the time a battle can spend pondering while the opponent decides: the share of the budget its last
+    decision had, without drawing on the banked time. Pondering doesn't use the battle timer, so it isn't capped by it
+    Parameters: battle_tag: the tag of the battle
+    Returns: the pondering time, in seconds
+    """
+    def ponder_time(self, battle_tag: str) -> float:
+        share = self.budget_per_decision
+        priority = self.priorities.get(battle_tag)
+        if priority is not None:
+            share *= priority / (sum(self.priorities.values()) / len(self.priorities))
+
+        return min(max(share, self.min_time), self.max_time)
+
+    """
+    Report the end of a decision: the unused time is banked and the gap between the two best root scores is kept
+    for the next decision of the same battle
+    Parameters: battle_tag: the tag of the battle
+    Parameters: allocated: the allocated search time, in seconds
+    Parameters: used: the search time actually used, in seconds
+    Parameters: root_gap: the difference between the two best root scores, None if there was only one move
+    """
+    def release(self, battle_tag: str, allocated: float, used: float, root_gap: Optional[float]) -> None:
+        self.bank = min(self.max_bank, max(0.0, self.bank + allocated - used))
+        if root_gap is not None:
+            self.root_gaps[battle_tag] = root_gap
+
+    """
+    Forget a finished battle
+    Parameters: battle_tag: the tag of the battle
+    """
+    def finish(self, battle_tag: str) -> None:
+        self.priorities.pop(battle_tag, None)
+        self.root_gaps.pop(battle_tag, None)
+        self.time_left.pop(battle_tag, None)
@@ -0,0 +1,215 @@
+from typing import Dict, List, Optional, Tuple
+from poke_env.environment import Move, Weather, Field, SideCondition
+from mm.BattleStatus import BattleStatus
+from mm.NodePokemon import NodePokemon
+from core.move_registry import get_move
+from core.stats import estimate_stat, compute_stat_modifiers
+
+# Results of a solved position
+WIN = 1
+LOSS = -1
+
+"""
+Solve endgames exactly: when both sides have few Pokémon left, every turn is expanded, with both possible move
+orders and the replacements after a faint, until one of the sides has no Pokémon left. The damage is the one of
+BattleStatus.simulate_action, the lower bound for us and the upper bound for the opponent, and the opponent knows our
+move, so a proven win is won whatever the damage rolls. When the move order is not certain, on a speed tie or when
+the opponent may hold a Choice Scarf, both orders are searched and the opponent gets the worse one for us. The
+solver assumes that the moves of the opponent's Pokémon are all known. Proven positions are stored in a table that
+can be kept across the turns of a battle, under keys that include the field
+Parameters: max_turns: the max number of turns from the root
+Parameters: max_nodes: the max number of positions expanded by a call to solve
+Parameters: weather: the weather of the battle
+Parameters: terrains: list of active terrains in the battle
+Parameters: opp_conditions: the conditions on the opponent field
+"""
+class EndgameSolver:
+
+    def __init__(self,
+                 max_turns: int = 10,
+                 max_nodes: int = 20000,
+                 weather: Dict[Weather, int] = None,
+                 terrains: List[Field] = None,
+                 opp_conditions: List[SideCondition] = None):
+        self.max_turns: int = max_turns
+        self.max_nodes: int = max_nodes
+        self.weather: Dict[Weather, int] = dict() if weather is None else weather
+        self.terrains: List[Field] = [] if terrains is None else terrains
+        self.opp_conditions: List[SideCondition] = [] if opp_conditions is None else opp_conditions
+        self.nodes: int = 0
+        self.unknown: Dict[Tuple, int] = dict()
+        self.speed_cache: Dict[Tuple, Tuple[bool, ...]] = dict()
+        # The table is kept across the turns of a battle, while the field may change, so the field is in every key
+        self.field_key: Tuple = (tuple(sorted(weather.name for weather in self.weather)),
+                                 tuple(sorted(terrain.name for terrain in self.terrains)),
+                                 tuple(sorted(condition.name for condition in self.opp_conditions)))
+
+    """
+    Solve a position
+    Parameters: act_poke: our active Pokémon
+    Parameters: opp_poke: the opponent's active Pokémon
+    Parameters: bench: our other Pokémon still alive
+    Parameters: opp_bench: the other Pokémon of the opponent still alive
+    Parameters: table: the table of the proven positions
+    Returns: a tuple made up of the result, None if it's not proven, and the move that achieves it
+    """
+    def solve(self, act_poke: NodePokemon, opp_poke: NodePokemon, bench: List[NodePokemon],
+              opp_bench: List[NodePokemon], table: Dict) -> Tuple[Optional[int], Optional[Move]]:
+        self.nodes = 0
+        self.unknown = dict()
+        return self.__solve_turn((act_poke, opp_poke, tuple(bench), tuple(opp_bench)), self.max_turns, table)
+
+    """
+    Key of a position in the table of the proven positions: the Pokémon, with their health points, boosts, statuses
+    and moves, and the field
+    """
+    def position_key(self, position: Tuple) -> Tuple:
+        act_poke, opp_poke, bench, opp_bench = position
+
+        def pokemon_key(poke: NodePokemon) -> Tuple:
+            return (poke.pokemon.species, int(poke.current_hp), tuple(sorted(poke.boosts.items())),
+                    None if poke.status is None else poke.status.name, tuple(move.id for move in poke.moves))
+
+        return (pokemon_key(act_poke), pokemon_key(opp_poke), tuple(pokemon_key(poke) for poke in bench),
+                tuple(pokemon_key(poke) for poke in opp_bench), self.field_key)
+
+    """
+    Solve a position at the beginning of a turn, after the replacement of the fainted Pokémon
+    Returns: a tuple made up of the result, None if it's not proven, and the move that achieves it
+    """
+    def __solve_turn(self, position: Tuple, turns: int, table: Dict) -> Tuple[Optional[int], Optional[Move]]:
+        key = self.position_key(position)
+        if key in table:
+            return table[key]
+        # Positions that couldn't be proven with at least as many turns left
+        if self.unknown.get(key, -1) >= turns:
+            return None, None
+
+        self.nodes += 1
+        act_poke, opp_poke, _, _ = position
+        if turns == 0 or self.nodes > self.max_nodes or len(act_poke.moves) == 0 or len(opp_poke.moves) == 0:
+            self.unknown[key] = turns
+            return None, None
+
+        all_losses = True
+        for move in act_poke.moves:
+            # The opponent chooses its reply knowing our move
+            move_result = WIN
+            for opp_move in opp_poke.moves:
+                for act_first in self.__move_orders(act_poke, opp_poke, move, opp_move):
+                    result = self.__solve_replacements(self.__play_turn(position, move, opp_move, act_first),
+                                                       turns - 1, table)
+                    if result is None:
+                        move_result = None
+                    elif result == LOSS:
+                        move_result = LOSS
+                        break
+                if move_result == LOSS:
+                    break
+
+            if move_result == WIN:
+                table[key] = (WIN, move)
+                return WIN, move
+            if move_result is None:
+                all_losses = False
+
+        if all_losses:
+            table[key] = (LOSS, None)
+            return LOSS, None
+
+        self.unknown[key] = turns
+        return None, None
+
+    """
+    Solve a position at the end of a turn: the side whose active Pokémon fainted chooses the replacement, us first
+    Returns: the result, None if it's not proven
+    """
+    def __solve_replacements(self, position: Tuple, turns: int, table: Dict) -> Optional[int]:
+        act_poke, opp_poke, bench, opp_bench = position
+        if act_poke.is_fainted() and len(bench) == 0:
+            return LOSS
+        if opp_poke.is_fainted() and len(opp_bench) == 0:
+            return WIN
+
+        if act_poke.is_fainted():
+            unknown = False
+            for i, replacement in enumerate(bench):
+                result = self.__solve_replacements((replacement, opp_poke, bench[:i] + bench[i + 1:], opp_bench),
+                                                   turns, table)
+                if result == WIN:
+                    return WIN
+                unknown = unknown or result is None
+            return None if unknown else LOSS
+
+        if opp_poke.is_fainted():
+            unknown = False
+            for i, replacement in enumerate(opp_bench):
+                result = self.__solve_replacements((act_poke, replacement, bench, opp_bench[:i] + opp_bench[i + 1:]),
+                                                   turns, table)
+                if result == LOSS:
+                    return LOSS
+                unknown = unknown or result is None
+            return None if unknown else WIN
+
+        return self.__solve_turn(position, turns, table)[0]
+
+    """
+    Simulate a turn in which both the active Pokémon use a move. The first one to move is given, and the other one
+    moves only if it didn't faint
+    Returns: the position at the end of the turn
+    """
+    def __play_turn(self, position: Tuple, move: Move, opp_move: Move, act_first: bool) -> Tuple:
+        act_poke, opp_poke, bench, opp_bench = position
+        node = BattleStatus(act_poke, opp_poke, [], [], self.weather, self.terrains, self.opp_conditions, None,
+                            get_move('splash'), True)
+        if act_first:
+            node = node.simulate_action(move, True)
+            if not node.opp_poke.is_fainted() and not node.act_poke.is_fainted():
+                node = node.simulate_action(opp_move, False)
+        else:
+            node = node.simulate_action(opp_move, False)
+            if not node.act_poke.is_fainted() and not node.opp_poke.is_fainted():
+                node = node.simulate_action(move, True)
+
+        return node.act_poke, node.opp_poke, bench, opp_bench
+
+    """
+    Compute the speed of a Pokémon of the tree, with its simulated boosts. The speed of the opponent's Pokémon is the
+    one of the random battle sets
+    Parameters: poke: the Pokémon
+    Parameters: weather: the weather of the battle
+    Returns: the speed
+    """
+    def __speed(self, poke: NodePokemon, weather: Optional[Weather]) -> float:
+        pokemon = poke.pokemon
+        speed = pokemon.stats["spe"] if poke.is_act_poke and pokemon.stats["spe"] else estimate_stat(pokemon, "spe")
+        boost = poke.boosts.get("spe", 0)
+        speed *= (2 + boost) / 2 if boost > 0 else 2 / (2 - boost)
+        return speed * compute_stat_modifiers(pokemon, "spe", weather, self.terrains)
+
+    """
+    Compute the possible move orders of a turn. Under Trick Room the slower Pokémon moves first
+    Returns: the possible values of whether our Pokémon moves first, both when the order is not certain
+    """
+    def __move_orders(self, act_poke: NodePokemon, opp_poke: NodePokemon, move: Move, opp_move: Move) \
+            -> Tuple[bool, ...]:
+        if move.priority != opp_move.priority:
+            return (move.priority > opp_move.priority, )
+
+        key = (act_poke.pokemon.species, act_poke.boosts.get("spe", 0), opp_poke.pokemon.species,
+               opp_poke.boosts.get("spe", 0))
+        if key not in self.speed_cache:
+            weather = None if len(self.weather) == 0 else next(iter(self.weather.keys()))
+            act_speed, opp_speed = int(self.__speed(act_poke, weather)), int(self.__speed(opp_poke, weather))
+            # An item that is not revealed yet may be a Choice Scarf
+            scarf_speed = int(opp_speed * 1.5) if opp_poke.pokemon.item in ["unknown_item", None] else opp_speed
+            if act_speed > scarf_speed:
+                orders = (True, )
+            elif act_speed < opp_speed:
+                orders = (False, )
+            else:
+                orders = (True, False)
+            if Field.TRICK_ROOM in self.terrains and len(orders) == 1:
+                orders = (not orders[0], )
+            self.speed_cache[key] = orders
+        return self.speed_cache[key]
@@ -0,0 +1,166 @@
+from concurrent.futures import Future
+from contextlib import contextmanager
+from mm.Heuristic import Heuristic
+from typing import Dict, List, Tuple
+import queue
+import threading
+import time
+
+
+"""
+Evaluate the leaves of the searches of all the battles a process is playing with a single heuristic, in batches. The
+searches submit their leaves and wait on a future, while a thread of the server gathers the pending requests and
+flushes them when the batch is full, when every running search is waiting for it, or when the oldest request has
+waited for the max latency. A batch is evaluated with a call of the batch interface of the heuristic for each depth
+of its leaves, so the overhead of a call is paid once for all the battles
+Parameters: heuristic: the heuristic that evaluates the leaves
+Parameters: max_batch: the number of leaves that triggers a flush
+Parameters: max_latency: the max time a request waits before a flush, in seconds
+"""
+class EvaluationServer:
+    # Request that ends the thread of the server
+    CLOSE = object()
+
+    def __init__(self, heuristic: Heuristic, max_batch: int = 256, max_latency: float = 0.002):
+        self.heuristic: Heuristic = heuristic
+        self.max_batch: int = max_batch
+        self.max_latency: float = max_latency
+        self.requests: queue.Queue = queue.Queue()
+        self.clients: int = 0
+        self.clients_lock: threading.Lock = threading.Lock()
+        self.batches: int = 0
+        self.evaluated: int = 0
+        self.closed: bool = False
+        self.thread: threading.Thread = threading.Thread(target=self.serve, name="EvaluationServer", daemon=True)
+        self.thread.start()
+
+    """
+    Register a search for the time it runs, so that the server knows how many requests to wait for before a flush
+    """
+    @contextmanager
+    def client(self):
+        with self.clients_lock:
+            self.clients += 1
+        try:
+            yield self
+        finally:
+            with self.clients_lock:
+                self.clients -= 1
+            # A flush could be waiting for this search
+            self.requests.put(None)
+
+    """
+    Submit a batch of nodes to evaluate
+    Parameters: battle_nodes: the nodes to evaluate
+    Parameters: depth: depth of the nodes in the minimax tree
+    Returns: a future of the evaluation scores of the nodes, in the same order
+    """
+    def submit(self, battle_nodes: List, depth: int) -> Future:
+        if self.closed:
+            raise RuntimeError("the evaluation server is closed")
+
+        future = Future()
+        self.requests.put((battle_nodes, depth, future))
+        return future
+
+    """
+    Stop the thread of the server once it has evaluated the requests submitted so far, and wait for it
+    """
+    def close(self) -> None:
+        if self.closed:
+            return
+
+        self.closed = True
+        self.requests.put(self.CLOSE)
+        self.thread.join()
+
+    def evaluate(self, battle_nodes: List, depth: int) -> List[float]:
+        return self.submit(battle_nodes, depth).result()
+
+    @property
+    def mean_batch(self) -> float:
+        return self.evaluated / self.batches if self.batches > 0 else 0
+
+    def serve(self) -> None:
+        while True:
+            request = self.requests.get()
+            if request is self.CLOSE:
+                return
+            if request is None:
+                continue
+
+            pending = [request]
+            size = len(request[0])
+            deadline = time.perf_counter() + self.max_latency
+            while size < self.max_batch and len(pending) < max(self.clients, 1):
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self.requests.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if request is self.CLOSE:
+                    self.flush(pending)
+                    return
+                if request is not None:
+                    pending.append(request)
+                    size += len(request[0])
+
+            self.flush(pending)
+
+    """
+    Evaluate the pending requests, grouped by the depth of their nodes, and resolve their futures
+    Parameters: pending: the pending requests
+    """
+    def flush(self, pending: List[Tuple[List, int, Future]]) -> None:
+        by_depth: Dict[int, List[Tuple[List, int, Future]]] = dict()
+        for request in pending:
+            by_depth.setdefault(request[1], []).append(request)
+
+        for depth, requests in by_depth.items():
+            battle_nodes = [battle_node for request in requests for battle_node in request[0]]
+            try:
+                scores = self.heuristic.compute_batch(battle_nodes, depth)
+            except Exception as exception:
+                for _, _, future in requests:
+                    future.set_exception(exception)
+                continue
+
+            start = 0
+            for request_nodes, _, future in requests:
+                future.set_result(scores[start:start + len(request_nodes)])
+                start += len(request_nodes)
+
+        self.batches += 1
+        self.evaluated += sum([len(request[0]) for request in pending])
+
+    # The representation only depends on the heuristic, so that the decision cache tells apart two served heuristics
+    def __repr__(self) -> str:
+        return "EvaluationServer({0}, {1})".format(type(self.heuristic).__name__,
+                                                   sorted((name, repr(value))
+                                                          for name, value in vars(self.heuristic).items()))
+
+
+"""
+Heuristic that hands the evaluation of the nodes to an evaluation server shared by the searches of a process. The
+searches using it have to run in their own threads, since each of them waits for the batch of the server
+Parameters: server: the evaluation server
+"""
+class ServedHeuristic(Heuristic):
+
+    def __init__(self, server: EvaluationServer):
+        super(ServedHeuristic, self).__init__()
+        self.server: EvaluationServer = server
+
+    def prepare(self, root_node) -> None:
+        self.server.heuristic.prepare(root_node)
+
+    def compute(self, battle_node, depth: int) -> float:
+        return float(self.server.evaluate([battle_node], depth)[0])
+
+    def compute_batch(self, battle_nodes: List, depth: int) -> List[float]:
+        if len(battle_nodes) == 0:
+            return []
+
+        return self.server.evaluate(battle_nodes, depth)
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import List
 
 class Heuristic(ABC):
 
@@ -6,9 +7,26 @@ class Heuristic(ABC):
 
         super(Heuristic, self).__init__()
 
+    """
+    Precompute the values that stay constant during the search started from a root node. The default heuristic
+    has nothing to precompute
+    Parameters: root_node: root node of the minimax tree
+    """
+    def prepare(self, root_node) -> None:
+        pass
+
     """
     compute the evaluation function for the minimax algorithm
     """
     @abstractmethod
     def compute(self, battle_node, depth: int) -> float:
         pass
+
+    """
+    Compute the evaluation function for a batch of nodes that lie at the same depth of the minimax tree
+    Parameters: battle_nodes: the nodes to evaluate
+    Parameters: depth: depth of the nodes in the minimax tree
+    Returns: the evaluation scores of the nodes, in the same order
+    """
+    def compute_batch(self, battle_nodes: List, depth: int) -> List[float]:
+        return [self.compute(battle_node, depth) for battle_node in battle_nodes]
@@ -0,0 +1,92 @@
+from mm.BattleStatus import BattleStatus
+from mm.Heuristic import Heuristic
+from mm.PositionEncoder import PositionEncoder
+from typing import List
+import hashlib
+import numpy as np
+
+
+"""
+Value network of the learned heuristic: a multilayer perceptron with ReLU hidden layers and a tanh output, that
+estimates the outcome of a battle from the features of a position. It only needs NumPy, so it runs on the CPU of
+every worker without a deep learning framework
+Parameters: weights: the weight matrices of the layers
+Parameters: biases: the bias vectors of the layers
+Parameters: mean: the mean of the features, used to standardize them
+Parameters: std: the standard deviation of the features, used to standardize them
+"""
+class ValueNetwork:
+
+    def __init__(self, weights: List[np.ndarray], biases: List[np.ndarray], mean: np.ndarray, std: np.ndarray):
+        self.weights: List[np.ndarray] = [w.astype(np.float32) for w in weights]
+        self.biases: List[np.ndarray] = [b.astype(np.float32) for b in biases]
+        self.mean: np.ndarray = mean.astype(np.float32)
+        self.std: np.ndarray = np.maximum(std, 1e-6).astype(np.float32)
+
+    """
+    Estimate the outcome of a batch of positions
+    Parameters: features: a matrix with the feature vector of a position per row
+    Returns: the estimated outcomes, between -1 and 1
+    """
+    def forward(self, features: np.ndarray) -> np.ndarray:
+        activations = (features - self.mean) / self.std
+        for w, b in zip(self.weights[:-1], self.biases[:-1]):
+            activations = np.maximum(activations @ w + b, 0)
+
+        return np.tanh(activations @ self.weights[-1] + self.biases[-1])[:, 0]
+
+    def save(self, path: str) -> None:
+        arrays = {"mean": self.mean, "std": self.std}
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            arrays["weights_{0}".format(i)] = w
+            arrays["biases_{0}".format(i)] = b
+        np.savez(path, **arrays)
+
+    # The representation identifies the parameters, so that the decision cache tells apart two networks
+    def __repr__(self) -> str:
+        digest = hashlib.sha1()
+        for array in self.weights + self.biases + [self.mean, self.std]:
+            digest.update(array.tobytes())
+        return "ValueNetwork({0})".format(digest.hexdigest()[:12])
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path) as arrays:
+            layers = len([name for name in arrays.files if name.startswith("weights_")])
+            return cls([arrays["weights_{0}".format(i)] for i in range(layers)],
+                       [arrays["biases_{0}".format(i)] for i in range(layers)], arrays["mean"], arrays["std"])
+
+
+"""
+Evaluate the states in the minimax algorithm with a value network trained on self-play positions. The positions
+are encoded by the position encoder, the same one that generates the training data, and the leaves of a node are
+scored by a single forward pass of the network
+Parameters: model_path: the .npz file of the value network
+Parameters: penalty: the depth penalty of the heuristic
+"""
+class LearnedHeuristic(Heuristic):
+
+    def __init__(self, model_path: str, penalty: float = 0.01):
+        super(LearnedHeuristic, self).__init__()
+        self.model_path: str = model_path
+        self.penalty: float = penalty
+        self.network: ValueNetwork = ValueNetwork.load(model_path)
+        self.encoder: PositionEncoder = PositionEncoder()
+
+    def prepare(self, root_node: BattleStatus) -> None:
+        root_node.heuristic_cache.clear()
+
+    def compute(self, battle_node: BattleStatus, depth: int) -> float:
+        return float(self.compute_batch([battle_node], depth)[0])
+
+    """
+    Evaluate a batch of states with a single forward pass of the value network
+    Parameters: battle_nodes: minimax nodes containing the state information
+    Parameters: depth: depth of the nodes in the minimax tree
+    Returns: evaluation scores of the minimax nodes
+    """
+    def compute_batch(self, battle_nodes: List[BattleStatus], depth: int) -> np.ndarray:
+        if len(battle_nodes) == 0:
+            return np.zeros(0)
+
+        return self.network.forward(self.encoder.encode_batch(battle_nodes)) - self.penalty * depth
@@ -1,8 +1,15 @@
 from typing import List, Dict
 from poke_env.environment import Pokemon, Move, MoveCategory, Weather, Field, Status
 from core.useful_data import DEFAULT_MOVES_IDS
+from core.move_registry import get_move
+from core.max_moves import get_max_move
+from poke_env.environment.move import DynamaxMove
 from core.stats import estimate_stat, compute_stat_modifiers, compute_stat_boost
 import copy
+import math
+
+# Number of turns a dynamax lasts
+DYNAMAX_TURNS = 3
 
 """
 Instantiate a Pokémon node with the parameters that could change during the simulation of the progress of a
@@ -14,6 +21,9 @@ Parameters: boosts: current simulated statistics boost of the Pokémon
 Parameters: status: current simulated status of the Pokémon
 Parameters: moves: known moves of the Pokémon
 Parameters: effects: status effects of the Pokémon
+Parameters: dynamax_turns: turns left of a dynamax started during the simulation, 0 if there is none. The health
+points are kept on the scale of the Pokémon that is not dynamaxed, so the doubled health points are modelled by
+halving the damage taken
 """
 class NodePokemon:
 
@@ -24,7 +34,8 @@ class NodePokemon:
                  boosts: Dict[str, int] = None,
                  status: Status = None,
                  moves: List[Move] = None,
-                 effects: Dict = None):
+                 effects: Dict = None,
+                 dynamax_turns: int = 0):
 
         self.pokemon: Pokemon = pokemon
         self.poke = copy.deepcopy(pokemon)
@@ -56,6 +67,7 @@ class NodePokemon:
         if effects is None:
             effects = pokemon.effects
         self.effects: Dict = effects
+        self.dynamax_turns: int = dynamax_turns
 
     """
     Computes if the pokémon is fainted
@@ -64,13 +76,49 @@ class NodePokemon:
     def is_fainted(self) -> bool:
         return self.current_hp <= 0
 
+    """
+    Computes the fraction of health points left to the Pokémon. The max health points of the opponent's Pokémon are
+    estimated
+    Returns: the fraction of health points left
+    """
+    def hp_fraction(self) -> float:
+        max_hp = self.pokemon.max_hp if self.is_act_poke else estimate_stat(self.pokemon, 'hp')
+        return self.current_hp / max_hp if max_hp else 0
+
+    """
+    Scale the damage taken by the Pokémon, halved while it is dynamaxed
+    Parameters: damage: the damage of a move
+    Returns: the damage on the scale of the health points of the node
+    """
+    def damage_taken(self, damage: int) -> int:
+        return math.ceil(damage / 2) if self.dynamax_turns > 0 else damage
+
+    """
+    Dynamax the Pokémon: its moves become max moves for the following turns
+    Returns: a copy of this object, dynamaxed
+    """
+    def dynamaxed(self):
+        return self.clone(moves=[get_max_move(move) for move in self.moves], dynamax_turns=DYNAMAX_TURNS)
+
+    """
+    Count the end of a turn for a dynamax started during the simulation: when it ends, the max moves go back to the
+    moves they come from. The object is updated in place, so it must be a copy made for the new turn
+    """
+    def end_turn(self) -> None:
+        if self.dynamax_turns == 0:
+            return
+
+        self.dynamax_turns -= 1
+        if self.dynamax_turns == 0:
+            self.moves = [move._parent if isinstance(move, DynamaxMove) else move for move in self.moves]
+
     """
     Clones all the fields of the current object
     Returns: a copy of this object
     """
     def clone_all(self):
         return NodePokemon(self.pokemon, self.is_act_poke, self.current_hp, self.boosts.copy(), self.status,
-                           self.moves.copy(), self.effects.copy())
+                           self.moves.copy(), self.effects.copy(), self.dynamax_turns)
 
     """
     Clones the current object with the possibility of specifying some custom fields
@@ -82,7 +130,8 @@ class NodePokemon:
               boosts: Dict[str, int] = None,
               status: Status = None,
               moves: list[Move] = None,
-              effects: Dict = None):
+              effects: Dict = None,
+              dynamax_turns: int = None):
         if is_act_poke is None:
             is_act_poke = self.is_act_poke
         if current_hp is None:
@@ -95,7 +144,9 @@ class NodePokemon:
             moves = self.moves.copy()
         if effects is None:
             effects = self.effects.copy()
-        return NodePokemon(self.pokemon, is_act_poke, current_hp, boosts, status, moves, effects)
+        if dynamax_turns is None:
+            dynamax_turns = self.dynamax_turns
+        return NodePokemon(self.pokemon, is_act_poke, current_hp, boosts, status, moves, effects, dynamax_turns)
 
     """
     Assigns default moves to a Pokémon with the same type of the Pokémon's ones if there are no known moves with
@@ -116,8 +167,8 @@ class NodePokemon:
                 if not move_same_poke_type:
                     # def_move: Gen8Move = self.default_moves[poke_type]
                     if self.pokemon.base_stats["atk"] >= self.pokemon.base_stats["spa"]:
-                        moves_added.append(DEFAULT_MOVES_IDS[poke_type][MoveCategory.PHYSICAL])
+                        moves_added.append(get_move(DEFAULT_MOVES_IDS[poke_type][MoveCategory.PHYSICAL]))
                     else:
-                        moves_added.append(DEFAULT_MOVES_IDS[poke_type][MoveCategory.SPECIAL])
+                        moves_added.append(get_move(DEFAULT_MOVES_IDS[poke_type][MoveCategory.SPECIAL]))
                     # moves_added.append(def_move)
         return moves_added + known_moves
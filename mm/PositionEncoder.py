@@ -0,0 +1,166 @@
+from poke_env.environment import AbstractBattle, Field, Pokemon
+from mm.BattleStatus import BattleStatus
+from mm.NodePokemon import NodePokemon
+from core.species_tables import lookup_type_gain, lookup_stab_damage
+from core.utils import outspeed_prob
+from core.stats import estimate_stat, compute_stat_modifiers
+from core.move_registry import get_move
+from typing import List, Tuple
+import numpy as np
+
+# Names of the features of a position, in the order of the encoded vectors
+FEATURE_NAMES = ["team_hp", "alive_team", "opp_hp", "opp_alive",
+                 "act_hp", "act_atk", "act_def", "act_spa", "act_spd", "act_spe", "act_status", "act_dynamax",
+                 "act_moves", "opp_act_hp", "opp_atk", "opp_def", "opp_spa", "opp_spd", "opp_spe", "opp_status",
+                 "opp_dynamax", "opp_moves", "type_gain", "opp_type_gain", "outspeed", "stab_damage",
+                 "opp_stab_damage", "weather", "terrain", "opp_conditions"]
+
+BOOSTED_STATS = ["atk", "def", "spa", "spd", "spe"]
+
+"""
+Encode the positions of the minimax tree as fixed-width feature vectors, the input of the learned evaluation
+functions. The first four features are the ones of TeamHeuristic; the others describe the two active Pokémon, their
+matchup and the field. The values that are shared by the nodes of a tree, such as the matchup of two species, are
+kept in the heuristic cache of the tree
+"""
+class PositionEncoder:
+
+    width: int = len(FEATURE_NAMES)
+
+    """
+    Encode a position
+    Parameters: battle_node: minimax node containing the state information
+    Returns: the feature vector
+    """
+    def encode(self, battle_node: BattleStatus) -> np.ndarray:
+        return np.array(self.features(battle_node), dtype=np.float32)
+
+    """
+    Encode a batch of positions
+    Parameters: battle_nodes: minimax nodes containing the state information
+    Returns: a matrix with a feature vector per row
+    """
+    def encode_batch(self, battle_nodes: List[BattleStatus]) -> np.ndarray:
+        if len(battle_nodes) == 0:
+            return np.zeros((0, self.width), dtype=np.float32)
+
+        return np.array([self.features(battle_node) for battle_node in battle_nodes], dtype=np.float32)
+
+    """
+    Encode the current position of a battle, as the root of the minimax tree the bot would search
+    Parameters: battle: current state of the battle
+    Returns: the feature vector
+    """
+    def encode_battle(self, battle: AbstractBattle) -> np.ndarray:
+        return self.encode(self.root_node(battle))
+
+    @staticmethod
+    def root_node(battle: AbstractBattle) -> BattleStatus:
+        moves = battle.available_moves if battle.available_moves else list(battle.active_pokemon.moves.values())
+        opp_team = [pokemon for pokemon in battle.opponent_team.values() if not pokemon.active]
+        return BattleStatus(NodePokemon(battle.active_pokemon, is_act_poke=True, moves=moves),
+                            NodePokemon(battle.opponent_active_pokemon, is_act_poke=False,
+                                        moves=list(battle.opponent_active_pokemon.moves.values())),
+                            battle.available_switches, opp_team, battle.weather, list(battle.fields.keys()),
+                            list(battle.opponent_side_conditions.keys()), None, get_move('splash'), True)
+
+    def __repr__(self) -> str:
+        return "PositionEncoder({0})".format(self.width)
+
+    def features(self, battle_node: BattleStatus) -> List[float]:
+        act_poke, opp_poke = battle_node.act_poke, battle_node.opp_poke
+        bench_hp, bench_len, opp_fainted = self.__team_values(battle_node)
+        act_hp = act_poke.hp_fraction()
+        alive_team = bench_len + (0 if act_poke.is_fainted() else 1)
+        type_gain, opp_type_gain, outspeed, stab_damage, opp_stab_damage = self.__matchup(battle_node)
+
+        return [(act_hp + bench_hp) / 6, alive_team / 6, opp_poke.hp_fraction(), (6 - opp_fainted) / 6] + \
+            [act_hp] + [act_poke.boosts[stat] / 6 for stat in BOOSTED_STATS] + \
+            [float(act_poke.status is not None), float(act_poke.dynamax_turns > 0 or act_poke.pokemon.is_dynamaxed),
+             len(act_poke.moves) / 4] + \
+            [opp_poke.hp_fraction()] + [opp_poke.boosts[stat] / 6 for stat in BOOSTED_STATS] + \
+            [float(opp_poke.status is not None), float(opp_poke.pokemon.is_dynamaxed), len(opp_poke.moves) / 4] + \
+            [type_gain / 4, opp_type_gain / 4, outspeed, min(stab_damage, 2) / 2, min(opp_stab_damage, 2) / 2] + \
+            [float(len(battle_node.weather) > 0), float(len(battle_node.terrains) > 0),
+             len(battle_node.opp_conditions) / 4]
+
+    """
+    Retrieve the sum of the hp fractions and the number of the Pokémon we can switch to, and the number of fainted
+    Pokémon of the opponent. The lists are kept in the cache along with their values, so that their ids can't be
+    reused by other lists during the search
+    Parameters: battle_node: minimax node containing the state information
+    Returns: the sum of the hp fractions of the bench, its size and the number of fainted Pokémon of the opponent
+    """
+    @staticmethod
+    def __team_values(battle_node: BattleStatus) -> Tuple[float, int, int]:
+        key = ("encoder_team", id(battle_node.avail_switches), id(battle_node.opp_team))
+        cached = battle_node.heuristic_cache.get(key)
+        if cached is None:
+            bench_hp = sum([pokemon.current_hp_fraction for pokemon in battle_node.avail_switches])
+            opp_fainted = len([pokemon for pokemon in battle_node.opp_team if pokemon.fainted])
+            cached = (battle_node.avail_switches, battle_node.opp_team,
+                      (bench_hp, len(battle_node.avail_switches), opp_fainted))
+            battle_node.heuristic_cache[key] = cached
+
+        return cached[2]
+
+    """
+    Retrieve the matchup of the two active Pokémon: the type advantages, the outspeed probability and the damage of
+    the best STAB moves of their random battle sets. The outspeed probability depends on the field and on the speed
+    boosts of the node, so they are part of the key
+    Parameters: battle_node: minimax node containing the state information
+    Returns: the features of the matchup
+    """
+    @staticmethod
+    def __matchup(battle_node: BattleStatus) -> Tuple[float, float, float, float, float]:
+        act_pokemon: Pokemon = battle_node.act_poke.pokemon
+        opp_pokemon: Pokemon = battle_node.opp_poke.pokemon
+        key = ("encoder_matchup", id(act_pokemon), id(opp_pokemon), tuple(battle_node.weather.keys()),
+               tuple(battle_node.terrains), battle_node.act_poke.boosts["spe"], battle_node.opp_poke.boosts["spe"])
+        cached = battle_node.heuristic_cache.get(key)
+        if cached is None:
+            type_gain = lookup_type_gain(act_pokemon, opp_pokemon)
+            if type_gain is None:
+                type_gain = max([opp_pokemon.damage_multiplier(poke_type)
+                                 for poke_type in act_pokemon.types if poke_type is not None])
+            opp_type_gain = lookup_type_gain(opp_pokemon, act_pokemon)
+            if opp_type_gain is None:
+                opp_type_gain = max([act_pokemon.damage_multiplier(poke_type)
+                                     for poke_type in opp_pokemon.types if poke_type is not None])
+            outspeed = PositionEncoder.__outspeed(battle_node)
+            stab_damage = lookup_stab_damage(act_pokemon, opp_pokemon) or 0
+            opp_stab_damage = lookup_stab_damage(opp_pokemon, act_pokemon) or 0
+            cached = (act_pokemon, opp_pokemon, (type_gain, opp_type_gain, outspeed, stab_damage, opp_stab_damage))
+            battle_node.heuristic_cache[key] = cached
+
+        return cached[2]
+
+    """
+    Compute the probability that our active Pokémon outspeeds the opponent's one, with the speed boosts of the node.
+    When they are the boosts of the Pokémon in the battle, the probability is the one of outspeed_prob
+    Parameters: battle_node: minimax node containing the state information
+    Returns: the outspeed probability
+    """
+    @staticmethod
+    def __outspeed(battle_node: BattleStatus) -> float:
+        act_poke, opp_poke = battle_node.act_poke, battle_node.opp_poke
+        weather = None if len(battle_node.weather) == 0 else next(iter(battle_node.weather.keys()))
+        if act_poke.boosts["spe"] == act_poke.pokemon.boosts["spe"] \
+                and opp_poke.boosts["spe"] == opp_poke.pokemon.boosts["spe"]:
+            return outspeed_prob(act_poke.pokemon, opp_poke.pokemon, weather, battle_node.terrains)["outspeed_p"]
+
+        speeds = []
+        for poke in [act_poke, opp_poke]:
+            pokemon = poke.pokemon
+            if poke.is_act_poke and pokemon.stats["spe"]:
+                speed = pokemon.stats["spe"]
+            elif "trickroom" in pokemon.moves or "gyroball" in pokemon.moves:
+                speed = estimate_stat(pokemon, "spe", ivs=0, evs=0)
+            else:
+                speed = estimate_stat(pokemon, "spe")
+            boost = poke.boosts["spe"]
+            speed *= (2 + boost) / 2 if boost > 0 else 2 / (2 - boost)
+            speeds.append(int(speed * compute_stat_modifiers(pokemon, "spe", weather, battle_node.terrains)))
+
+        outspeed = 1 if speeds[0] > speeds[1] else 0.5 if speeds[0] == speeds[1] else 0
+        return 1 - outspeed if Field.TRICK_ROOM in battle_node.terrains else outspeed
@@ -0,0 +1,27 @@
+from typing import Optional
+from time import perf_counter
+import threading
+
+"""
+Counters of a single search: the nodes it visits and the nodes left to the quiescence extension of the leaf being
+extended. Every search has its own counters, so the searches that a player runs at the same time in the pondering
+thread and in the search threads don't share them. A background search also carries what stops it, which is checked
+at every node
+Parameters: stop: the event that stops the search, None if it runs until the end
+Parameters: deadline: the time at which the search stops, None if it has no deadline
+"""
+class SearchCounters:
+
+    def __init__(self, stop: Optional[threading.Event] = None, deadline: Optional[float] = None):
+        self.nodes: int = 0
+        self.quiescence_left: int = 0
+        self.stop: Optional[threading.Event] = stop
+        self.deadline: Optional[float] = deadline
+
+    """
+    Check whether the search has to stop
+    Returns: true if the stop event is set or the deadline has passed, false otherwise
+    """
+    def stopped(self) -> bool:
+        return (self.stop is not None and self.stop.is_set()) or \
+            (self.deadline is not None and perf_counter() > self.deadline)
@@ -1,4 +1,5 @@
-from typing import List
+from typing import List, Tuple
+from poke_env.environment import Pokemon
 from mm.BattleStatus import BattleStatus
 from mm.Heuristic import Heuristic
 from core.stats import estimate_stat
@@ -19,32 +20,109 @@ class TeamHeuristic(Heuristic):
         self.penalty: float = penalty
 
     """
-    Evaluate state in the minimax algorithm using all the knowledge about the bot team and the opponent team
+    Precompute the team values that do not change while simulating the battle: the hp fractions of the Pokémon we
+    can switch to, the fainted Pokémon of the opponent and the estimated max hp of the opponent's active Pokémon
+    Parameters: root_node: root node of the minimax tree
+    """
+    def prepare(self, root_node: BattleStatus) -> None:
+        root_node.heuristic_cache.clear()
+        self.__bench_values(root_node)
+        self.__opp_fainted(root_node)
+        self.__opp_max_hp(root_node)
+
+    """
+    Retrieve the sum of the hp fractions and the number of the Pokémon we can switch to. Each list of switches is
+    kept in the cache along with its values, so that its id can't be reused by another list during the search
     Parameters: battle_node: minimax node containing the state information
-    Parameters: depth: depth of the node in the minimax tree
-    Returns: evaluation score of the minimax node
+    Returns: a tuple made up of the sum of the hp fractions and the number of Pokémon
     """
-    def compute(self, battle_node: BattleStatus, depth: int) -> float:
-        bot_hp = battle_node.act_poke.current_hp
-        bot_max_hp = battle_node.act_poke.pokemon.max_hp
-        team_hp = bot_hp / bot_max_hp
-        for poke in battle_node.avail_switches:
-            team_hp += poke.current_hp_fraction
+    @staticmethod
+    def __bench_values(battle_node: BattleStatus) -> Tuple[float, int]:
+        key = ("bench", id(battle_node.avail_switches))
+        cached = battle_node.heuristic_cache.get(key)
+        if cached is None:
+            bench_hp = sum([poke.current_hp_fraction for poke in battle_node.avail_switches])
+            cached = (battle_node.avail_switches, bench_hp, len(battle_node.avail_switches))
+            battle_node.heuristic_cache[key] = cached
+
+        return cached[1], cached[2]
+
+    """
+    Retrieve the number of fainted Pokémon in the opponent's team
+    Parameters: battle_node: minimax node containing the state information
+    Returns: the number of fainted Pokémon
+    """
+    @staticmethod
+    def __opp_fainted(battle_node: BattleStatus) -> int:
+        key = ("opp_fainted", id(battle_node.opp_team))
+        cached = battle_node.heuristic_cache.get(key)
+        if cached is None:
+            cached = (battle_node.opp_team, len([pokemon for pokemon in battle_node.opp_team if pokemon.fainted]))
+            battle_node.heuristic_cache[key] = cached
+
+        return cached[1]
+
+    """
+    Retrieve the estimated max hp of the opponent's active Pokémon
+    Parameters: battle_node: minimax node containing the state information
+    Returns: the estimated max hp
+    """
+    @staticmethod
+    def __opp_max_hp(battle_node: BattleStatus) -> int:
+        opp_pokemon: Pokemon = battle_node.opp_poke.pokemon
+        key = ("opp_max_hp", id(opp_pokemon))
+        cached = battle_node.heuristic_cache.get(key)
+        if cached is None:
+            cached = (opp_pokemon, estimate_stat(opp_pokemon, "hp"))
+            battle_node.heuristic_cache[key] = cached
 
-        alive_team = len(battle_node.avail_switches)
+        return cached[1]
+
+    """
+    Compute the features of a state that are weighted by the parameters of the heuristic
+    Parameters: battle_node: minimax node containing the state information
+    Returns: a list made up of the bot team hp, the bot alive Pokémon, the opponent hp and the opponent alive Pokémon
+    """
+    def features(self, battle_node: BattleStatus) -> List[float]:
+        bench_hp, bench_len = self.__bench_values(battle_node)
+        team_hp = battle_node.act_poke.current_hp / battle_node.act_poke.pokemon.max_hp + bench_hp
+
+        alive_team = bench_len
         if not battle_node.act_poke.is_fainted():
             alive_team += 1
 
-        opp_hp = battle_node.opp_poke.current_hp
-        opp_max_hp = estimate_stat(battle_node.opp_poke.pokemon, "hp")
-        opp_team_len = 6 - len([pokemon for pokemon in battle_node.opp_team if pokemon.fainted])
+        opp_hp = battle_node.opp_poke.current_hp / self.__opp_max_hp(battle_node)
+        opp_team_len = 6 - self.__opp_fainted(battle_node)
+        return [team_hp / 6, alive_team / 6, opp_hp, opp_team_len / 6]
+
+    """
+    Evaluate state in the minimax algorithm using all the knowledge about the bot team and the opponent team
+    Parameters: battle_node: minimax node containing the state information
+    Parameters: depth: depth of the node in the minimax tree
+    Returns: evaluation score of the minimax node
+    """
+    def compute(self, battle_node: BattleStatus, depth: int) -> float:
+        team_hp, alive_team, opp_hp, opp_team_len = self.features(battle_node)
         b1 = self.parameters[0]
         b2 = self.parameters[1]
         m1 = self.parameters[2]
         m2 = self.parameters[3]
         p1 = self.penalty
 
-        score = b1 * (team_hp / 6) + b2 * (alive_team / 6) - m1 * (opp_hp / opp_max_hp) - m2 * (
-                opp_team_len / 6) - p1 * depth
+        score = b1 * team_hp + b2 * alive_team - m1 * opp_hp - m2 * opp_team_len - p1 * depth
 
         return score
+
+    """
+    Evaluate a batch of states with a single product between their features and the parameters of the heuristic
+    Parameters: battle_nodes: minimax nodes containing the state information
+    Parameters: depth: depth of the nodes in the minimax tree
+    Returns: evaluation scores of the minimax nodes
+    """
+    def compute_batch(self, battle_nodes: List[BattleStatus], depth: int) -> np.ndarray:
+        if len(battle_nodes) == 0:
+            return np.zeros(0)
+
+        features = np.array([self.features(battle_node) for battle_node in battle_nodes])
+        weights = self.parameters * np.array([1, 1, -1, -1])
+        return features @ weights - self.penalty * depth
@@ -0,0 +1,135 @@
+/**
+ * Damage and speed oracle backed by the vendored Showdown simulator.
+ *
+ * The worker is a long-lived process that reads batches of queries from stdin and writes the answers on stdout.
+ * Every message is a JSON object prefixed by its length, a 32-bit big-endian unsigned integer:
+ *
+ *   request:  {"id": 1, "queries": [{"type": "damage", ...}, {"type": "speed", ...}]}
+ *   response: {"id": 1, "results": [{"min": 80, "max": 95}, {"speed": 250}]}
+ *
+ * A query that fails gets {"error": "..."} as its result, the other queries of the batch are not affected.
+ *
+ * The simulator has to be built first: `node build` in pokemon-showdown.
+ */
+'use strict';
+
+const path = require('path');
+const {Battle} = require(path.join(__dirname, '..', 'pokemon-showdown', 'dist', 'sim'));
+
+const FORMAT = 'gen8customgame';
+
+function pokemonSet(spec, moves) {
+	const stat = value => ({hp: value, atk: value, def: value, spa: value, spd: value, spe: value});
+	return {
+		name: spec.species,
+		species: spec.species,
+		level: spec.level || 100,
+		item: spec.item || '',
+		ability: spec.ability || '',
+		nature: spec.nature || 'Hardy',
+		gender: spec.gender || '',
+		evs: spec.evs || stat(84),
+		ivs: spec.ivs || stat(31),
+		moves: moves.length ? moves : ['splash'],
+	};
+}
+
+/**
+ * Build a battle between two Pokémon, past the team preview, with the field of the query.
+ */
+function buildBattle(query, attackerMoves) {
+	const battle = new Battle({
+		formatid: FORMAT,
+		seed: [1, 2, 3, 4],
+		p1: {name: 'p1', team: [pokemonSet(query.attacker, attackerMoves)]},
+		p2: {name: 'p2', team: [pokemonSet(query.defender || query.attacker, [])]},
+	});
+	battle.makeChoices('team 1', 'team 1');
+
+	if (query.weather) battle.field.setWeather(query.weather, 'debug');
+	if (query.terrain) battle.field.setTerrain(query.terrain, 'debug');
+	for (const condition of query.defender_conditions || []) {
+		battle.sides[1].addSideCondition(condition, 'debug');
+	}
+
+	const attacker = battle.sides[0].active[0];
+	const defender = battle.sides[1].active[0];
+	setState(attacker, query.attacker);
+	setState(defender, query.defender || {});
+	return {battle, attacker, defender};
+}
+
+function setState(pokemon, spec) {
+	pokemon.clearBoosts();
+	if (spec.boosts) pokemon.setBoost(spec.boosts);
+	// The status is already there in the battle, so it is set on the Pokémon itself, regardless of immunities
+	if (spec.status) pokemon.setStatus(spec.status, pokemon, null, true);
+	if (spec.hp) pokemon.sethp(spec.hp);
+}
+
+/**
+ * Compute the lowest and the highest damage of a move, without critical hits: the damage roll of the simulator is
+ * replaced by the lowest and the highest one.
+ */
+function damage(query) {
+	const {battle, attacker, defender} = buildBattle(query, [query.move]);
+	const result = {};
+	for (const [key, roll] of [['min', 85], ['max', 100]]) {
+		const move = battle.dex.getActiveMove(query.move);
+		move.willCrit = false;
+		battle.randomizer = baseDamage => Math.trunc(Math.trunc(baseDamage * roll) / 100);
+		battle.activeMove = move;
+		battle.activePokemon = attacker;
+		battle.activeTarget = defender;
+		const dealt = battle.actions.getDamage(attacker, defender, move, true);
+		result[key] = typeof dealt === 'number' ? dealt : 0;
+	}
+	return result;
+}
+
+function speed(query) {
+	const {attacker} = buildBattle(query, []);
+	return {speed: attacker.getActionSpeed()};
+}
+
+const HANDLERS = {damage, speed};
+
+function answer(request) {
+	const results = request.queries.map(query => {
+		try {
+			const handler = HANDLERS[query.type];
+			if (!handler) return {error: `unknown query type ${query.type}`};
+			return handler(query);
+		} catch (err) {
+			return {error: String(err && err.message || err)};
+		}
+	});
+	return {id: request.id, results};
+}
+
+function write(message) {
+	const body = Buffer.from(JSON.stringify(message), 'utf8');
+	const header = Buffer.alloc(4);
+	header.writeUInt32BE(body.length, 0);
+	process.stdout.write(Buffer.concat([header, body]));
+}
+
+let buffer = Buffer.alloc(0);
+process.stdin.on('data', chunk => {
+	buffer = Buffer.concat([buffer, chunk]);
+	while (buffer.length >= 4) {
+		const length = buffer.readUInt32BE(0);
+		if (buffer.length < 4 + length) break;
+		const body = buffer.subarray(4, 4 + length).toString('utf8');
+		buffer = buffer.subarray(4 + length);
+		let request;
+		try {
+			request = JSON.parse(body);
+		} catch (err) {
+			write({id: null, error: 'invalid request'});
+			continue;
+		}
+		write(answer(request));
+	}
+});
+process.stdin.on('end', () => process.exit(0));
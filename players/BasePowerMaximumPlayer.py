@@ -1,12 +1,12 @@
 from poke_env.environment import Move, Pokemon
-from poke_env.player import Player
+from players.RetentionPlayer import RetentionPlayer
 from poke_env.teambuilder import Teambuilder
 from poke_env import PlayerConfiguration, ServerConfiguration
 from core.utils import bot_status_to_string, get_battle_info
 from typing import Optional, Union
 
 
-class BasePowerMaximumPlayer(Player):
+class BasePowerMaximumPlayer(RetentionPlayer):
 
     def __init__(self,
                  player_configuration: Optional[PlayerConfiguration] = None,
@@ -22,7 +22,9 @@ class BasePowerMaximumPlayer(Player):
                  ping_interval: Optional[float] = 20.0,
                  ping_timeout: Optional[float] = 20.0,
                  team: Optional[Union[str, Teambuilder]] = None,
-                 verbose: bool = False
+                 verbose: bool = False,
+                 keep_battles: Optional[int] = None,
+                 keep_summaries: bool = False
                  ):
         super(BasePowerMaximumPlayer, self).__init__(
             player_configuration = player_configuration,
@@ -36,7 +38,9 @@ class BasePowerMaximumPlayer(Player):
             start_listening = start_listening,
             ping_interval = ping_interval,
             ping_timeout = ping_timeout,
-            team = team
+            team = team,
+            keep_battles = keep_battles,
+            keep_summaries = keep_summaries
         )
         self.verbose = verbose
 
@@ -0,0 +1,97 @@
+from poke_env.environment import Pokemon
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import threading
+
+"""
+State that a player keeps about one battle across its turns, such as the tracking of the active Pokémon and the
+per-battle caches. The searches may run in worker threads while the event loop precomputes the forced switches, so
+the caches are read and written holding the lock of the state
+"""
+class BattleState:
+
+    def __init__(self):
+        self.previous_pokemon: Optional[Pokemon] = None
+        self.toxic_turn: int = 0
+        self.max_team_matchup: int = -8
+        self.best_stats_pokemon: int = 0
+        self.caches: Dict[str, Dict] = dict()
+        self.lock: threading.Lock = threading.Lock()
+        # Background search of the next turn and the positions it has searched, with their results
+        self.ponder_task: Optional[asyncio.Task] = None
+        self.ponder_stop: Optional[threading.Event] = None
+        # Held by the pondering thread while it searches, so that the next decision waits for the search in flight
+        self.ponder_lock: threading.Lock = threading.Lock()
+        self.pondered: List = []
+        # Tree of the last search, as the turn, the root and the move we sent, which orders the search of the next turn
+        self.search_tree: Optional[Tuple] = None
+        # Score of the root in the last search, the center of the aspiration window of the next one
+        self.last_score: Optional[float] = None
+
+    """
+    Retrieve a per-battle cache, creating it if it doesn't exist yet
+    Parameters: name: the name of the cache
+    Returns: the cache
+    """
+    def cache(self, name: str) -> Dict:
+        with self.lock:
+            return self.caches.setdefault(name, dict())
+
+
+"""
+Store of the states of the battles a player is playing, indexed by battle tag. The state of a battle is evicted
+when the battle finishes; since a battle may never report its end (e.g. a dropped connection), the store also
+keeps at most max_states states, evicting the least recently used ones. The store is shared by the searches running
+in worker threads and the event loop, which evicts the finished battles, so it is accessed holding a lock
+Parameters: max_states: the max number of states kept
+"""
+class BattleStateStore:
+
+    def __init__(self, max_states: int = 100):
+        self.max_states: int = max_states
+        self.states: OrderedDict[str, BattleState] = OrderedDict()
+        self.lock: threading.Lock = threading.Lock()
+
+    """
+    Retrieve the state of a battle, creating it if it doesn't exist yet
+    Parameters: battle_tag: the tag of the battle
+    Returns: the state of the battle
+    """
+    def get(self, battle_tag: str) -> BattleState:
+        with self.lock:
+            state = self.states.get(battle_tag)
+            if state is None:
+                state = BattleState()
+                self.states[battle_tag] = state
+                while len(self.states) > self.max_states:
+                    self.states.popitem(last=False)
+            else:
+                self.states.move_to_end(battle_tag)
+
+            return state
+
+    """
+    Remove the state of a battle and return it
+    Parameters: battle_tag: the tag of the battle
+    Returns: the state of the battle, None if it was not stored
+    """
+    def evict(self, battle_tag: str) -> Optional[BattleState]:
+        with self.lock:
+            return self.states.pop(battle_tag, None)
+
+    """
+    Retrieve the states of all the battles stored
+    Returns: the states, from the least recently used
+    """
+    def values(self) -> List[BattleState]:
+        with self.lock:
+            return list(self.states.values())
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self.states)
+
+    def __contains__(self, battle_tag: str) -> bool:
+        with self.lock:
+            return battle_tag in self.states
@@ -1,12 +1,15 @@
 from poke_env.environment import Move, Pokemon
-from poke_env.player import Player
+from players.RetentionPlayer import RetentionPlayer
 from poke_env.teambuilder import Teambuilder
 from poke_env import PlayerConfiguration, ServerConfiguration
 from core.damage import compute_damage
+from core.damage_distribution import ko_probability, LIKELY_KO
+from core.stats import estimate_stat
 from core.utils import outspeed_prob, get_battle_info, bot_status_to_string
+from utils.decision_cache import DecisionCache, config_hash, position_fingerprint
 from typing import Optional, Union
 
-class DamageMaximumPlayer(Player):
+class DamageMaximumPlayer(RetentionPlayer):
 
     def __init__(self,
                  player_configuration: Optional[PlayerConfiguration] = None,
@@ -23,7 +26,10 @@ class DamageMaximumPlayer(Player):
                  ping_timeout: Optional[float] = 20.0,
                  team: Optional[Union[str, Teambuilder]] = None,
                  verbose: bool = False,
-                 can_switch: bool = False
+                 can_switch: bool = False,
+                 keep_battles: Optional[int] = None,
+                 keep_summaries: bool = False,
+                 decision_cache: Optional[DecisionCache] = None
                  ):
         super(DamageMaximumPlayer, self).__init__(
             player_configuration = player_configuration,
@@ -37,10 +43,14 @@ class DamageMaximumPlayer(Player):
             start_listening = start_listening,
             ping_interval = ping_interval,
             ping_timeout = ping_timeout,
-            team = team
+            team = team,
+            keep_battles = keep_battles,
+            keep_summaries = keep_summaries
         )
         self.verbose = verbose
         self.can_switch = can_switch
+        self.decision_cache: Optional[DecisionCache] = decision_cache
+        self.decision_config: Optional[str] = None if decision_cache is None else config_hash("DM")
 
     def choose_move(self, battle):
         agent_pokemon: Pokemon = battle.active_pokemon
@@ -51,9 +61,24 @@ class DamageMaximumPlayer(Player):
                 print("Turn " + str(battle.turn))
                 print(bot_status_to_string(agent_pokemon, opp_agent_pokemon, weather, fields))
 
-            best_move: Move = max(battle.available_moves,
-                                  key=lambda move: compute_damage(move, agent_pokemon, opp_agent_pokemon, weather,
-                                                                  fields, opp_agent_conditions, is_bot = True)["ub"])
+            # Positions that repeat across battles are answered from the decision cache
+            fingerprint = None if self.decision_cache is None else position_fingerprint(battle)
+            decision = None if fingerprint is None else self.decision_cache.get(self.decision_config, fingerprint)
+            best_move: Optional[Move] = None if decision is None else \
+                next((move for move in battle.available_moves if move.id == decision[0]), None)
+            if best_move is None:
+                best_move = max(battle.available_moves,
+                                key=lambda move: compute_damage(move, agent_pokemon, opp_agent_pokemon, weather,
+                                                                fields, opp_agent_conditions, is_bot = True)["ub"])
+
+                # A move that is likely to knock out the opponent is preferred to one that deals more damage
+                opp_hp = int(estimate_stat(opp_agent_pokemon, "hp") * opp_agent_pokemon.current_hp_fraction)
+                ko_p = {move: ko_probability(move, agent_pokemon, opp_agent_pokemon, opp_hp, weather, fields,
+                                             opp_agent_conditions, is_bot = True) for move in battle.available_moves}
+                if ko_p[best_move] < LIKELY_KO and max(ko_p.values()) >= LIKELY_KO:
+                    best_move = max(battle.available_moves, key=lambda move: ko_p[move])
+                if fingerprint is not None:
+                    self.decision_cache.put(self.decision_config, fingerprint, best_move.id)
             if self.verbose:
                 print("Outspeed probability {0}".format(
                     outspeed_prob(agent_pokemon, opp_agent_pokemon, weather, fields, False)["outspeed_p"]))
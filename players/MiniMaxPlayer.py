@@ -1,10 +1,16 @@
 from poke_env import PlayerConfiguration, ServerConfiguration
-from poke_env.environment import Status, Gen8Move
-from poke_env.player import Player
+from poke_env.environment import Status
+from poke_env.player.battle_order import BattleOrder
+from players.RetentionPlayer import RetentionPlayer
 from poke_env.teambuilder import Teambuilder
 from mm.BattleStatus import BattleStatus
 from mm.Heuristic import Heuristic
+from mm.BudgetScheduler import BudgetScheduler
+from mm.EndgameSolver import EndgameSolver, WIN
+from mm.EvaluationServer import ServedHeuristic
+from players.BattleState import BattleState, BattleStateStore
 from mm.NodePokemon import NodePokemon
+from mm.SearchCounters import SearchCounters
 from core.utils import *
 from core.stats import compute_stat
 from strategy.gimmick import should_dynamax
@@ -13,11 +19,33 @@ from strategy.switch import should_switch, compute_best_switch
 from mm.SimpleHeuristic import SimpleHeuristic
 from utils.utils import matchups_to_string
 from core.damage import compute_damage
-from typing import Optional, Union, Tuple
+from core.damage_distribution import ko_probability, LIKELY_KO
+from core.move_registry import get_move
+from core.max_moves import get_max_move
+from utils.decision_cache import DecisionCache, config_hash, position_fingerprint
+from utils.oracle import DamageOracle
+from poke_env.environment.move import DynamaxMove
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Union, Tuple
+from time import perf_counter
+import asyncio
+import threading
 import math
 
+# Max difference between the predicted and the observed fraction of health points of a pondered or reused position
+PONDER_HP_TOLERANCE = 0.05
 
-class MiniMaxPlayer(Player):
+# Half width of the alpha-beta window around the score expected at the root
+ASPIRATION_WINDOW = 0.1
+
+# Width of the null window of the principal-variation search
+PVS_WINDOW = 1e-6
+
+# Min fraction of health points for dynamaxing to be searched, unless the Pokémon is the last one alive
+DYNAMAX_MIN_HP_FRACTION = 0.5
+
+
+class MiniMaxPlayer(RetentionPlayer):
 
     def __init__(self,
                  heuristic: Optional[Heuristic] = SimpleHeuristic(),
@@ -36,6 +64,20 @@ class MiniMaxPlayer(Player):
                  ping_interval: Optional[float] = 20.0,
                  ping_timeout: Optional[float] = 20.0,
                  team: Optional[Union[str, Teambuilder]] = None,
+                 batch_leaves: bool = False,
+                 budget_scheduler: Optional[BudgetScheduler] = None,
+                 ponder: bool = False,
+                 reuse_tree: bool = False,
+                 endgame_size: int = 0,
+                 pvs: bool = False,
+                 aspiration: bool = False,
+                 quiescence_nodes: int = 0,
+                 dynamax_search: bool = False,
+                 dynamax_pruning: bool = True,
+                 decision_cache: Optional[DecisionCache] = None,
+                 damage_oracle: Optional[DamageOracle] = None,
+                 keep_battles: Optional[int] = None,
+                 keep_summaries: bool = False,
                  ):
         super(MiniMaxPlayer, self).__init__(
             player_configuration = player_configuration,
@@ -49,17 +91,137 @@ class MiniMaxPlayer(Player):
             start_listening = start_listening,
             ping_interval = ping_interval,
             ping_timeout = ping_timeout,
-            team = team
+            team = team,
+            keep_battles = keep_battles,
+            keep_summaries = keep_summaries
         )
         self.heuristic: Heuristic = heuristic
         self.max_depth: int = max_depth
         self.verbose: bool = verbose
-        self.best_stats_pokemon = 0
-        self.previous_pokemon = None
-        self.max_team_matchup: int = -8
-        self.toxic_turn: int = 0
+        self.battle_states: BattleStateStore = BattleStateStore(max(100, 2 * max_concurrent_battles))
+        self.batch_leaves: bool = batch_leaves
+        self.budget_scheduler: Optional[BudgetScheduler] = budget_scheduler
+        self.ponder: bool = ponder
+        self.ponder_hits: int = 0
+        self.ponder_misses: int = 0
+        self.reuse_tree: bool = reuse_tree
+        self.endgame_size: int = endgame_size
+        self.pvs: bool = pvs
+        self.aspiration: bool = aspiration
+        # Nodes visited and time spent by all the searches, to compare the nodes searched per second of the
+        # heuristics. The searches running in worker threads add theirs holding the lock
+        self.nodes_searched: int = 0
+        self.search_time: float = 0
+        self.search_stats_lock: threading.Lock = threading.Lock()
+        self.quiescence_nodes: int = quiescence_nodes
+        self.dynamax_search: bool = dynamax_search
+        self.dynamax_pruning: bool = dynamax_pruning
+        self.decision_cache: Optional[DecisionCache] = decision_cache
+        self.damage_oracle: Optional[DamageOracle] = damage_oracle
+        self.decision_config: Optional[str] = None
+        if decision_cache is not None:
+            self.decision_config = config_hash("MM", type(heuristic).__name__,
+                                               sorted((name, repr(value)) for name, value in vars(heuristic).items()),
+                                               max_depth, endgame_size, quiescence_nodes, dynamax_search,
+                                               dynamax_pruning, budget_scheduler is None, damage_oracle is None,
+                                               reuse_tree, ponder, pvs, aspiration, batch_leaves)
+        # The searches evaluated by a shared server run in their own threads, so that the server batches their leaves
+        self.search_executor: Optional[ThreadPoolExecutor] = None
+        # Event loop of the player, on which the searches running in worker threads schedule their callbacks
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        if isinstance(heuristic, ServedHeuristic):
+            self.search_executor = ThreadPoolExecutor(max(1, max_concurrent_battles), thread_name_prefix="search")
+        # Pondering runs in its own thread, so that it doesn't hold the event loop while the opponent decides
+        self.ponder_executor: Optional[ThreadPoolExecutor] = None
+        if ponder:
+            self.ponder_executor = ThreadPoolExecutor(1, thread_name_prefix="ponder")
+
+    async def _handle_battle_message(self, split_messages: List[List[str]]) -> None:
+        # The server reports the battle timer in "inactive" messages, which are used to cap the search time. The
+        # messages of finished battles are ignored, since their budget was already released
+        battle_tag = split_messages[0][0][1:]
+        battle = self._battles.get(battle_tag)
+        if self.budget_scheduler is not None and battle is not None and not battle.finished:
+            for split_message in split_messages[1:]:
+                if len(split_message) > 2 and split_message[1] == "inactive":
+                    # The timer message contains a "|", so it is split across the last fields
+                    self.budget_scheduler.observe_timer(battle_tag, "|".join(split_message[2:]))
+
+        await super(MiniMaxPlayer, self)._handle_battle_message(split_messages)
+
+    async def stop_listening(self) -> None:
+        try:
+            await super(MiniMaxPlayer, self).stop_listening()
+        finally:
+            self.close()
+
+    """
+    Stop the pondering of the battles in progress and shut down the threads of the searches and of the pondering,
+    waiting for the searches in flight. It is called when the player stops listening; a player that never connects
+    calls it once it's done
+    """
+    def close(self) -> None:
+        for state in self.battle_states.values():
+            self.stop_pondering(state)
+        for executor in [self.search_executor, self.ponder_executor]:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    def _battle_finished_callback(self, battle: AbstractBattle) -> None:
+        super(MiniMaxPlayer, self)._battle_finished_callback(battle)
+        state = self.battle_states.evict(battle.battle_tag)
+        if state is not None:
+            self.stop_pondering(state)
+        if self.budget_scheduler is not None:
+            self.budget_scheduler.finish(battle.battle_tag)
 
     def choose_move(self, battle):
+        if self.search_executor is not None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return self.decide(battle)
+            self.loop = loop
+            return loop.run_in_executor(self.search_executor, self.served_decide, battle)
+
+        # In exact mode the damage of the moves is awaited on the loop, so that the other battles go on meanwhile
+        if self.damage_oracle is not None:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return self.decide(battle)
+            return self.exact_decide(battle)
+
+        return self.decide(battle)
+
+    async def exact_decide(self, battle):
+        cases = self.exact_damage_cases(battle)
+        damages = await self.damage_oracle.damage_async(cases) if cases else []
+        return self.decide(battle, {case[0].id: damage for case, damage in zip(cases, damages)})
+
+    def served_decide(self, battle):
+        with self.heuristic.server.client():
+            return self.decide(battle)
+
+    """
+    Decide the order of the bot in the current state of the battle
+    Parameters: battle: current state of the battle
+    Parameters: exact_damage: the exact damage of the available moves by id, asked to the oracle if it is None and
+    the exact mode is on
+    Returns: the order
+    """
+    def decide(self, battle, exact_damage: Optional[Dict[str, Dict[str, int]]] = None):
+        state = self.battle_states.get(battle.battle_tag)
+
+        # A forced switch is answered with the choice precomputed while the previous move was decided
+        if not battle.available_moves and battle.available_switches:
+            best_switch = self.cached_forced_switch(state, battle)
+            if best_switch is not None:
+                state.previous_pokemon = battle.active_pokemon
+                if self.verbose:
+                    print("Switching to {0}\n{1}".format(best_switch.species, "-" * 110))
+
+                return self.create_order(best_switch)
 
         # Retrieve both active pokémon
         bot_pokemon: Pokemon = battle.active_pokemon
@@ -81,12 +243,12 @@ class MiniMaxPlayer(Player):
         opp_max_hp = compute_stat(opp_pokemon, "hp", weather, terrains)
         # opp_hp = int(opp_max_hp * opp_pokemon.current_hp_fraction)
 
-        best_switch, bot_matchup, outspeed_p, team_matchups = self.best_switch_on_matchup(battle, bot_pokemon, bot_team,
-                                                                                          opp_pokemon, terrains,
-                                                                                          weather)
-        if should_switch(bot_pokemon, bot_matchup, outspeed_p, self.max_team_matchup, self.toxic_turn) \
+        best_switch, bot_matchup, outspeed_p, team_matchups = self.best_switch_on_matchup(battle, state, bot_pokemon,
+                                                                                          bot_team, opp_pokemon,
+                                                                                          terrains, weather)
+        if should_switch(bot_pokemon, bot_matchup, outspeed_p, state.max_team_matchup, state.toxic_turn) \
                 and battle.available_switches:
-            self.previous_pokemon = bot_pokemon
+            state.previous_pokemon = bot_pokemon
             if self.verbose:
                 print("Switching to {0}\n{1}".format(best_switch.species, "-" * 110))
 
@@ -103,35 +265,50 @@ class MiniMaxPlayer(Player):
                 NodePokemon(battle.opponent_active_pokemon, is_act_poke=False, current_hp=opp_max_hp,
                             moves=list(battle.opponent_active_pokemon.moves.values())),
                 avail_switches, opp_team, battle.weather, terrains,
-                opp_conditions, None, Gen8Move('splash'), True)
+                opp_conditions, None, get_move('splash'), True)
+            if self.dynamax_search and self.dynamax_plausible(battle, bot_team):
+                # Max Guard is not modelled, so only the damaging moves are searched as max moves
+                root_battle_status.dynamax_actions = [get_max_move(move) for move in available_moves
+                                                      if move.category != MoveCategory.STATUS]
 
-            can_defeat, best_move = False, Gen8Move('splash')
+            can_defeat, best_move = False, get_move('splash')
             if root_battle_status.move_first and len(battle.available_moves) > 0:
-                can_defeat, best_move = self.hit_if_act_poke_can_outspeed(battle, terrains, opp_max_hp, opp_conditions)
+                if exact_damage is None and self.damage_oracle is not None:
+                    cases = self.exact_damage_cases(battle)
+                    exact_damage = {case[0].id: damage
+                                    for case, damage in zip(cases, self.damage_oracle.damage(cases))}
+                can_defeat, best_move = self.hit_if_act_poke_can_outspeed(battle, terrains, opp_max_hp, opp_conditions,
+                                                                         exact_damage)
 
             if len(battle.available_moves) == 0 or can_defeat is not True:
-                best_move = self.get_best_move(battle, root_battle_status)
+                best_move = self.cached_best_move(battle, root_battle_status)
+                if isinstance(best_move, BattleOrder):
+                    return best_move
 
             dynamax: bool = False
             my_team = [poke for poke in list(battle.team.values()) if poke.status != Status.FNT and not poke.active]
-            if battle.can_dynamax and not isinstance(best_move, Pokemon):
+            if isinstance(best_move, DynamaxMove):
+                # The search chose to dynamax, the order is given with the move the max move comes from
+                best_move, dynamax = best_move._parent, True
+            elif battle.can_dynamax and not isinstance(best_move, Pokemon) and not self.dynamax_search:
                 dynamax = should_dynamax(battle.active_pokemon, my_team, bot_matchup,
-                                         self.max_team_matchup, self.best_stats_pokemon)
+                                         state.max_team_matchup, state.best_stats_pokemon)
 
             if self.verbose:
                 self.print_chosen_move(battle, best_move, opp_conditions, terrains, weather)
 
+            self.schedule_forced_switches(state, battle, bot_team, weather, terrains)
             return self.create_order(best_move, dynamax=dynamax)
 
         elif battle.available_switches:
             # Update the matchup for each remaining pokèmon in the team
             for pokemon in bot_team:
-                team_matchups.update({pokemon: matchup_on_types(pokemon, opp_pokemon)})
+                team_matchups.update({pokemon: self.matchup(state, pokemon, opp_pokemon)})
 
             # Choose the new active pokèmon
-            self.max_team_matchup = max(team_matchups.values()) if len(team_matchups) > 0 else -8
-            best_switch = compute_best_switch(team_matchups, opp_pokemon, weather, terrains, self.max_team_matchup)
-            self.previous_pokemon = bot_pokemon
+            state.max_team_matchup = max(team_matchups.values()) if len(team_matchups) > 0 else -8
+            best_switch = compute_best_switch(team_matchups, opp_pokemon, weather, terrains, state.max_team_matchup)
+            state.previous_pokemon = bot_pokemon
             if self.verbose:
                 print("Switching to {0}\n{1}".format(best_switch.species, "-" * 110))
 
@@ -142,6 +319,7 @@ class MiniMaxPlayer(Player):
     """
     Chooses the best Pokémon that will take the filed, based on the matchup score
     Parameters: battle: current state of the battle
+    Parameters: state: the state kept by the player about the battle
     Parameters: bot_pokemon: our Pokémon
     Parameters: bot_team: our team
     Parameters: opp_pokemon: opponent Pokémon
@@ -150,33 +328,33 @@ class MiniMaxPlayer(Player):
     Returns: a tuple made up of the best Pokémon to switch, the matchup score, the probability to be faster than the
     opponent Pokémon and the matchup of the entire team
     """
-    def best_switch_on_matchup(self, battle: AbstractBattle, bot_pokemon: Pokemon, bot_team: List[Pokemon],
-                               opp_pokemon: Pokemon, terrains: List[Field], weather: Weather):
+    def best_switch_on_matchup(self, battle: AbstractBattle, state: BattleState, bot_pokemon: Pokemon,
+                               bot_team: List[Pokemon], opp_pokemon: Pokemon, terrains: List[Field], weather: Weather):
 
         # Compute matchup scores for every remaining pokémon in the team
-        bot_matchup = matchup_on_types(bot_pokemon, opp_pokemon)
+        bot_matchup = self.matchup(state, bot_pokemon, opp_pokemon)
         team_matchups = dict()
         for pokemon in bot_team:
-            team_matchups.update({pokemon: matchup_on_types(pokemon, opp_pokemon)})
+            team_matchups.update({pokemon: self.matchup(state, pokemon, opp_pokemon)})
 
         # Set the best pokémon in terms of stats
         if battle.turn == 1:
-            self.best_stats_pokemon = max([sum(pokemon.base_stats.values()) for pokemon in battle.team.values()])
+            state.best_stats_pokemon = max([sum(pokemon.base_stats.values()) for pokemon in battle.team.values()])
 
         # If we switched pokémon, then update the bot's infos
-        if not self.previous_pokemon:
-            self.previous_pokemon = bot_pokemon
-        elif bot_pokemon.species != self.previous_pokemon.species:
-            self.previous_pokemon = bot_pokemon
-            self.toxic_turn = 0
+        if not state.previous_pokemon:
+            state.previous_pokemon = bot_pokemon
+        elif bot_pokemon.species != state.previous_pokemon.species:
+            state.previous_pokemon = bot_pokemon
+            state.toxic_turn = 0
         else:
             bot_pokemon._first_turn = False
             if bot_pokemon.status is Status.TOX:
-                self.toxic_turn += 1
+                state.toxic_turn += 1
 
         # Compute the best pokémon the bot can switch to
-        self.max_team_matchup = max(team_matchups.values()) if len(team_matchups) > 0 else -8
-        best_switch = compute_best_switch(team_matchups, opp_pokemon, weather, terrains, self.max_team_matchup)
+        state.max_team_matchup = max(team_matchups.values()) if len(team_matchups) > 0 else -8
+        best_switch = compute_best_switch(team_matchups, opp_pokemon, weather, terrains, state.max_team_matchup)
 
         # Compute the probability of outpseeding the opponent pokémon
         outspeed_p, opp_spe_lb, opp_spe_ub = outspeed_prob(bot_pokemon, opp_pokemon, weather, terrains).values()
@@ -188,28 +366,155 @@ class MiniMaxPlayer(Player):
         return best_switch, bot_matchup, outspeed_p, team_matchups
 
     """
-    Compute a move that could defeat the opponent Pokémon if ours is faster
+    Compute the matchup between two Pokémon, caching it in the state of the battle. The matchup only changes when
+    new moves of the Pokémon are revealed, so the number of known moves is part of the key
+    Parameters: state: the state kept by the player about the battle
+    Parameters: bot_pokemon: our Pokémon
+    Parameters: opp_pokemon: opponent Pokémon
+    Returns: the matchup value
+    """
+    @staticmethod
+    def matchup(state: BattleState, bot_pokemon: Pokemon, opp_pokemon: Pokemon) -> float:
+        key = (bot_pokemon.species, len(bot_pokemon.moves), opp_pokemon.species, len(opp_pokemon.moves))
+        matchups = state.cache("matchups")
+        with state.lock:
+            value = matchups.get(key)
+        if value is None:
+            value = matchup_on_types(bot_pokemon, opp_pokemon)
+            with state.lock:
+                matchups[key] = value
+        return value
+
+    """
+    Key of a forced switch decision: the opponent's Pokémon, with the number of its known moves since they change
+    the matchups and with its item and speed boost since they change its speed, our Pokémon that can switch in and the
+    field. The choice doesn't depend on the health points, which change in the turn the choice is precomputed for
+    """
+    @staticmethod
+    def forced_switch_key(opp_pokemon: Pokemon, bench: List[Pokemon], weather: Weather, terrains: List[Field]) -> Tuple:
+        def pokemon_key(pokemon: Pokemon) -> Tuple:
+            return pokemon.species, None if pokemon.status is None else pokemon.status.name
+
+        return (pokemon_key(opp_pokemon), len(opp_pokemon.moves), opp_pokemon.item, opp_pokemon.boosts["spe"],
+                tuple(sorted(pokemon_key(pokemon) for pokemon in bench)), weather, tuple(terrains))
+
+    """
+    Retrieve the precomputed choice for a forced switch
+    Parameters: state: the state kept by the player about the battle
+    Parameters: battle: current state of the battle
+    Returns: the Pokémon to switch in, None if the choice was not precomputed
+    """
+    def cached_forced_switch(self, state: BattleState, battle: AbstractBattle) -> Optional[Pokemon]:
+        weather, terrains, _, _ = get_battle_info(battle).values()
+        key = self.forced_switch_key(battle.opponent_active_pokemon, battle.available_switches, weather, terrains)
+        forced_switches = state.cache("forced_switches")
+        with state.lock:
+            cached = forced_switches.get(key)
+        if cached is None:
+            return None
+
+        species, state.max_team_matchup = cached
+        return next((pokemon for pokemon in battle.available_switches if pokemon.species == species), None)
+
+    """
+    Precompute the choices for the forced switches that follow the fainting of our active Pokémon, against each
+    alive Pokémon of the opponent that we know. The computation is scheduled on the event loop of the player, so it
+    runs after the order is sent; a search running in a worker thread schedules it on the loop of the player too
+    Parameters: state: the state kept by the player about the battle
+    Parameters: battle: current state of the battle
+    Parameters: bench: our Pokémon that can switch in
+    Parameters: weather: the weather condition of a battle
+    Parameters: terrains: list of the active terrains in the battle
+    """
+    def schedule_forced_switches(self, state: BattleState, battle: AbstractBattle, bench: List[Pokemon],
+                                 weather: Weather, terrains: List[Field]) -> None:
+        if len(bench) == 0:
+            return
+
+        opponents = [pokemon for pokemon in battle.opponent_team.values() if not pokemon.fainted]
+        try:
+            asyncio.get_running_loop().call_soon(self.precompute_forced_switches, state, opponents, bench, weather,
+                                                 terrains)
+        except RuntimeError:
+            # In a worker thread there is no running loop
+            if self.loop is not None and not self.loop.is_closed():
+                self.loop.call_soon_threadsafe(self.precompute_forced_switches, state, opponents, bench, weather,
+                                               terrains)
+
+    def precompute_forced_switches(self, state: BattleState, opponents: List[Pokemon], bench: List[Pokemon],
+                                   weather: Weather, terrains: List[Field]) -> None:
+        forced_switches = state.cache("forced_switches")
+        for opp_pokemon in opponents:
+            key = self.forced_switch_key(opp_pokemon, bench, weather, terrains)
+            with state.lock:
+                if key in forced_switches:
+                    continue
+
+            team_matchups = {pokemon: self.matchup(state, pokemon, opp_pokemon) for pokemon in bench}
+            max_team_matchup = max(team_matchups.values())
+            best_switch = compute_best_switch(team_matchups, opp_pokemon, weather, terrains, max_team_matchup)
+            with state.lock:
+                forced_switches[key] = (best_switch.species, max_team_matchup)
+
+    """
+    Compute a move that could defeat the opponent Pokémon if ours is faster: the one with the highest probability of
+    knocking it out, taking into account damage rolls, critical hits and accuracy, if it is at least LIKELY_KO
     Parameters: battle: current state of the battle
     Parameters: terrains: current active field in the battle
     Parameters: opp_max_hp: max health points of the opponent Pokémon
     Parameters: opp_conditions: the health state of the opponent Pokémon
+    Parameters: exact_damage: the exact damage of the available moves by id, None to use compute_damage
     Returns: a tuple that indicated whether a move can defeat the opponent Pokémon and the corresponding move
     """
     @staticmethod
     def hit_if_act_poke_can_outspeed(battle: AbstractBattle, terrains: List[Field], opp_max_hp: int,
-                                     opp_conditions: List) -> Tuple[bool, Move]:
+                                     opp_conditions: List, exact_damage: Optional[Dict[str, Dict[str, int]]] = None) \
+            -> Tuple[bool, Move]:
         opp_hp = math.ceil(opp_max_hp * battle.opponent_active_pokemon.current_hp_fraction)
+        weather = None if len(battle.weather) == 0 else next(iter(battle.weather.keys()))
+        exact_damage = dict() if exact_damage is None else exact_damage
+        best_move, best_ko_p = None, LIKELY_KO
         for move in battle.available_moves:
-            battle_status = BattleStatus(
-                NodePokemon(battle.active_pokemon, is_act_poke=True, moves=battle.available_moves),
-                NodePokemon(battle.opponent_active_pokemon, is_act_poke=False, current_hp=opp_hp,
-                            moves=list(battle.opponent_active_pokemon.moves.values())),
-                [], [], battle.weather, terrains,
-                opp_conditions, None, move, True)
-            opp_is_fainted = battle_status.simulate_action(move, True).opp_poke.is_fainted()
-            if opp_is_fainted:
-                return True, move
-        return False, Gen8Move('splash')
+            ko_p = ko_probability(move, battle.active_pokemon, battle.opponent_active_pokemon, opp_hp, weather,
+                                  terrains, opp_conditions, battle.active_pokemon.boosts,
+                                  battle.opponent_active_pokemon.boosts, True, exact_damage.get(move.id))
+            if ko_p > best_ko_p or (best_move is None and ko_p >= best_ko_p):
+                best_move, best_ko_p = move, ko_p
+        if best_move is not None:
+            return True, best_move
+        return False, get_move('splash')
+
+    """
+    Build the damage cases of the available moves asked to the oracle in exact mode, with the same arguments of
+    compute_damage. The oracle knows nothing of the max moves the moves become while dynamaxed, so it is not asked then
+    Parameters: battle: current state of the battle
+    Returns: the cases, empty if the oracle is not asked in the position
+    """
+    @staticmethod
+    def exact_damage_cases(battle: AbstractBattle) -> List[Tuple]:
+        bot_pokemon, opp_pokemon = battle.active_pokemon, battle.opponent_active_pokemon
+        if bot_pokemon is None or opp_pokemon is None or bot_pokemon.is_dynamaxed:
+            return []
+
+        weather, terrains, _, opp_conditions = get_battle_info(battle).values()
+        return [(move, bot_pokemon, opp_pokemon, weather, terrains, opp_conditions, bot_pokemon.boosts,
+                 opp_pokemon.boosts) for move in battle.available_moves]
+
+    """
+    Check whether dynamaxing is worth searching in the current position: the gimmick must be available and, unless
+    the pruning is disabled, the active Pokémon must be the last one alive or have enough health points left to
+    take advantage of the max moves
+    Parameters: battle: current state of the battle
+    Parameters: bench: the bot's Pokémon still alive, excluding the active one
+    Returns: true if the max moves are searched at the root, false otherwise
+    """
+    def dynamax_plausible(self, battle: AbstractBattle, bench: List[Pokemon]) -> bool:
+        if not battle.can_dynamax or battle.active_pokemon.is_dynamaxed:
+            return False
+        if not self.dynamax_pruning:
+            return True
+
+        return len(bench) == 0 or battle.active_pokemon.current_hp_fraction >= DYNAMAX_MIN_HP_FRACTION
 
     @staticmethod
     def print_chosen_move(battle, best_move, opp_conditions, terrains, weather):
@@ -232,20 +537,470 @@ class MiniMaxPlayer(Player):
     Computes the best move or the best pokémon to switch
     Parameters: battle: current state of the battle
     Parameters: root_battle_status: root node from which the minimax algorithm starts
-    Returns: the best move or the best pokémon to switch
+    Returns: the best move or the best pokémon to switch, a random order if the search doesn't find any move
     """
-    def get_best_move(self, battle: AbstractBattle, root_battle_status: BattleStatus) -> Pokemon | Move:
-        ris = self.alphabeta(root_battle_status, 0, float('-inf'), float('+inf'), True)
+    def get_best_move(self, battle: AbstractBattle, root_battle_status: BattleStatus) -> Pokemon | Move | BattleOrder:
+        state = self.battle_states.get(battle.battle_tag)
+        self.stop_pondering(state)
+        if self.endgame_size > 0:
+            winning_move = self.solve_endgame(battle, state, root_battle_status)
+            if winning_move is not None:
+                return winning_move
+
+        ris = self.pondered_result(battle, state, root_battle_status)
+        previous = self.reuse_search_tree(battle, state) if ris is None and self.reuse_tree else None
+        if previous is not None:
+            root_battle_status.previous = previous
+        if ris is None:
+            search_start = perf_counter()
+            self.heuristic.prepare(root_battle_status)
+            if self.budget_scheduler is not None:
+                ris = self.iterative_deepening(battle, root_battle_status)
+            elif self.aspiration and previous is not None:
+                ris = self.aspiration_search(root_battle_status, previous.score)
+            elif self.aspiration and state.last_score is not None:
+                ris = self.aspiration_search(root_battle_status, state.last_score)
+            else:
+                ris = self.alphabeta(root_battle_status, 0, float('-inf'), float('+inf'), True)
+            state.last_score = float(ris[0])
+            self.record_search(0, perf_counter() - search_start)
         node: BattleStatus = ris[1]
         best_move = self.choose_random_move(battle)  # il bot ha fatto U-turn e node diventava none
-        if node is not None and node.move != Gen8Move('splash'):
+        pv_reply = None
+        if node is not None and node.move is not get_move('splash'):
             best_move = node.move  # self.choose_random_move(battle)
             curr_node = node
             while curr_node.ancestor is not None:
+                # The move before ours in the walk is the reply of the opponent expected by the search
+                pv_reply = best_move if curr_node is not node else None
                 best_move = curr_node.move
                 curr_node = curr_node.ancestor
+
+            if self.reuse_tree:
+                state.search_tree = (battle.turn, curr_node, best_move)
+
+        if self.ponder and isinstance(best_move, Move):
+            self.start_pondering(battle, state, root_battle_status, best_move, pv_reply)
         return best_move
 
+    """
+    Retrieve the best move from the decision cache when the position is a canonical one that was already searched,
+    otherwise search it and store the result
+    Parameters: battle: current state of the battle
+    Parameters: root_battle_status: root node from which the minimax algorithm starts
+    Returns: the best move or the best pokémon to switch, a random order if the search doesn't find any move
+    """
+    def cached_best_move(self, battle: AbstractBattle, root_battle_status: BattleStatus) \
+            -> Pokemon | Move | BattleOrder:
+        fingerprint = None if self.decision_cache is None else position_fingerprint(battle)
+        if fingerprint is not None:
+            decision = self.decision_cache.get(self.decision_config, fingerprint)
+            if decision is not None:
+                move_id, max_move = decision
+                best_move = next((move for move in battle.available_moves if move.id == move_id), None)
+                if best_move is not None:
+                    return get_max_move(best_move) if max_move else best_move
+
+        best_move = self.get_best_move(battle, root_battle_status)
+        if fingerprint is not None and isinstance(best_move, Move):
+            # A max move is stored as the move it comes from, the one in the available moves
+            max_move = isinstance(best_move, DynamaxMove)
+            move_id = best_move._parent.id if max_move else best_move.id
+            self.decision_cache.put(self.decision_config, fingerprint, move_id, max_move)
+        return best_move
+
+    """
+    Solve the endgame exactly when both sides have at most endgame_size Pokémon left and all the ones of the opponent
+    are known with all their moves, since the solver can only prove a win against the moves it knows. The proven
+    positions are kept in the state of the battle, so the following turns find them
+    Parameters: battle: current state of the battle
+    Parameters: state: the state kept by the player about the battle
+    Parameters: root_battle_status: root node from which the minimax algorithm starts
+    Returns: a move that wins whatever the opponent does, None if the endgame is not proven to be won
+    """
+    def solve_endgame(self, battle: AbstractBattle, state: BattleState, root_battle_status: BattleStatus) \
+            -> Optional[Move]:
+        bench = [pokemon for pokemon in battle.team.values() if not pokemon.active and not pokemon.fainted]
+        opp_bench = [pokemon for pokemon in battle.opponent_team.values() if not pokemon.active and not pokemon.fainted]
+        opp_alive = 6 - len([pokemon for pokemon in battle.opponent_team.values() if pokemon.fainted])
+        if len(bench) + 1 > self.endgame_size or opp_alive > self.endgame_size or len(opp_bench) + 1 < opp_alive:
+            return None
+        if any(len(pokemon.moves) < 4 for pokemon in opp_bench + [battle.opponent_active_pokemon]):
+            return None
+
+        opp_pokemon = battle.opponent_active_pokemon
+        solver = EndgameSolver(weather=root_battle_status.weather, terrains=root_battle_status.terrains,
+                               opp_conditions=root_battle_status.opp_conditions)
+        result, move = solver.solve(root_battle_status.act_poke,
+                                    NodePokemon(opp_pokemon, is_act_poke=False, moves=list(opp_pokemon.moves.values())),
+                                    [NodePokemon(pokemon, is_act_poke=True, moves=list(pokemon.moves.values()))
+                                     for pokemon in bench],
+                                    [NodePokemon(pokemon, is_act_poke=False, moves=list(pokemon.moves.values()))
+                                     for pokemon in opp_bench],
+                                    state.cache("endgame"))
+        if self.verbose:
+            print("Endgame: {0} after {1} positions".format({WIN: "won", None: "not proven"}.get(result, "lost"),
+                                                            solver.nodes))
+
+        if result == WIN and move.id in [available_move.id for available_move in battle.available_moves]:
+            return move
+        return None
+
+    """
+    Start searching in the background the positions of the next turn, given the move we sent. The search runs in the
+    pondering thread while the player waits for the opponent, so the event loop goes on handling the messages. The
+    task that drives it is created on the event loop, also when the move was decided in a worker thread. The search
+    checks at every node whether the next decision has started or, with a budget scheduler, whether the pondering time
+    of the battle has run out
+    Parameters: battle: current state of the battle
+    Parameters: state: the state kept by the player about the battle
+    Parameters: root_battle_status: root node of the search of the current turn
+    Parameters: best_move: the move we sent
+    Parameters: pv_reply: the reply of the opponent expected by the search, None if it's not known
+    """
+    def start_pondering(self, battle: AbstractBattle, state: BattleState, root_battle_status: BattleStatus,
+                        best_move: Move, pv_reply: Optional[Move]) -> None:
+        deadline = None
+        if self.budget_scheduler is not None:
+            deadline = perf_counter() + self.budget_scheduler.ponder_time(battle.battle_tag)
+        stop = threading.Event()
+        state.ponder_stop = stop
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # In a worker thread there is no running loop
+            if self.loop is not None and not self.loop.is_closed():
+                self.loop.call_soon_threadsafe(self.create_ponder_task, state, root_battle_status, best_move, pv_reply,
+                                               stop, deadline)
+            return
+
+        self.create_ponder_task(state, root_battle_status, best_move, pv_reply, stop, deadline)
+
+    def create_ponder_task(self, state: BattleState, root_battle_status: BattleStatus, best_move: Move,
+                           pv_reply: Optional[Move], stop: threading.Event, deadline: Optional[float]) -> None:
+        if stop.is_set():
+            return  # the next decision started before the task was scheduled
+
+        state.ponder_task = asyncio.get_running_loop().create_task(
+            self.ponder_next_turn(state, root_battle_status, best_move, pv_reply, stop, deadline))
+
+    """
+    Stop the pondering of a battle and wait for the search in flight in the pondering thread, which stops at its next
+    node, so that the tree of the previous turn is not expanded while the next decision reads it
+    Parameters: state: the state kept by the player about the battle
+    """
+    @staticmethod
+    def stop_pondering(state: BattleState) -> None:
+        if state.ponder_stop is not None:
+            state.ponder_stop.set()
+            state.ponder_stop = None
+        if state.ponder_task is not None:
+            # The decision may run in a worker thread, while the task belongs to the event loop
+            loop = state.ponder_task.get_loop()
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(state.ponder_task.cancel)
+            state.ponder_task = None
+        with state.ponder_lock:
+            pass
+
+    """
+    Search the positions that follow our move and each reply of the opponent, the expected one first, each one in the
+    pondering thread. The results are kept in the state of the battle, so that the next decision can use them if the
+    observed position matches
+    Parameters: state: the state kept by the player about the battle
+    Parameters: root_battle_status: root node of the search of the current turn
+    Parameters: best_move: the move we sent
+    Parameters: pv_reply: the reply of the opponent expected by the search, None if it's not known
+    Parameters: stop: the event that stops the pondering
+    Parameters: deadline: the time at which the pondering stops, None to ponder until the next decision
+    """
+    async def ponder_next_turn(self, state: BattleState, root_battle_status: BattleStatus, best_move: Move,
+                               pv_reply: Optional[Move], stop: threading.Event, deadline: Optional[float]) -> None:
+        loop = asyncio.get_running_loop()
+        state.pondered = []
+        child = self.expand(root_battle_status, best_move, True)
+        replies = sorted(child.opp_poke_avail_actions(), key=lambda reply: reply is not pv_reply)
+        for reply in replies:
+            if stop.is_set() or (deadline is not None and perf_counter() > deadline):
+                return
+
+            pondered = await loop.run_in_executor(self.ponder_executor, self.ponder_reply, state, child, reply, stop,
+                                                  deadline)
+            if pondered is not None:
+                state.pondered.append(pondered)
+
+    """
+    Search in the pondering thread the position that follows our move and a reply of the opponent, holding the
+    pondering lock of the battle
+    Parameters: state: the state kept by the player about the battle
+    Parameters: child: the node after our move
+    Parameters: reply: the reply of the opponent
+    Parameters: stop: the event that stops the pondering
+    Parameters: deadline: the time at which the pondering stops, None to ponder until the next decision
+    Returns: the predicted position with the best game state and its value, None if the position leads to a switch
+    or the search was stopped
+    """
+    def ponder_reply(self, state: BattleState, child: BattleStatus, reply: Move | Pokemon, stop: threading.Event,
+                     deadline: Optional[float]) -> Optional[Tuple[BattleStatus, Tuple[float, BattleStatus]]]:
+        counters = SearchCounters(stop, deadline)
+        with state.ponder_lock:
+            try:
+                return self.search_reply(child, reply, counters)
+            finally:
+                self.record_search(counters.nodes, 0)
+
+    """
+    Search the position that follows our move and a reply of the opponent. The result is discarded if the search
+    was stopped
+    Parameters: child: the node after our move
+    Parameters: reply: the reply of the opponent
+    Parameters: counters: the counters of the search, with what stops it
+    Returns: the predicted position with the best game state and its value, None if the position leads to a switch
+    or the search was stopped
+    """
+    def search_reply(self, child: BattleStatus, reply: Move | Pokemon, counters: SearchCounters) \
+            -> Optional[Tuple[BattleStatus, Tuple[float, BattleStatus]]]:
+        if counters.stopped():
+            return None
+
+        after_reply = self.expand(child, reply, False)
+        if after_reply.act_poke.is_fainted() or after_reply.opp_poke.is_fainted():
+            return None  # the next request will be a switch
+
+        predicted = BattleStatus(after_reply.act_poke, after_reply.opp_poke, after_reply.avail_switches,
+                                 after_reply.opp_team, after_reply.weather, after_reply.terrains,
+                                 after_reply.opp_conditions, None, get_move('splash'), True)
+        self.carry_dynamax_actions(child.ancestor, predicted)
+        self.heuristic.prepare(predicted)
+        score, ret_node, alpha = float('-inf'), predicted, float('-inf')
+        for poss_act in predicted.act_poke_avail_actions():
+            new_state = self.expand(predicted, poss_act, True)
+            child_score, child_node = self.alphabeta(new_state, 0, alpha, float('+inf'), False, None, counters)
+            if counters.stopped():
+                return None
+            if score < child_score:
+                ret_node = child_node
+            score = max(score, child_score)
+            alpha = max(alpha, score)
+
+        return predicted, (score, ret_node)
+
+    """
+    Give to a position of the next turn the max moves searched at the root of the current one, if the bot can still
+    dynamax there: it must not have dynamaxed in the meantime and, unless the pruning is disabled, the active Pokémon
+    must be the last one that can act or have enough health points left, as in dynamax_plausible
+    Parameters: root_battle_status: root node of the search of the current turn
+    Parameters: predicted: a position of the next turn
+    """
+    def carry_dynamax_actions(self, root_battle_status: BattleStatus, predicted: BattleStatus) -> None:
+        act_poke = predicted.act_poke
+        if act_poke.dynamax_turns > 0 or act_poke.pokemon.is_dynamaxed:
+            return
+        if not self.dynamax_pruning or len(predicted.avail_switches) == 0 \
+                or act_poke.hp_fraction() >= DYNAMAX_MIN_HP_FRACTION:
+            predicted.dynamax_actions = root_battle_status.dynamax_actions
+
+    """
+    Checks whether a simulated position matches the observed one: same active Pokémon with the same boosts, health
+    points within a tolerance and the same moves available to the bot
+    Parameters: node: a simulated position
+    Parameters: battle: current state of the battle
+    Returns: true if the positions match, false otherwise
+    """
+    @staticmethod
+    def same_position(node: BattleStatus, battle: AbstractBattle) -> bool:
+        act_poke, opp_poke = battle.active_pokemon, battle.opponent_active_pokemon
+        return node.act_poke.pokemon.species == act_poke.species \
+            and node.opp_poke.pokemon.species == opp_poke.species \
+            and node.act_poke.boosts == act_poke.boosts and node.opp_poke.boosts == opp_poke.boosts \
+            and abs(node.act_poke.hp_fraction() - act_poke.current_hp_fraction) <= PONDER_HP_TOLERANCE \
+            and abs(node.opp_poke.hp_fraction() - opp_poke.current_hp_fraction) <= PONDER_HP_TOLERANCE \
+            and sorted([move.id for move in node.act_poke.moves]) == sorted([move.id for move in battle.available_moves])
+
+    """
+    Retrieve the result of a pondered search whose position matches the observed one, with the same max moves at
+    the root
+    Parameters: battle: current state of the battle
+    Parameters: state: the state kept by the player about the battle
+    Parameters: root_battle_status: root node built from the observed position
+    Returns: a tuple containing the best game state with its value, None if no pondered position matches
+    """
+    def pondered_result(self, battle: AbstractBattle, state: BattleState, root_battle_status: BattleStatus) \
+            -> Optional[Tuple[float, BattleStatus]]:
+        dynamax_ids = sorted(move.id for move in root_battle_status.dynamax_actions)
+        pondered, state.pondered = state.pondered, []
+        for predicted, ris in pondered:
+            if self.same_position(predicted, battle) \
+                    and sorted(move.id for move in predicted.dynamax_actions) == dynamax_ids:
+                self.ponder_hits += 1
+                return ris
+
+        if len(pondered) > 0:
+            self.ponder_misses += 1
+        return None
+
+    """
+    Find in the tree searched in the previous turn the position reached after our move and the reply of the
+    opponent that matches the observed one. Its subtree was simulated from the predicted health points and the
+    opponent moves known back then, so it is not searched again: the new search starts from the observed position and
+    uses the subtree to order its actions and, with aspiration windows, its score as the center of the window. The
+    links of the subtree to the tree of the turn before are cut, so that the trees of the past turns are released
+    Parameters: battle: current state of the battle
+    Parameters: state: the state kept by the player about the battle
+    Returns: the matching position of the previous tree, None if the previous tree can't be reused
+    """
+    def reuse_search_tree(self, battle: AbstractBattle, state: BattleState) -> Optional[BattleStatus]:
+        search_tree, state.search_tree = state.search_tree, None
+        if search_tree is None:
+            return None
+
+        turn, root, best_move = search_tree
+        if turn != battle.turn - 1 or best_move not in root.children:
+            return None
+
+        for node in root.children[best_move].children.values():
+            if self.same_position(node, battle):
+                node.ancestor = None
+                subtree = [node]
+                while len(subtree) > 0:
+                    previous_node = subtree.pop()
+                    previous_node.previous = None
+                    subtree.extend(previous_node.children.values())
+                return node
+
+        return None
+
+    """
+    Search with a narrow alpha-beta window around the expected score, searching again with the full window if the
+    score falls outside of it
+    Parameters: root_battle_status: root node from which the minimax algorithm starts
+    Parameters: expected_score: the expected score of the root
+    Returns: a tuple containing the best game state with its value
+    """
+    def aspiration_search(self, root_battle_status: BattleStatus, expected_score: float) -> Tuple[float, BattleStatus]:
+        alpha, beta = expected_score - ASPIRATION_WINDOW, expected_score + ASPIRATION_WINDOW
+        ris = self.alphabeta(root_battle_status, 0, alpha, beta, True)
+        if ris[0] <= alpha or ris[0] >= beta:
+            ris = self.alphabeta(root_battle_status, 0, float('-inf'), float('+inf'), True)
+        return ris
+
+    """
+    Simulate the position reached with an action. When the search tree is kept across turns, the children are
+    stored in the node and simulated only once, and each one is linked to the child of the same action in the
+    previous tree
+    Parameters: node: a node representing a game state
+    Parameters: action: the action to simulate
+    Parameters: is_my_turn: true if the bot acts, false otherwise
+    Returns: the new game state
+    """
+    def expand(self, node: BattleStatus, action: Move | Pokemon, is_my_turn: bool) -> BattleStatus:
+        if not self.reuse_tree:
+            return node.simulate_action(action, is_my_turn)
+
+        child = node.children.get(action)
+        if child is None:
+            child = node.simulate_action(action, is_my_turn)
+            node.children[action] = child
+            if node.previous is not None:
+                key = self.action_key(action)
+                child.previous = next((previous_child for previous_action, previous_child
+                                       in node.previous.children.items() if self.action_key(previous_action) == key),
+                                      None)
+        return child
+
+    """
+    Identify an action across the turns, since the moves and the Pokémon of a new turn may be new objects
+    Parameters: action: a move or a Pokémon to switch in
+    Returns: the id of the move or the species of the Pokémon
+    """
+    @staticmethod
+    def action_key(action: Move | Pokemon) -> str:
+        return action.id if isinstance(action, Move) else action.species
+
+    """
+    Sort the actions of a node so that the ones that were the best in a previous search of the node, or of the same
+    node in the tree of the previous turn, are explored first, improving the pruning. The order is unchanged if the
+    node was never searched
+    Parameters: node: a node representing a game state
+    Parameters: is_my_turn: true if the bot acts, false otherwise
+    Returns: the actions
+    """
+    @classmethod
+    def ordered_actions(cls, node: BattleStatus, is_my_turn: bool) -> List[Move | Pokemon]:
+        actions = node.act_poke_avail_actions() if is_my_turn else node.opp_poke_avail_actions()
+        searched = node.children if len(node.children) > 0 or node.previous is None else node.previous.children
+        if len(searched) == 0:
+            return actions
+
+        scores = {cls.action_key(action): child.score for action, child in searched.items()}
+        unknown = float('-inf') if is_my_turn else float('+inf')
+        return sorted(actions, key=lambda action: scores.get(cls.action_key(action), unknown), reverse=is_my_turn)
+
+    """
+    Deepen the search one turn at a time until the next depth is expected to exceed the search time allocated by
+    the budget scheduler, or the max depth is reached. The time of the next depth is predicted from the growth of
+    the time of the previous ones
+    Parameters: battle: current state of the battle
+    Parameters: root_battle_status: root node from which the minimax algorithm starts
+    Returns: a tuple containing the best game state with its value, found by the deepest completed search
+    """
+    def iterative_deepening(self, battle: AbstractBattle, root_battle_status: BattleStatus) -> Tuple[float, BattleStatus]:
+        alive_pokemon = len([pokemon for pokemon in battle.team.values() if not pokemon.fainted]) + \
+            6 - len([pokemon for pokemon in battle.opponent_team.values() if pokemon.fainted])
+        branching = len(root_battle_status.act_poke_avail_actions()) * \
+            max(1, len(root_battle_status.opp_poke_avail_actions()))
+        priority = self.budget_scheduler.priority(battle.battle_tag, alive_pokemon, branching)
+        allocated = self.budget_scheduler.allocate(battle.battle_tag, priority)
+
+        start = perf_counter()
+        ris, root_scores, last_time, growth = None, [], None, branching
+        for max_depth in range(1, self.max_depth + 1):
+            depth_start = perf_counter()
+            score, node, root_scores = self.search_root(root_battle_status, max_depth)
+            ris = (score, node)
+            depth_time = perf_counter() - depth_start
+            if last_time is not None and last_time > 0:
+                growth = max(1.0, depth_time / last_time)
+            last_time = depth_time
+            if perf_counter() - start + depth_time * growth > allocated:
+                break
+
+        root_scores.sort(reverse=True)
+        root_gap = float(root_scores[0] - root_scores[1]) if len(root_scores) > 1 else None
+        self.budget_scheduler.release(battle.battle_tag, allocated, perf_counter() - start, root_gap)
+        return ris
+
+    """
+    Search every action of the bot at the root, as alphabeta does, keeping the score of each of them
+    Parameters: root_battle_status: root node from which the minimax algorithm starts
+    Parameters: max_depth: the depth of the search
+    Returns: a tuple containing the best score, the best game state and the scores of the root actions. The scores
+    of the actions pruned by alpha-beta are upper bounds
+    """
+    def search_root(self, root_battle_status: BattleStatus, max_depth: int) -> Tuple[float, BattleStatus, List[float]]:
+        score, ret_node, alpha = float('-inf'), root_battle_status, float('-inf')
+        root_scores = []
+        for poss_act in self.ordered_actions(root_battle_status, True):
+            new_state = self.expand(root_battle_status, poss_act, True)
+            child_score, child_node = self.alphabeta(new_state, 0, alpha, float('+inf'), False, max_depth)
+            root_scores.append(child_score)
+            if score < child_score:
+                ret_node = child_node
+            score = max(score, child_score)
+            alpha = max(alpha, score)
+
+        return score, ret_node, root_scores
+
+    """
+    Add the nodes visited and the time spent by a search to the totals of the player
+    Parameters: nodes: the nodes visited by the search
+    Parameters: seconds: the time spent by the search
+    """
+    def record_search(self, nodes: int, seconds: float) -> None:
+        with self.search_stats_lock:
+            self.nodes_searched += nodes
+            self.search_time += seconds
+
     """
     Build the minimax tree with alpha-beta pruning
     Parameters: node: to start exploring from
@@ -253,6 +1008,9 @@ class MiniMaxPlayer(Player):
     Parameters: alpha: alpha value of the alpha-beta pruning. Initial call: alpha=-inf
     Parameters: beta: beta value of the alpha-beta pruning. Initial call: beta=-inf
     Parameters: is_my_turn: true if the bot attacks, false otherwise
+    Parameters: max_depth: the depth of the search, the max depth of the player if None
+    Parameters: counters: the counters of the search, None on the initial call, which adds the nodes it visits to
+    the ones searched by the player. The search returns at once when the counters say it has to stop
     Returns: a tuple containing the best game state with its value
     (* Initial call *) alphabeta(origin, 0, −inf, +inf, TRUE)
     """
@@ -260,8 +1018,22 @@ class MiniMaxPlayer(Player):
                   depth: int,
                   alpha: float,
                   beta: float,
-                  is_my_turn: bool) -> Tuple[float, BattleStatus]:
-        if depth == self.max_depth or self.is_terminal_node(node):
+                  is_my_turn: bool,
+                  max_depth: Optional[int] = None,
+                  counters: Optional[SearchCounters] = None) -> Tuple[float, BattleStatus]:
+        if counters is None:
+            counters = SearchCounters()
+            ris = self.alphabeta(node, depth, alpha, beta, is_my_turn, max_depth, counters)
+            self.record_search(counters.nodes, 0)
+            return ris
+        if counters.stopped():
+            return node.score, node  # the caller discards the result of a stopped search
+        max_depth = self.max_depth if max_depth is None else max_depth
+        if depth == max_depth and self.quiescence_nodes > 0 and not self.is_terminal_node(node):
+            counters.quiescence_left = self.quiescence_nodes
+            return self.quiescence(node, depth, alpha, beta, is_my_turn, counters)
+        counters.nodes += 1
+        if depth == max_depth or self.is_terminal_node(node):
             score = node.compute_score(self.heuristic, depth)
             node.score = score
             return score, node
@@ -269,9 +1041,17 @@ class MiniMaxPlayer(Player):
             score = float('-inf')
             ret_node = node
             # print(str(depth) + " bot -> " + str(node))
-            for poss_act in node.act_poke_avail_actions():
-                new_state = node.simulate_action(poss_act, is_my_turn)
-                child_score, child_node = self.alphabeta(new_state, depth, alpha, beta, False)
+            for i, poss_act in enumerate(self.ordered_actions(node, is_my_turn)):
+                new_state = self.expand(node, poss_act, is_my_turn)
+                if self.pvs and i > 0 and alpha > float('-inf'):
+                    # Prove that the action is not better than the best one with a null window, search again if it is
+                    child_score, child_node = self.alphabeta(new_state, depth, alpha, alpha + PVS_WINDOW, False,
+                                                             max_depth, counters)
+                    if alpha < child_score < beta:
+                        child_score, child_node = self.alphabeta(new_state, depth, alpha, beta, False, max_depth,
+                                                                 counters)
+                else:
+                    child_score, child_node = self.alphabeta(new_state, depth, alpha, beta, False, max_depth, counters)
                 if score < child_score:
                     ret_node = child_node
                 score = max(score, child_score)
@@ -280,14 +1060,25 @@ class MiniMaxPlayer(Player):
                 alpha = max(alpha, score)
 
             # print(str(depth) + " bot -> " + str(ret_node))
+            node.score = score
             return score, ret_node
+        elif self.batch_leaves and self.quiescence_nodes == 0 and depth + 1 == max_depth:
+            return self.min_on_leaves(node, depth + 1)
         else:
             score = float('inf')
             ret_node = node
             # print(str(depth) + " bot -> " + str(node))
-            for poss_act in node.opp_poke_avail_actions():
-                new_state = node.simulate_action(poss_act, is_my_turn)
-                child_score, child_node = self.alphabeta(new_state, depth + 1, alpha, beta, True)
+            for i, poss_act in enumerate(self.ordered_actions(node, is_my_turn)):
+                new_state = self.expand(node, poss_act, is_my_turn)
+                if self.pvs and i > 0 and beta < float('+inf'):
+                    child_score, child_node = self.alphabeta(new_state, depth + 1, beta - PVS_WINDOW, beta, True,
+                                                             max_depth, counters)
+                    if alpha < child_score < beta:
+                        child_score, child_node = self.alphabeta(new_state, depth + 1, alpha, beta, True, max_depth,
+                                                                 counters)
+                else:
+                    child_score, child_node = self.alphabeta(new_state, depth + 1, alpha, beta, True, max_depth,
+                                                             counters)
                 if score > child_score:
                     ret_node = child_node
                 score = min(score, child_score)
@@ -296,8 +1087,106 @@ class MiniMaxPlayer(Player):
                 beta = min(beta, score)
 
             # print(str(depth) + " opp -> " + str(ret_node))
+            node.score = score
             return score, ret_node
 
+    """
+    Extend the search beyond the max depth with the forcing actions only, the ones that can knock out the other
+    Pokémon and the damaging moves with priority, so that a knock out one move after the horizon is not missed. Each
+    side can also stand pat, keeping the static score. The extension of each leaf explores at most quiescence_nodes
+    nodes
+    Parameters: node: a leaf of the minimax tree
+    Parameters: depth: current depth of the minimax tree
+    Parameters: alpha: alpha value of the alpha-beta pruning
+    Parameters: beta: beta value of the alpha-beta pruning
+    Parameters: is_my_turn: true if the bot attacks, false otherwise
+    Parameters: counters: the counters of the search, with the nodes left to the extension of the leaf
+    Returns: a tuple containing the best game state with its value
+    """
+    def quiescence(self, node: BattleStatus, depth: int, alpha: float, beta: float, is_my_turn: bool,
+                   counters: SearchCounters) -> Tuple[float, BattleStatus]:
+        if counters.stopped():
+            return node.score, node
+        counters.nodes += 1
+        counters.quiescence_left -= 1
+        score = node.compute_score(self.heuristic, depth)
+        node.score = score
+        ret_node = node
+        if counters.quiescence_left <= 0 or self.is_terminal_node(node):
+            return score, ret_node
+
+        if is_my_turn:
+            if score >= beta:
+                return score, ret_node
+            alpha = max(alpha, score)
+            for poss_act in self.forcing_actions(node, is_my_turn):
+                child_score, child_node = self.quiescence(self.expand(node, poss_act, is_my_turn), depth, alpha, beta,
+                                                          False, counters)
+                if score < child_score:
+                    score, ret_node = child_score, child_node
+                if score >= beta or counters.quiescence_left <= 0:
+                    break
+                alpha = max(alpha, score)
+        else:
+            if score <= alpha:
+                return score, ret_node
+            beta = min(beta, score)
+            for poss_act in self.forcing_actions(node, is_my_turn):
+                child_score, child_node = self.quiescence(self.expand(node, poss_act, is_my_turn), depth + 1, alpha,
+                                                          beta, True, counters)
+                if score > child_score:
+                    score, ret_node = child_score, child_node
+                if score <= alpha or counters.quiescence_left <= 0:
+                    break
+                beta = min(beta, score)
+
+        node.score = score
+        return score, ret_node
+
+    """
+    Computes the forcing actions of a side: the moves whose upper bound of the damage can knock out the other
+    Pokémon and the damaging moves with priority
+    Parameters: node: a node representing a game state
+    Parameters: is_my_turn: true if the bot attacks, false otherwise
+    Returns: the forcing actions
+    """
+    @staticmethod
+    def forcing_actions(node: BattleStatus, is_my_turn: bool) -> List[Move]:
+        weather = None if len(node.weather.keys()) == 0 else next(iter(node.weather.keys()))
+        attacker, defender = (node.act_poke, node.opp_poke) if is_my_turn else (node.opp_poke, node.act_poke)
+        actions = node.act_poke_avail_actions() if is_my_turn else node.opp_poke_avail_actions()
+        forcing = []
+        for move in actions:
+            if not isinstance(move, Move) or move.category is MoveCategory.STATUS:
+                continue
+            if move.priority > 0 or compute_damage(move, attacker.pokemon, defender.pokemon, weather, node.terrains,
+                                                   node.opp_conditions, attacker.boosts, defender.boosts,
+                                                   is_my_turn)["ub"] >= defender.current_hp:
+                forcing.append(move)
+
+        return forcing
+
+    """
+    Expands all the opponent's actions of a node whose children are leaves and scores them with a single batch
+    evaluation of the heuristic
+    Parameters: node: a node where the opponent has to move
+    Parameters: leaf_depth: depth of the children of the node
+    Returns: a tuple containing the child with the lowest score and its value
+    """
+    def min_on_leaves(self, node: BattleStatus, leaf_depth: int) -> Tuple[float, BattleStatus]:
+        children = [self.expand(node, poss_act, False) for poss_act in node.opp_poke_avail_actions()]
+        if len(children) == 0:
+            return float('inf'), node
+
+        scores = self.heuristic.compute_batch(children, leaf_depth)
+        score, ret_node = float('inf'), node
+        for child, child_score in zip(children, scores):
+            child.score = float(child_score)
+            if score > child.score:
+                score, ret_node = child.score, child
+
+        return score, ret_node
+
     """
     Checks whether the opponent player is defeated
     Parameters: node: a node representing a game state
@@ -0,0 +1,104 @@
+from poke_env.environment import AbstractBattle
+from poke_env.player import Player
+from collections import OrderedDict, deque
+from typing import Deque, List, Optional
+
+# Max number of summaries and of evicted battle tags kept by a player
+MAX_SUMMARIES = 10000
+MAX_EVICTED_TAGS = 10000
+
+"""
+Compact summary of a finished battle, kept in place of the battle object
+Parameters: battle: the finished battle
+"""
+class BattleSummary:
+
+    __slots__ = ("battle_tag", "opponent_username", "won", "lost", "turns")
+
+    def __init__(self, battle: AbstractBattle):
+        self.battle_tag: str = battle.battle_tag
+        self.opponent_username: Optional[str] = battle.opponent_username
+        self.won: bool = bool(battle.won)
+        self.lost: bool = bool(battle.lost)
+        self.turns: int = battle.turn
+
+    def __repr__(self) -> str:
+        return "BattleSummary({0}, won={1}, turns={2})".format(self.battle_tag, self.won, self.turns)
+
+
+"""
+Player with an opt-in retention policy for finished battles. poke-env keeps every battle in the battles dict of the
+player, so the memory of a long-running player grows with the number of games played. A player with a retention
+policy keeps only the last keep_battles finished battles, and optionally a compact summary of the evicted ones. The
+counters of won, lost and finished battles, and thus the win rate, still account for the evicted battles
+Parameters: keep_battles: the number of finished battles to keep, all of them if None
+Parameters: keep_summaries: whether to keep a summary of the evicted battles
+"""
+class RetentionPlayer(Player):
+
+    def __init__(self, *args, keep_battles: Optional[int] = None, keep_summaries: bool = False, **kwargs):
+        # The player may start listening in the constructor, so the policy is set first
+        self.keep_battles: Optional[int] = keep_battles
+        self.keep_summaries: bool = keep_summaries
+        self.battle_summaries: Deque[BattleSummary] = deque(maxlen=MAX_SUMMARIES)
+        self._finished_tags: Deque[str] = deque()
+        self._evicted_tags: OrderedDict[str, None] = OrderedDict()
+        self._evicted_finished: int = 0
+        self._evicted_won: int = 0
+        self._evicted_lost: int = 0
+        super(RetentionPlayer, self).__init__(*args, **kwargs)
+
+    async def _handle_battle_message(self, split_messages: List[List[str]]) -> None:
+        # Messages of an evicted battle would wait forever for the battle to be created again, so they are dropped
+        if split_messages[0][0][1:] in self._evicted_tags:
+            return
+
+        await super(RetentionPlayer, self)._handle_battle_message(split_messages)
+
+    def _battle_finished_callback(self, battle: AbstractBattle) -> None:
+        super(RetentionPlayer, self)._battle_finished_callback(battle)
+        if self.keep_battles is None:
+            return
+
+        self._finished_tags.append(battle.battle_tag)
+        while len(self._finished_tags) > self.keep_battles:
+            self.evict(self._finished_tags.popleft())
+
+    """
+    Remove a finished battle from the battles of the player, updating the counters and keeping its summary
+    Parameters: battle_tag: the tag of the battle
+    """
+    def evict(self, battle_tag: str) -> None:
+        battle = self._battles.pop(battle_tag, None)
+        if battle is None:
+            return
+
+        self._evicted_finished += 1
+        self._evicted_won += 1 if battle.won else 0
+        self._evicted_lost += 1 if battle.lost else 0
+        if self.keep_summaries:
+            self.battle_summaries.append(BattleSummary(battle))
+
+        self._evicted_tags[battle_tag] = None
+        while len(self._evicted_tags) > MAX_EVICTED_TAGS:
+            self._evicted_tags.popitem(last=False)
+
+    def reset_battles(self) -> None:
+        super(RetentionPlayer, self).reset_battles()
+        self.battle_summaries.clear()
+        self._finished_tags.clear()
+        self._evicted_finished = 0
+        self._evicted_won = 0
+        self._evicted_lost = 0
+
+    @property
+    def n_finished_battles(self) -> int:
+        return super(RetentionPlayer, self).n_finished_battles + self._evicted_finished
+
+    @property
+    def n_lost_battles(self) -> int:
+        return super(RetentionPlayer, self).n_lost_battles + self._evicted_lost
+
+    @property
+    def n_won_battles(self) -> int:
+        return super(RetentionPlayer, self).n_won_battles + self._evicted_won
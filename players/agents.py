@@ -0,0 +1,68 @@
+from poke_env import PlayerConfiguration, ServerConfiguration
+from poke_env.player import Player
+from players.BasePowerMaximumPlayer import BasePowerMaximumPlayer
+from players.DamageMaximumPlayer import DamageMaximumPlayer
+from players.MiniMaxPlayer import MiniMaxPlayer
+from mm.Heuristic import Heuristic
+from mm.TeamHeuristic import TeamHeuristic
+from utils.decision_cache import DecisionCache
+from utils.oracle import DamageOracle
+from typing import Optional
+import random
+
+# Play modes of the agents: BasePowerMaximumPlayer, DamageMaximumPlayer, MiniMaxPlayer
+PLAYMODES = ["BPM", "DM", "MM"]
+
+"""
+Build an agent given its play mode
+Parameters: playmode: one of "BPM", "DM" and "MM"
+Parameters: concurrency: max concurrent battles of the agent
+Parameters: username: the username of the agent, a random one is generated if it is not given
+Parameters: server_configuration: the server the agent connects to, the local one if it is not given
+Parameters: heuristic: the heuristic of the MiniMaxPlayer, TeamHeuristic with the best parameters if it is not given
+Parameters: max_depth: the max depth of the minimax tree of the MiniMaxPlayer
+Parameters: keep_battles: the number of finished battles kept by the agent, all of them if None
+Parameters: keep_summaries: whether the agent keeps a summary of the battles it doesn't keep
+Parameters: decision_cache: the cache of the decisions in repeated positions used by the DM and MM agents, if any
+Parameters: damage_oracle: the oracle of the exact damage used by the MM agent, if any
+Returns: the agent
+"""
+def build_agent(playmode: str,
+                concurrency: int = 10,
+                username: Optional[str] = None,
+                server_configuration: Optional[ServerConfiguration] = None,
+                heuristic: Optional[Heuristic] = None,
+                max_depth: int = 2,
+                keep_battles: Optional[int] = None,
+                keep_summaries: bool = False,
+                decision_cache: Optional[DecisionCache] = None,
+                damage_oracle: Optional[DamageOracle] = None) -> Player:
+
+    if username is None:
+        username = playmode + "Player" + str(random.randint(0, 1000))
+
+    if playmode == "BPM":
+        agent = BasePowerMaximumPlayer(player_configuration=PlayerConfiguration(username, None),
+                                       max_concurrent_battles=concurrency,
+                                       server_configuration=server_configuration,
+                                       keep_battles=keep_battles, keep_summaries=keep_summaries)
+
+    elif playmode == "DM":
+        agent = DamageMaximumPlayer(player_configuration=PlayerConfiguration(username, None),
+                                    max_concurrent_battles=concurrency,
+                                    server_configuration=server_configuration,
+                                    keep_battles=keep_battles, keep_summaries=keep_summaries,
+                                    decision_cache=decision_cache)
+        agent.can_switch = True
+
+    elif playmode == "MM":
+        heuristic = TeamHeuristic() if heuristic is None else heuristic
+        agent = MiniMaxPlayer(player_configuration=PlayerConfiguration(username, None),
+                              max_concurrent_battles=concurrency, heuristic=heuristic, max_depth=max_depth,
+                              server_configuration=server_configuration, keep_battles=keep_battles,
+                              keep_summaries=keep_summaries, decision_cache=decision_cache,
+                              damage_oracle=damage_oracle)
+    else:
+        raise ValueError
+
+    return agent
@@ -1,12 +1,18 @@
 from poke_env.environment import Pokemon, MoveCategory
+from core.species_tables import lookup_type_gain
 
 """
 Computes the type advantage for a Pokémon given the defender
 Parameters: attacker: the attacking Pokémon
 Parameters: defender: the defending Pokémon
-Returns: The type advantage, which is the max multiplier coming from the type table
+Returns: The type advantage, which is the max multiplier coming from the type table, precomputed for the species of
+the random battles
 """
 def __type_advantage(attacker: Pokemon, defender: Pokemon) -> float:
+    type_gain = lookup_type_gain(attacker, defender)
+    if type_gain is not None:
+        return type_gain
+
     type_gain = max([defender.damage_multiplier(attacker_type)
                      for attacker_type in attacker.types if attacker_type is not None])
     return type_gain
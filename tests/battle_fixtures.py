@@ -0,0 +1,112 @@
+from poke_env import PlayerConfiguration
+from poke_env.environment import Gen8Battle
+from mm.BattleStatus import BattleStatus
+from players.MiniMaxPlayer import MiniMaxPlayer
+from mm.NodePokemon import NodePokemon
+from core.move_registry import get_move
+from core.stats import compute_stat
+from core.utils import get_battle_info
+from typing import Dict, List, Tuple
+import logging
+
+"""
+Describe a Pokémon of the bot as in the requests of the server
+Returns: the description of the Pokémon
+"""
+def request_pokemon(ident: str, details: str, condition: str, active: bool, moves: List[str], stats: Dict[str, int],
+                    ability: str, item: str) -> Dict:
+    return {"ident": ident, "details": details, "condition": condition, "active": active, "stats": stats,
+            "moves": moves, "baseAbility": ability, "ability": ability, "item": item, "pokeball": "pokeball"}
+
+
+# Team of the bot in the fixture positions, the first Pokémon is the active one
+TEAM = [
+    request_pokemon("p1: Garchomp", "Garchomp, L78, M", "265/265", True,
+                    ["earthquake", "outrage", "stoneedge", "swordsdance"],
+                    {"atk": 230, "def": 180, "spa": 152, "spd": 160, "spe": 192}, "roughskin", "lifeorb"),
+    request_pokemon("p1: Rotom", "Rotom-Wash, L84", "220/220", False,
+                    ["hydropump", "voltswitch", "willowisp", "painsplit"],
+                    {"atk": 120, "def": 200, "spa": 200, "spd": 200, "spe": 180}, "levitate", "leftovers"),
+    request_pokemon("p1: Blissey", "Blissey, L86, F", "600/600", False,
+                    ["softboiled", "seismictoss", "toxic", "teleport"],
+                    {"atk": 60, "def": 60, "spa": 150, "spd": 280, "spe": 130}, "naturalcure", "heavydutyboots"),
+]
+
+# Opponents of the fixture positions
+OPPONENTS = ["Corviknight, L80, M", "Blissey, L86, F", "Tyranitar, L80, M", "Snorlax, L80, M", "Dragonite, L78, M"]
+
+"""
+Build a battle at the start of a turn, with the team of the bot and an opponent Pokémon just switched in
+Parameters: opponent: the details of the opponent Pokémon
+Parameters: opponent_hp: the health of the opponent Pokémon, as in the protocol
+Parameters: team: the team of the bot
+Parameters: turn: the turn of the battle
+Parameters: can_dynamax: whether the bot can dynamax
+Parameters: tag: the tag of the battle
+Returns: the battle
+"""
+def make_battle(opponent: str = "Tyranitar, L80, M", opponent_hp: str = "100/100", team: List[Dict] = None,
+                turn: int = 1, can_dynamax: bool = True, tag: str = "battle-gen8randombattle-1") -> Gen8Battle:
+    team = TEAM if team is None else team
+    battle = Gen8Battle(battle_tag=tag, username="bot", logger=logging.getLogger("fixtures"), save_replays=False)
+    for message in [["", "player", "p1", "bot", "1", ""], ["", "player", "p2", "opp", "1", ""],
+                    ["", "switch", "p2a: " + opponent.split(",")[0], opponent, opponent_hp]]:
+        battle._parse_message(message)
+
+    active = team[0]
+    moves = [{"move": move, "id": move, "pp": 10, "maxpp": 10, "target": "normal", "disabled": False}
+             for move in active["moves"]]
+    battle._parse_request({"active": [{"moves": moves, "canDynamax": can_dynamax}],
+                           "side": {"name": "bot", "id": "p1", "pokemon": team}, "rqid": 3})
+    battle._parse_message(["", "switch", "p1a: " + active["ident"][4:], active["details"], active["condition"]])
+    battle._parse_message(["", "turn", str(turn)])
+    return battle
+
+"""
+Build the configuration of a player that never connects to a server
+Parameters: username: the username of the player
+Returns: the configuration
+"""
+def offline_configuration(username: str = "bot") -> PlayerConfiguration:
+    return PlayerConfiguration(username, None)
+
+"""
+Build the root of the search of a battle, as the MM agent does
+Parameters: battle: the battle
+Returns: the root node
+"""
+def make_root(battle: Gen8Battle) -> BattleStatus:
+    weather, terrains, _, opp_conditions = get_battle_info(battle).values()
+    opp_pokemon = battle.opponent_active_pokemon
+    available_moves = sorted(battle.available_moves, reverse=True, key=lambda move: int(move.base_power))
+    return BattleStatus(NodePokemon(battle.active_pokemon, is_act_poke=True, moves=available_moves),
+                        NodePokemon(opp_pokemon, is_act_poke=False,
+                                    current_hp=compute_stat(opp_pokemon, "hp", weather, terrains),
+                                    moves=list(opp_pokemon.moves.values())),
+                        battle.available_switches, [poke for poke in battle.opponent_team.values() if not poke.active],
+                        battle.weather, terrains, opp_conditions, None, get_move('splash'), True)
+
+"""
+Search a fixture position with a MiniMaxPlayer that never connects to a server
+Parameters: opponent: the details of the opponent Pokémon
+Parameters: max_depth: the depth of the search
+Parameters: flags: the other parameters of the player
+Returns: a tuple made up of the player, the root, the score of the root and the move chosen at the root
+"""
+def search_position(opponent: str, max_depth: int, **flags) -> Tuple:
+    player = MiniMaxPlayer(player_configuration=offline_configuration(), start_listening=False, max_depth=max_depth,
+                           **flags)
+    root = make_root(make_battle(opponent=opponent))
+    player.heuristic.prepare(root)
+    score, node = player.alphabeta(root, 0, float('-inf'), float('+inf'), True)
+    return player, root, float(score), root_move(node)
+
+"""
+Retrieve the move chosen at the root from the best leaf of a search
+Parameters: node: the best leaf
+Returns: the move of the child of the root on the path to the leaf
+"""
+def root_move(node: BattleStatus):
+    while node.ancestor is not None and node.ancestor.ancestor is not None:
+        node = node.ancestor
+    return node.move
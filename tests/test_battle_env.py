@@ -0,0 +1,55 @@
+from gym import Env
+from gym.spaces import Box, Discrete
+from learning.battle_env import N_ACTIONS, OBSERVATION_SIZE, VectorBattleEnv
+from time import perf_counter
+import numpy as np
+import time
+
+# Turns after which the battles of the stub end
+TURNS = 2
+
+
+"""
+Battle against a stub opponent, through the reset and step API of the poke-env environments, which waits a while for
+the opponent at every turn
+"""
+class StubBattle(Env):
+
+    def __init__(self):
+        self.observation_space = Box(low=-4, high=4, shape=(OBSERVATION_SIZE,), dtype=np.float32)
+        self.action_space = Discrete(N_ACTIONS)
+        self.resets = []
+        self.turn = 0
+
+    def reset(self, *, seed=None, return_info=False, options=None):
+        self.resets.append((seed, options))
+        self.turn = 0
+        observation = np.full(OBSERVATION_SIZE, len(self.resets), dtype=np.float32)
+        return (observation, {}) if return_info else observation
+
+    def step(self, action):
+        time.sleep(0.2)
+        self.turn += 1
+        observation = np.full(OBSERVATION_SIZE, action, dtype=np.float32)
+        return observation, float(action), self.turn == TURNS, False, {}
+
+
+def test_vector_env_forwards_the_seeds_and_steps_the_battles_in_parallel():
+    battles = [StubBattle() for _ in range(4)]
+    env = VectorBattleEnv(len(battles), envs=battles)
+    observations, _ = env.reset(seed=7, options={"team": "random"})
+    assert observations.shape == (4, OBSERVATION_SIZE)
+    assert [battle.resets for battle in battles] == [[(7 + i, {"team": "random"})] for i in range(4)]
+
+    start = perf_counter()
+    observations, rewards, terminated, truncated, infos = env.step(np.array([0, 1, 2, 3]))
+    assert perf_counter() - start < 0.6
+    assert list(rewards) == [0, 1, 2, 3] and not terminated.any() and "final_observation" not in infos
+
+    # The battles end at the second turn and start again, their last observation is in the info
+    observations, rewards, terminated, truncated, infos = env.step(np.array([4, 5, 6, 7]))
+    assert terminated.all() and not truncated.any()
+    assert [final[0] for final in infos["final_observation"]] == [4, 5, 6, 7]
+    assert list(observations[:, 0]) == [2, 2, 2, 2]
+    assert all(battle.resets[-1] == (None, None) for battle in battles)
+    env.close()
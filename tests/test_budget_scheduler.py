@@ -0,0 +1,24 @@
+from mm.BudgetScheduler import BudgetScheduler
+from players.MiniMaxPlayer import MiniMaxPlayer
+from tests.battle_fixtures import make_battle, offline_configuration
+import asyncio
+
+INACTIVE_LINE = "|inactive|Time left: 150 sec this turn | 600 sec total"
+
+
+def test_parse_timer():
+    assert BudgetScheduler.parse_timer("Time left: 150 sec this turn | 600 sec total") == 600
+    assert BudgetScheduler.parse_timer("Battle timer is ON") is None
+
+
+def test_inactive_message_caps_the_budget():
+    scheduler = BudgetScheduler(budget_per_decision=1.0, timer_fraction=0.1)
+    player = MiniMaxPlayer(player_configuration=offline_configuration(), start_listening=False,
+                           budget_scheduler=scheduler)
+    battle = make_battle()
+    player._battles[battle.battle_tag] = battle
+
+    split_messages = [[">" + battle.battle_tag], INACTIVE_LINE.split("|")]
+    asyncio.run(player._handle_battle_message(split_messages))
+
+    assert scheduler.time_left[battle.battle_tag] == 600
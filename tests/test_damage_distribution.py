@@ -0,0 +1,37 @@
+from core.damage_distribution import DAMAGE_ROLLS, MULTI_HIT_COUNTS, hit_counts, roll_distribution
+from core.move_registry import get_move
+from tests.battle_fixtures import make_battle
+import itertools
+import numpy as np
+
+
+def test_every_hit_has_its_own_roll_and_critical_hit():
+    crit_p = 1 / 24
+    values, probabilities = roll_distribution(40, False, ((2, 1.0),), crit_p)
+
+    hit = [(int(40 * roll / 100), (1 - crit_p) / 16) for roll in DAMAGE_ROLLS] + \
+        [(int(60 * roll / 100), crit_p / 16) for roll in DAMAGE_ROLLS]
+    expected = {}
+    for (first, p_first), (second, p_second) in itertools.product(hit, hit):
+        expected[first + second] = expected.get(first + second, 0) + p_first * p_second
+
+    assert values.tolist() == sorted(expected)
+    assert np.allclose(probabilities, [expected[value] for value in values])
+
+
+def test_two_to_five_hits():
+    values, probabilities = roll_distribution(50, False, MULTI_HIT_COUNTS, 0)
+    assert np.isclose(probabilities.sum(), 1)
+    assert values[0] == 2 * 42 and values[-1] == 5 * 50
+    assert np.isclose(np.dot(values, probabilities), 3.1 * np.mean(np.floor(50 * DAMAGE_ROLLS / 100)))
+
+
+def test_hit_counts():
+    attacker = make_battle().active_pokemon
+    assert hit_counts(get_move("bulletseed"), attacker, 1.0) == MULTI_HIT_COUNTS
+    assert hit_counts(get_move("dualwingbeat"), attacker, 0.9) == ((0, 1 - 0.9), (2, 0.9))
+    counts = dict(hit_counts(get_move("tripleaxel"), attacker, 0.9))
+    assert np.isclose(counts[3], 0.9 ** 3) and np.isclose(sum(counts.values()), 1)
+
+    attacker._ability = "skilllink"
+    assert hit_counts(get_move("bulletseed"), attacker, 1.0) == ((5, 1.0),)
@@ -0,0 +1,16 @@
+from players.MiniMaxPlayer import MiniMaxPlayer
+from utils.decision_cache import DecisionCache
+from tests.battle_fixtures import offline_configuration
+
+SEARCH_FLAGS = ["reuse_tree", "ponder", "pvs", "aspiration", "batch_leaves"]
+
+
+def decision_config(**flags):
+    return MiniMaxPlayer(player_configuration=offline_configuration(), start_listening=False,
+                         decision_cache=DecisionCache(), **flags).decision_config
+
+
+def test_every_search_flag_changes_the_configuration():
+    configs = [decision_config()] + [decision_config(**{flag: True}) for flag in SEARCH_FLAGS]
+    assert len(set(configs)) == len(SEARCH_FLAGS) + 1
+    assert decision_config() == configs[0]
@@ -0,0 +1,68 @@
+from poke_env.environment import MoveCategory
+from poke_env.environment.move import DynamaxMove
+from players.MiniMaxPlayer import MiniMaxPlayer
+from core.max_moves import get_max_move
+from tests.battle_fixtures import TEAM, make_battle, make_root, offline_configuration
+import asyncio
+
+SNORLAX = "Snorlax, L80, M"
+
+
+def snorlax_battle(turn=1, opponent_hp="100/100", condition=None):
+    team = TEAM if condition is None else [dict(TEAM[0], condition=condition)] + TEAM[1:]
+    battle = make_battle(opponent=SNORLAX, opponent_hp=opponent_hp, team=team, turn=turn)
+    battle._parse_message(["", "move", "p2a: Snorlax", "Body Slam", "p1a: Garchomp"])
+    battle._parse_message(["", "move", "p2a: Snorlax", "Earthquake", "p1a: Garchomp"])
+    return battle
+
+
+def dynamax_root(battle):
+    root = make_root(battle)
+    root.dynamax_actions = [get_max_move(move) for move in root.act_poke.moves if move.category != MoveCategory.STATUS]
+    return root
+
+
+def player(**flags):
+    return MiniMaxPlayer(player_configuration=offline_configuration(), start_listening=False, max_depth=2,
+                         dynamax_search=True, **flags)
+
+
+def test_reused_tree_searches_the_max_moves():
+    mm = player(reuse_tree=True)
+    battle = snorlax_battle()
+    root = dynamax_root(battle)
+    mm.heuristic.prepare(root)
+    mm.alphabeta(root, 0, float('-inf'), float('+inf'), True)
+
+    # The bot didn't dynamax, and the position after its Earthquake and Body Slam is the one observed next turn
+    earthquake = next(move for move in root.act_poke.moves if move.id == "earthquake")
+    body_slam = next(move for move in root.children[earthquake].children if move.id == "bodyslam")
+    expected = root.children[earthquake].children[body_slam]
+    state = mm.battle_states.get(battle.battle_tag)
+    state.search_tree = (1, root, earthquake)
+    next_battle = snorlax_battle(2, "{0}/100".format(round(100 * expected.opp_poke.hp_fraction())),
+                                 "{0}/265".format(expected.act_poke.current_hp))
+    mm.get_best_move(next_battle, dynamax_root(next_battle))
+
+    new_root = state.search_tree[1]
+    assert any(isinstance(action, DynamaxMove) for action in new_root.children)
+
+
+def test_pondered_positions_search_the_max_moves_until_the_bot_dynamaxes():
+    mm = player(ponder=True)
+    battle = snorlax_battle()
+    root = dynamax_root(battle)
+    state = mm.battle_states.get(battle.battle_tag)
+
+    async def ponder(move):
+        mm.start_pondering(battle, state, root, move, None)
+        await state.ponder_task
+
+    asyncio.run(ponder(root.act_poke.moves[0]))
+    assert len(state.pondered) > 0
+    assert all(len(predicted.dynamax_actions) == len(root.dynamax_actions) for predicted, _ in state.pondered)
+
+    asyncio.run(ponder(root.dynamax_actions[0]))
+    assert len(state.pondered) > 0
+    assert all(predicted.dynamax_actions == [] for predicted, _ in state.pondered)
+    mm.close()
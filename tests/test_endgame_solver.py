@@ -0,0 +1,66 @@
+from mm.EndgameSolver import EndgameSolver, WIN
+from mm.NodePokemon import NodePokemon
+from poke_env.environment import Field, SideCondition, Weather
+from tests.battle_fixtures import make_battle, TEAM
+
+OPPONENT_MOVES = ["Stone Edge", "Crunch", "Earthquake", "Fire Blast"]
+
+
+def endgame_battle(opponent_hp: str, revealed_moves: int, hp: str = "265/265", item: str = "leftovers"):
+    battle = make_battle(opponent="Tyranitar, L80, M", opponent_hp=opponent_hp, team=[dict(TEAM[0], condition=hp)])
+    for i in range(5):
+        battle._parse_message(["", "switch", "p2a: Mon{0}".format(i), "Magikarp, L90", "0/100"])
+        battle._parse_message(["", "faint", "p2a: Mon{0}".format(i)])
+    battle._parse_message(["", "switch", "p2a: Tyranitar", "Tyranitar, L80, M", opponent_hp])
+    for move in OPPONENT_MOVES[:revealed_moves]:
+        battle._parse_message(["", "move", "p2a: Tyranitar", move, "p1a: Garchomp"])
+    if item is not None:
+        battle.opponent_active_pokemon._item = item
+    return battle
+
+
+def position(battle, boosts=None):
+    act_poke = NodePokemon(battle.active_pokemon, is_act_poke=True, moves=battle.available_moves)
+    opp_pokemon = battle.opponent_active_pokemon
+    opp_poke = NodePokemon(opp_pokemon, is_act_poke=False, moves=list(opp_pokemon.moves.values()), boosts=boosts)
+    return act_poke, opp_poke, (), ()
+
+
+def solve(battle, boosts=None, solver=None, table=None):
+    act_poke, opp_poke, _, _ = position(battle, boosts)
+    solver = EndgameSolver() if solver is None else solver
+    return solver.solve(act_poke, opp_poke, [], [], dict() if table is None else table)
+
+
+def test_proves_a_knock_out_when_moving_first():
+    result, move = solve(endgame_battle("10/100", 4))
+    assert result == WIN
+    assert move.base_power > 0
+
+
+def test_speed_boosts_of_the_tree_change_the_move_order():
+    # Both sides are knocked out by any hit, so the faster one wins
+    battle = endgame_battle("10/100", 4, hp="10/265")
+    assert solve(battle)[0] == WIN
+    assert solve(battle, dict(battle.opponent_active_pokemon.boosts, spe=2))[0] != WIN
+
+
+def test_unknown_item_may_be_a_choice_scarf():
+    battle = endgame_battle("10/100", 4, hp="10/265", item=None)
+    assert solve(battle)[0] != WIN
+
+
+def test_trick_room_reverses_the_move_order():
+    battle = endgame_battle("10/100", 4, hp="10/265")
+    assert solve(battle, solver=EndgameSolver(terrains=[Field.TRICK_ROOM]))[0] != WIN
+
+
+def test_proven_positions_are_kept_per_field():
+    battle = endgame_battle("10/100", 4, hp="10/265")
+    table = dict()
+    assert solve(battle, table=table)[0] == WIN
+    assert solve(battle, solver=EndgameSolver(terrains=[Field.TRICK_ROOM]), table=table)[0] != WIN
+
+    keys = {EndgameSolver(**field).position_key(position(battle))
+            for field in [dict(), dict(weather={Weather.SUNNYDAY: 1}), dict(opp_conditions=[SideCondition.REFLECT])]}
+    assert len(keys) == 3
@@ -0,0 +1,35 @@
+from mm.EvaluationServer import EvaluationServer, ServedHeuristic
+from mm.SimpleHeuristic import SimpleHeuristic
+from players.MiniMaxPlayer import MiniMaxPlayer
+from tests.battle_fixtures import make_battle, make_root, offline_configuration
+import asyncio
+import pytest
+
+
+def test_closing_the_server_ends_its_thread():
+    server = EvaluationServer(SimpleHeuristic())
+    root = make_root(make_battle())
+    server.heuristic.prepare(root)
+    assert len(server.evaluate([root, root], 0)) == 2
+
+    server.close()
+    assert not server.thread.is_alive()
+    with pytest.raises(RuntimeError):
+        server.submit([root], 0)
+
+
+def test_closing_the_player_shuts_down_its_threads():
+    server = EvaluationServer(SimpleHeuristic())
+    player = MiniMaxPlayer(player_configuration=offline_configuration(), start_listening=False, max_depth=1,
+                           heuristic=ServedHeuristic(server), ponder=True)
+    battle = make_battle()
+
+    async def decide():
+        return await player.choose_move(battle)
+
+    assert asyncio.run(decide()) is not None
+    player.close()
+    server.close()
+    for executor in [player.search_executor, player.ponder_executor]:
+        with pytest.raises(RuntimeError):
+            executor.submit(lambda: None)
@@ -0,0 +1,60 @@
+from players.MiniMaxPlayer import MiniMaxPlayer
+from tests.battle_fixtures import TEAM, make_battle, offline_configuration
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+
+
+def forced_switch_key(battle):
+    bench = [pokemon for pokemon in battle.team.values() if not pokemon.active]
+    return MiniMaxPlayer.forced_switch_key(battle.opponent_active_pokemon, bench, None, [])
+
+
+def test_key_changes_with_the_opponent_speed_boost_and_status():
+    battle = make_battle()
+    key = forced_switch_key(battle)
+
+    battle._parse_message(["", "-boost", "p2a: Tyranitar", "spe", "1"])
+    boosted_key = forced_switch_key(battle)
+    assert boosted_key != key
+
+    battle._parse_message(["", "-status", "p2a: Tyranitar", "par"])
+    assert forced_switch_key(battle) != boosted_key
+
+
+def test_precomputed_switch_survives_the_damage_of_the_turn():
+    player = MiniMaxPlayer(player_configuration=offline_configuration(), start_listening=False)
+    battle = make_battle()
+    battle._parse_message(["", "move", "p2a: Tyranitar", "Stone Edge", "p1a: Garchomp"])
+    state = player.battle_states.get(battle.battle_tag)
+    bench = [pokemon for pokemon in battle.team.values() if not pokemon.active]
+    player.precompute_forced_switches(state, [battle.opponent_active_pokemon], bench, None, [])
+
+    # We move first and damage the opponent, then our active Pokémon is knocked out by a move already known
+    battle._parse_message(["", "move", "p1a: Garchomp", "Earthquake", "p2a: Tyranitar"])
+    battle._parse_message(["", "-damage", "p2a: Tyranitar", "45/100"])
+    battle._parse_message(["", "move", "p2a: Tyranitar", "Stone Edge", "p1a: Garchomp"])
+    battle._parse_message(["", "-damage", "p1a: Garchomp", "0 fnt"])
+    battle._parse_message(["", "faint", "p1a: Garchomp"])
+    team = [dict(TEAM[0], condition="0 fnt", active=True)] + TEAM[1:]
+    battle._parse_request({"forceSwitch": [True], "side": {"name": "bot", "id": "p1", "pokemon": team}, "rqid": 4})
+
+    assert len(battle.available_switches) == 2
+    assert player.cached_forced_switch(state, battle) is not None
+
+
+def test_worker_threads_schedule_the_precomputation_on_the_loop():
+    player = MiniMaxPlayer(player_configuration=offline_configuration(), start_listening=False)
+    battle = make_battle()
+    state = player.battle_states.get(battle.battle_tag)
+    bench = [pokemon for pokemon in battle.team.values() if not pokemon.active]
+
+    async def search_in_a_thread():
+        player.loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(1) as executor:
+            await player.loop.run_in_executor(executor, player.schedule_forced_switches, state, battle, bench, None,
+                                              [])
+        await asyncio.sleep(0)
+
+    asyncio.run(search_in_a_thread())
+
+    assert len(state.cache("forced_switches")) == 1
@@ -0,0 +1,41 @@
+from learning.log_parser import LogParser
+
+LOG = """|player|p1|alice|1|
+|player|p2|bob|2|
+|switch|p1a: Charizard|Charizard, L83, M|100/100
+|switch|p2a: Snorlax|Snorlax, L80, M|100/100
+|turn|1
+|-start|p1a: Charizard|Dynamax
+|move|p1a: Charizard|Max Flare|p2a: Snorlax
+|-damage|p2a: Snorlax|60/100
+|move|p2a: Snorlax|Body Slam|p1a: Charizard
+|-damage|p1a: Charizard|50/100
+|turn|2
+|move|p1a: Charizard|Max Guard|p1a: Charizard
+|move|p2a: Snorlax|Body Slam|p1a: Charizard
+|turn|3
+|win|alice"""
+
+
+def parse(parser):
+    records = []
+    for line in LOG.split("\n"):
+        records += parser.feed(None, line)
+    return records
+
+
+def test_dynamax_decisions_record_the_base_move():
+    records = parse(LogParser(None))
+    charizard = [record for record in records if record["player"] == "p1"]
+    # Fire Blast is the only fire move of the sets of Charizard, while several of its status moves become Max Guard
+    assert [(record["choice"], record["dynamax"]) for record in charizard] == [("fireblast", True), ("maxguard", False)]
+
+
+def test_failed_encodings_are_counted():
+    def featurize(battle):
+        raise ValueError("unknown species")
+
+    parser = LogParser(featurize)
+    records = parse(parser)
+    assert all(record["features"] is None for record in records)
+    assert parser.failed_features == len(records) + 2  # the decisions of the last turn are never completed
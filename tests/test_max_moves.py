@@ -0,0 +1,20 @@
+from core.max_moves import get_max_move
+from core.move_registry import get_move
+
+
+def test_max_move_has_its_own_id_and_effects():
+    max_move = get_max_move(get_move("gigadrain"))
+    assert max_move.id == "maxovergrowth"
+    assert max_move.drain == 0
+    assert max_move._parent.id == "gigadrain"
+
+
+def test_max_move_drops_fixed_damage_recoil_and_self_destruction():
+    assert get_max_move(get_move("seismictoss")).damage == 0
+    assert get_max_move(get_move("bravebird")).recoil == 0
+    assert get_max_move(get_move("explosion")).self_destruct is None
+    assert get_max_move(get_move("explosion")).id == "maxstrike"
+
+
+def test_status_moves_become_max_guard():
+    assert get_max_move(get_move("swordsdance")).id == "maxguard"
@@ -0,0 +1,15 @@
+from core.move_registry import get_move
+from utils.oracle import DamageOracle
+from tests.battle_fixtures import make_battle
+
+
+def test_answers_are_in_the_format_of_compute_damage():
+    battle = make_battle()
+    attacker, defender = battle.active_pokemon, battle.opponent_active_pokemon
+    cases = [(get_move(move), attacker, defender, None, [], [], attacker.boosts, defender.boosts)
+             for move in ["earthquake", "bulletseed", "dualwingbeat"]]
+    answers = [{"min": 85, "max": 100}] * 3
+
+    damages = DamageOracle.to_damage(cases, answers, True)
+    assert [damage["ub"] for damage in damages] == [100, 300, 200]
+    assert DamageOracle.to_damage(cases[:1], None, True)[0]["ub"] > 0
@@ -0,0 +1,98 @@
+from mm.BudgetScheduler import BudgetScheduler
+from mm.SimpleHeuristic import SimpleHeuristic
+from players.MiniMaxPlayer import MiniMaxPlayer
+from tests.battle_fixtures import make_battle, make_root, offline_configuration
+from time import perf_counter
+import asyncio
+import time
+
+
+def ponder(player, battle):
+    state = player.battle_states.get(battle.battle_tag)
+    root = make_root(battle)
+    ticks = []
+
+    async def ponder_and_tick():
+        player.start_pondering(battle, state, root, battle.available_moves[0], None)
+        while not state.ponder_task.done():
+            ticks.append(perf_counter())
+            await asyncio.sleep(0.001)
+
+    asyncio.run(ponder_and_tick())
+    player.close()
+    return state, ticks
+
+
+def test_pondering_leaves_the_loop_free():
+    player = MiniMaxPlayer(player_configuration=offline_configuration(), start_listening=False, max_depth=2,
+                           ponder=True)
+    battle = make_battle(opponent="Snorlax, L80, M")
+    battle._parse_message(["", "move", "p2a: Snorlax", "Body Slam", "p1a: Garchomp"])
+    battle._parse_message(["", "move", "p2a: Snorlax", "Earthquake", "p1a: Garchomp"])
+    state, ticks = ponder(player, battle)
+
+    assert len(state.pondered) > 0
+    assert len(ticks) > 1
+    assert max(later - earlier for earlier, later in zip(ticks, ticks[1:])) < 0.5
+
+
+def test_pondering_stops_when_the_budget_runs_out():
+    scheduler = BudgetScheduler(budget_per_decision=0.0, min_time=0.0)
+    player = MiniMaxPlayer(player_configuration=offline_configuration(), start_listening=False, max_depth=2,
+                           ponder=True, budget_scheduler=scheduler)
+    state, _ = ponder(player, make_battle(opponent="Snorlax, L80, M"))
+    assert state.pondered == []
+
+
+class SlowHeuristic(SimpleHeuristic):
+
+    def compute(self, node, depth):
+        time.sleep(0.01)
+        return super(SlowHeuristic, self).compute(node, depth)
+
+
+def test_stopping_waits_for_the_search_in_flight():
+    player = MiniMaxPlayer(player_configuration=offline_configuration(), start_listening=False, max_depth=2,
+                           ponder=True, heuristic=SlowHeuristic())
+    battle = make_battle(opponent="Snorlax, L80, M")
+    battle._parse_message(["", "move", "p2a: Snorlax", "Body Slam", "p1a: Garchomp"])
+    battle._parse_message(["", "move", "p2a: Snorlax", "Earthquake", "p1a: Garchomp"])
+    state = player.battle_states.get(battle.battle_tag)
+
+    async def ponder_and_stop():
+        player.start_pondering(battle, state, make_root(battle), battle.available_moves[0], None)
+        while not state.ponder_lock.locked():
+            await asyncio.sleep(0.001)
+        await asyncio.sleep(0.1)
+        assert state.ponder_lock.locked()
+        start = perf_counter()
+        player.stop_pondering(state)
+        stopped = perf_counter()
+        # The pondering thread is free as soon as the pondering is stopped
+        await asyncio.get_running_loop().run_in_executor(player.ponder_executor, lambda: None)
+        return stopped - start, perf_counter() - stopped
+
+    stop_time, idle_time = asyncio.run(ponder_and_stop())
+    assert stop_time < 0.5
+    assert idle_time < 0.1
+    assert state.pondered == []
+    player.close()
+
+
+def test_worker_threads_start_pondering_on_the_loop():
+    player = MiniMaxPlayer(player_configuration=offline_configuration(), start_listening=False, max_depth=2,
+                           ponder=True)
+    battle = make_battle(opponent="Snorlax, L80, M")
+    battle._parse_message(["", "move", "p2a: Snorlax", "Body Slam", "p1a: Garchomp"])
+    state = player.battle_states.get(battle.battle_tag)
+
+    async def ponder_from_a_worker():
+        player.loop = asyncio.get_running_loop()
+        await player.loop.run_in_executor(None, player.start_pondering, battle, state, make_root(battle),
+                                          battle.available_moves[0], None)
+        await asyncio.sleep(0)
+        await state.ponder_task
+
+    asyncio.run(ponder_from_a_worker())
+    assert len(state.pondered) > 0
+    player.close()
@@ -0,0 +1,22 @@
+from mm.BattleStatus import BattleStatus
+from mm.NodePokemon import NodePokemon
+from mm.PositionEncoder import FEATURE_NAMES, PositionEncoder
+from core.move_registry import get_move
+from tests.battle_fixtures import make_battle, make_root
+
+OUTSPEED = FEATURE_NAMES.index("outspeed")
+
+
+def test_outspeed_follows_the_boosts_of_the_node():
+    root = make_root(make_battle(opponent="Snorlax, L80, M"))
+    encoder = PositionEncoder()
+    assert encoder.features(root)[OUTSPEED] == 1
+
+    # A node of the same tree, with the same Pokémon, where ours has lost its speed
+    act_poke = root.act_poke
+    slowed = NodePokemon(act_poke.pokemon, is_act_poke=True, current_hp=act_poke.current_hp,
+                         boosts=dict(act_poke.boosts, spe=-6), moves=act_poke.moves)
+    child = BattleStatus(slowed, root.opp_poke, root.avail_switches, root.opp_team, root.weather, root.terrains,
+                         root.opp_conditions, root, get_move("splash"), True)
+    assert encoder.features(child)[OUTSPEED] == 0
+    assert encoder.features(root)[OUTSPEED] == 1
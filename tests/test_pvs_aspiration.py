@@ -0,0 +1,19 @@
+from tests.battle_fixtures import OPPONENTS, root_move, search_position
+import pytest
+
+
+@pytest.mark.parametrize("opponent", OPPONENTS)
+def test_pvs_finds_the_move_of_alphabeta(opponent):
+    _, _, score, move = search_position(opponent, 4)
+    _, _, pvs_score, pvs_move = search_position(opponent, 4, pvs=True)
+    assert pvs_move.id == move.id
+    assert pvs_score == pytest.approx(score)
+
+
+@pytest.mark.parametrize("opponent", OPPONENTS)
+@pytest.mark.parametrize("offset", [0, 0.2, -0.5])
+def test_aspiration_finds_the_move_of_alphabeta(opponent, offset):
+    player, root, score, move = search_position(opponent, 4)
+    aspiration_score, node = player.aspiration_search(root, score + offset)
+    assert root_move(node).id == move.id
+    assert float(aspiration_score) == pytest.approx(score)
@@ -0,0 +1,35 @@
+from tests.battle_fixtures import make_battle, make_root, search_position
+from concurrent.futures import ThreadPoolExecutor
+
+CORVIKNIGHT = "Corviknight, L80, M"
+
+
+def test_quiescence_resolves_the_corviknight_line():
+    # A plain search at depth 2 plays Stone Edge, one at depth 4 sets up with Swords Dance
+    _, _, _, shallow_move = search_position(CORVIKNIGHT, 2)
+    _, _, _, deep_move = search_position(CORVIKNIGHT, 4)
+    _, _, _, quiescence_move = search_position(CORVIKNIGHT, 2, quiescence_nodes=50)
+
+    assert shallow_move.id != deep_move.id
+    assert quiescence_move.id == deep_move.id
+
+
+def test_quiescence_respects_its_node_limit():
+    unlimited, _, _, _ = search_position(CORVIKNIGHT, 2, quiescence_nodes=1000)
+    limited, _, _, _ = search_position(CORVIKNIGHT, 2, quiescence_nodes=1)
+    plain, _, _, _ = search_position(CORVIKNIGHT, 2)
+    assert plain.nodes_searched == limited.nodes_searched <= unlimited.nodes_searched
+
+
+def test_concurrent_searches_keep_their_own_quiescence_budget():
+    # The pondering and the search threads of a player search at the same time, each with its own node limit
+    player, _, score, move = search_position(CORVIKNIGHT, 2, quiescence_nodes=50)
+    roots = [make_root(make_battle(opponent=CORVIKNIGHT)) for _ in range(4)]
+    for root in roots:
+        player.heuristic.prepare(root)
+    nodes = player.nodes_searched
+    with ThreadPoolExecutor(4) as executor:
+        results = list(executor.map(lambda root: player.alphabeta(root, 0, float('-inf'), float('+inf'), True), roots))
+
+    assert all(float(result[0]) == score for result in results)
+    assert player.nodes_searched == 5 * nodes
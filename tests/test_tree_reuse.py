@@ -0,0 +1,60 @@
+from players.MiniMaxPlayer import MiniMaxPlayer
+from tests.battle_fixtures import TEAM, make_battle, make_root, offline_configuration
+import pytest
+
+SNORLAX = "Snorlax, L80, M"
+
+
+def snorlax_battle(turn=1, opponent_hp="100/100", condition=None):
+    team = TEAM if condition is None else [dict(TEAM[0], condition=condition)] + TEAM[1:]
+    battle = make_battle(opponent=SNORLAX, opponent_hp=opponent_hp, team=team, turn=turn)
+    battle._parse_message(["", "move", "p2a: Snorlax", "Body Slam", "p1a: Garchomp"])
+    battle._parse_message(["", "move", "p2a: Snorlax", "Earthquake", "p1a: Garchomp"])
+    return battle
+
+
+def searched_turn(**flags):
+    # The tree of the first turn, with the position after our Earthquake and Snorlax's Body Slam
+    player = MiniMaxPlayer(player_configuration=offline_configuration(), start_listening=False, max_depth=2,
+                           reuse_tree=True, **flags)
+    battle = snorlax_battle()
+    root = make_root(battle)
+    player.heuristic.prepare(root)
+    player.alphabeta(root, 0, float('-inf'), float('+inf'), True)
+    earthquake = next(move for move in root.act_poke.moves if move.id == "earthquake")
+    body_slam = next(move for move in root.children[earthquake].children if move.id == "bodyslam")
+    state = player.battle_states.get(battle.battle_tag)
+    state.search_tree = (1, root, earthquake)
+    return player, state, root.children[earthquake].children[body_slam]
+
+
+def test_reused_tree_searches_the_observed_position():
+    player, state, predicted = searched_turn()
+    # The opponent took a bit more damage than predicted, within the tolerance of the match
+    observed = snorlax_battle(2, "{0}/100".format(round(100 * predicted.opp_poke.hp_fraction()) - 4),
+                              "{0}/265".format(predicted.act_poke.current_hp))
+    root = make_root(observed)
+    player.get_best_move(observed, root)
+
+    plain = MiniMaxPlayer(player_configuration=offline_configuration(), start_listening=False, max_depth=2)
+    fresh_root = make_root(observed)
+    plain.heuristic.prepare(fresh_root)
+    score, _ = plain.alphabeta(fresh_root, 0, float('-inf'), float('+inf'), True)
+
+    assert root.previous is predicted
+    assert state.search_tree[1] is root
+    assert state.search_tree[1].opp_poke.current_hp == fresh_root.opp_poke.current_hp != predicted.opp_poke.current_hp
+    assert state.last_score == pytest.approx(float(score))
+
+
+@pytest.mark.parametrize("aspiration", [False, True])
+def test_reused_tree_respects_the_aspiration_flag(aspiration):
+    player, _, predicted = searched_turn(aspiration=aspiration)
+    centers = []
+    search = player.aspiration_search
+    player.aspiration_search = lambda root, expected_score: centers.append(expected_score) or search(root,
+                                                                                                      expected_score)
+    observed = snorlax_battle(2, "{0}/100".format(round(100 * predicted.opp_poke.hp_fraction())),
+                              "{0}/265".format(predicted.act_poke.current_hp))
+    player.get_best_move(observed, make_root(observed))
+    assert centers == ([predicted.score] if aspiration else [])
@@ -0,0 +1,238 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from utils.workers import worker_pool
+from poke_env import ServerConfiguration, LocalhostServerConfiguration
+from typing import List, Dict, Optional, Tuple
+import argparse
+import asyncio
+import json
+import math
+import os
+import uuid
+import numpy as np
+
+"""
+Candidate weights of a TeamHeuristic under evaluation
+Parameters: candidate_id: the identifier of the candidate
+Parameters: parameters: the weights of the heuristic features
+Parameters: penalty: the depth penalty of the heuristic
+Parameters: games: the number of games played so far
+Parameters: wins: the number of games won so far
+Parameters: alive: false if the candidate was discarded by the successive halving
+"""
+class Candidate:
+
+    def __init__(self, candidate_id: int, parameters: List[float], penalty: float, games: int = 0, wins: int = 0,
+                 alive: bool = True):
+        self.candidate_id: int = candidate_id
+        self.parameters: List[float] = parameters
+        self.penalty: float = penalty
+        self.games: int = games
+        self.wins: int = wins
+        self.alive: bool = alive
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.games if self.games > 0 else 0
+
+    def to_dict(self) -> Dict:
+        return {"candidate_id": self.candidate_id, "parameters": self.parameters, "penalty": self.penalty,
+                "games": self.games, "wins": self.wins, "alive": self.alive}
+
+    @classmethod
+    def from_dict(cls, candidate: Dict):
+        return cls(**candidate)
+
+
+"""
+Play the games of a candidate against the reference opponents. The function runs in a worker process, so every
+call builds its own agents, with a unique username, and its own event loop
+Parameters: parameters: the weights of the heuristic features
+Parameters: penalty: the depth penalty of the heuristic
+Parameters: opponents: the play modes of the reference opponents
+Parameters: games: the number of games to play against each opponent
+Parameters: server_configuration: the server the agents connect to
+Parameters: max_depth: the max depth of the minimax tree
+Parameters: concurrency: max concurrent battles of the agents
+Returns: a tuple made up of the games played and the games won by the candidate
+"""
+def play_candidate(parameters: List[float],
+                   penalty: float,
+                   opponents: List[str],
+                   games: int,
+                   server_configuration: ServerConfiguration,
+                   max_depth: int = 2,
+                   concurrency: int = 10) -> Tuple[int, int]:
+    from players.agents import build_agent
+    from mm.TeamHeuristic import TeamHeuristic
+
+    async def play() -> Tuple[int, int]:
+        tag = uuid.uuid4().hex[:8]
+        candidate = build_agent("MM", concurrency, username="Tune" + tag, server_configuration=server_configuration,
+                                heuristic=TeamHeuristic(parameters, penalty), max_depth=max_depth)
+        for i, playmode in enumerate(opponents):
+            opponent = build_agent(playmode, concurrency, username="Ref{0}{1}{2}".format(playmode, i, tag),
+                                   server_configuration=server_configuration)
+            await candidate.battle_against(opponent, n_battles=games)
+
+        return candidate.n_finished_battles, candidate.n_won_battles
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(play())
+    finally:
+        loop.close()
+
+
+"""
+Random search of the TeamHeuristic parameters with successive halving. Candidates are evaluated concurrently in
+worker processes; after each rung only the best 1/eta of them keep playing, with eta times the games of the
+previous rung. The progress is saved in a checkpoint file after every evaluation, so that a search can be resumed
+Parameters: checkpoint_path: the path of the checkpoint file
+Parameters: n_candidates: the number of sampled candidates
+Parameters: opponents: the play modes of the reference opponents
+Parameters: min_games: the games against each opponent played by every candidate in the first rung
+Parameters: eta: the halving rate
+Parameters: workers: the number of worker processes
+Parameters: server_configuration: the server the agents connect to
+Parameters: max_depth: the max depth of the minimax tree
+Parameters: seed: the seed used to sample the candidates
+"""
+class HyperparameterSearch:
+
+    def __init__(self,
+                 checkpoint_path: str,
+                 n_candidates: int = 27,
+                 opponents: List[str] = None,
+                 min_games: int = 5,
+                 eta: int = 3,
+                 workers: int = 4,
+                 server_configuration: ServerConfiguration = LocalhostServerConfiguration,
+                 max_depth: int = 2,
+                 seed: int = 0):
+        self.checkpoint_path: str = checkpoint_path
+        self.opponents: List[str] = ["BPM", "DM"] if opponents is None else opponents
+        self.min_games: int = min_games
+        self.eta: int = eta
+        self.workers: int = workers
+        self.server_configuration: ServerConfiguration = server_configuration
+        self.max_depth: int = max_depth
+        self.rung: int = 0
+        self.candidates: List[Candidate] = []
+
+        if os.path.exists(checkpoint_path):
+            self.load()
+        else:
+            self.candidates = self.sample_candidates(n_candidates, seed)
+            self.save()
+
+    """
+    Sample the candidates: the weights are drawn from a uniform Dirichlet distribution, since the best ones found
+    so far sum to one, and the penalty is drawn uniformly in [0, 0.1]
+    Parameters: n_candidates: the number of candidates
+    Parameters: seed: the seed of the random generator
+    Returns: the candidates
+    """
+    @staticmethod
+    def sample_candidates(n_candidates: int, seed: int) -> List[Candidate]:
+        rng = np.random.default_rng(seed)
+        weights = rng.dirichlet(np.ones(4), size=n_candidates)
+        penalties = rng.uniform(0, 0.1, size=n_candidates)
+        return [Candidate(i, weights[i].tolist(), float(penalties[i])) for i in range(n_candidates)]
+
+    """
+    Number of games against each opponent that a candidate has played at the end of a rung
+    Parameters: rung: the rung
+    Returns: the number of games
+    """
+    def rung_games(self, rung: int) -> int:
+        return self.min_games * self.eta ** rung
+
+    def load(self) -> None:
+        with open(self.checkpoint_path, "r") as checkpoint_file:
+            checkpoint = json.load(checkpoint_file)
+
+        self.rung = checkpoint["rung"]
+        self.candidates = [Candidate.from_dict(candidate) for candidate in checkpoint["candidates"]]
+
+    """
+    Save the progress of the search. The checkpoint is written to a temporary file first and then renamed, so that
+    an interrupted search never leaves a corrupted checkpoint
+    """
+    def save(self) -> None:
+        checkpoint = {"rung": self.rung, "opponents": self.opponents, "min_games": self.min_games, "eta": self.eta,
+                      "candidates": [candidate.to_dict() for candidate in self.candidates]}
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w") as checkpoint_file:
+            json.dump(checkpoint, checkpoint_file, indent=2)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    """
+    Play the missing games of every alive candidate for the current rung
+    Parameters: executor: the pool of worker processes
+    """
+    def play_rung(self, executor: ProcessPoolExecutor) -> None:
+        target_games = self.rung_games(self.rung) * len(self.opponents)
+        futures = dict()
+        for candidate in self.candidates:
+            missing_games = (target_games - candidate.games) // len(self.opponents)
+            if candidate.alive and missing_games > 0:
+                future = executor.submit(play_candidate, candidate.parameters, candidate.penalty, self.opponents,
+                                         missing_games, self.server_configuration, self.max_depth)
+                futures[future] = candidate
+
+        for future in as_completed(futures):
+            candidate = futures[future]
+            games, wins = future.result()
+            candidate.games += games
+            candidate.wins += wins
+            print("Rung {0}, candidate {1}: {2}/{3} won".format(self.rung, candidate.candidate_id, candidate.wins,
+                                                                candidate.games))
+            self.save()
+
+    """
+    Keep only the best 1/eta of the alive candidates
+    """
+    def halve(self) -> None:
+        alive = sorted([candidate for candidate in self.candidates if candidate.alive],
+                       key=lambda candidate: candidate.win_rate, reverse=True)
+        n_survivors = max(1, math.ceil(len(alive) / self.eta))
+        for candidate in alive[n_survivors:]:
+            candidate.alive = False
+
+        self.rung += 1
+        self.save()
+
+    """
+    Run the search until a single candidate is left
+    Returns: the best candidate
+    """
+    def run(self) -> Candidate:
+        with worker_pool(self.workers) as executor:
+            while len([candidate for candidate in self.candidates if candidate.alive]) > 1:
+                self.play_rung(executor)
+                self.halve()
+
+        return self.best_candidate()
+
+    def best_candidate(self) -> Optional[Candidate]:
+        alive = [candidate for candidate in self.candidates if candidate.alive]
+        return max(alive, key=lambda candidate: candidate.win_rate) if alive else None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Search the TeamHeuristic parameters with successive halving")
+    parser.add_argument("--checkpoint", default="results/hyperparameter_search.json")
+    parser.add_argument("--candidates", type=int, default=27)
+    parser.add_argument("--opponents", nargs="+", default=["BPM", "DM"])
+    parser.add_argument("--min-games", type=int, default=5)
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-depth", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    search = HyperparameterSearch(args.checkpoint, args.candidates, args.opponents, args.min_games, args.eta,
+                                  args.workers, max_depth=args.max_depth, seed=args.seed)
+    best = search.run()
+    print("BEST_PARAMETERS = {0}\nBEST_PENALTY = {1}\nwin rate: {2} over {3} games".format(
+        best.parameters, best.penalty, best.win_rate, best.games))
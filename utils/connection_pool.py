@@ -0,0 +1,305 @@
+from poke_env import ServerConfiguration
+from poke_env.player import Player
+from typing import List, Dict, Tuple, Optional
+from tabulate import tabulate
+import argparse
+import asyncio
+import random
+
+"""
+A player logged in on a server, leased to one battle job at a time
+Parameters: playmode: the play mode of the agent
+Parameters: server_index: the index of the server the player is connected to
+Parameters: account_index: the index of the account among the ones of the same play mode on the same server
+"""
+class PooledConnection:
+
+    def __init__(self, playmode: str, server_index: int, account_index: int):
+        self.playmode: str = playmode
+        self.server_index: int = server_index
+        self.account_index: int = account_index
+        self.player: Optional[Player] = None
+        self.busy: bool = False
+        self.healthy: bool = False
+        self.reconnections: int = 0
+
+    """
+    Check whether the player is still logged in and listening on its websocket
+    Returns: true if the connection can be used, false otherwise
+    """
+    def is_alive(self) -> bool:
+        if self.player is None or not self.player.logged_in.is_set():
+            return False
+
+        listening = getattr(self.player, "_listening_coroutine", None)
+        return listening is None or not listening.done()
+
+
+"""
+Pool of accounts for each play mode on several Showdown servers. Every account is a poke-env player with its own
+websocket; a battle job leases one account per side on the same server, so that the accounts are never shared by
+two jobs and the battles of each account are bounded by its max concurrent battles
+Parameters: servers: the configurations of the servers
+Parameters: playmodes: the play modes of the agents
+Parameters: accounts_per_server: the number of accounts of each play mode on each server
+Parameters: max_battles_per_connection: the max concurrent battles of each account
+Parameters: login_timeout: the seconds to wait for an account to log in
+Parameters: health_check_interval: the seconds between two health checks
+"""
+class ConnectionPool:
+
+    def __init__(self,
+                 servers: List[ServerConfiguration],
+                 playmodes: List[str],
+                 accounts_per_server: int = 2,
+                 max_battles_per_connection: int = 10,
+                 login_timeout: float = 30,
+                 health_check_interval: float = 30):
+        self.servers: List[ServerConfiguration] = servers
+        self.playmodes: List[str] = playmodes
+        self.accounts_per_server: int = accounts_per_server
+        self.max_battles_per_connection: int = max_battles_per_connection
+        self.login_timeout: float = login_timeout
+        self.health_check_interval: float = health_check_interval
+        self.servers_up: List[bool] = [True for _ in servers]
+        self.connections: List[PooledConnection] = [PooledConnection(playmode, server_index, account_index)
+                                                    for server_index in range(len(servers))
+                                                    for playmode in playmodes
+                                                    for account_index in range(accounts_per_server)]
+        self.condition: Optional[asyncio.Condition] = None
+        self.health_check_task: Optional[asyncio.Task] = None
+
+    """
+    Log in all the accounts and start the periodic health check
+    """
+    async def start(self) -> None:
+        self.condition = asyncio.Condition()
+        await self.check_servers()
+        await asyncio.gather(*[self.connect(connection) for connection in self.connections])
+        self.health_check_task = asyncio.create_task(self.health_check_loop())
+
+    async def stop(self) -> None:
+        if self.health_check_task is not None:
+            self.health_check_task.cancel()
+
+    """
+    Create a new player for a connection and wait for it to log in. Usernames are random since a server does not
+    accept two logins with the same name, and a dropped account may still be registered for a while
+    Parameters: connection: the connection
+    """
+    async def connect(self, connection: PooledConnection) -> None:
+        from players.agents import build_agent
+
+        connection.healthy = False
+        if connection.player is not None:
+            try:
+                await asyncio.wait_for(connection.player.stop_listening(), 5)
+            except Exception:
+                pass
+            connection.player = None
+
+        if not self.servers_up[connection.server_index]:
+            return
+
+        username = "{0}{1}x{2}r{3}".format(connection.playmode, connection.server_index, connection.account_index,
+                                         random.randint(0, 100000))
+        connection.player = build_agent(connection.playmode, self.max_battles_per_connection, username=username,
+                                        server_configuration=self.servers[connection.server_index])
+        # The login event belongs to the poke-env loop, so it is polled instead of awaited
+        waited = 0
+        while not connection.player.logged_in.is_set() and waited < self.login_timeout:
+            await asyncio.sleep(0.1)
+            waited += 0.1
+        connection.healthy = connection.player.logged_in.is_set()
+
+    """
+    Check whether the servers accept TCP connections
+    """
+    async def check_servers(self) -> None:
+        for server_index, server in enumerate(self.servers):
+            host, _, port = server.server_url.rpartition(":")
+            try:
+                _, writer = await asyncio.wait_for(asyncio.open_connection(host, int(port)), 5)
+                writer.close()
+                self.servers_up[server_index] = True
+            except (OSError, asyncio.TimeoutError, ValueError):
+                self.servers_up[server_index] = False
+
+    """
+    Periodically check the servers and the idle connections, reconnecting the ones that dropped
+    """
+    async def health_check_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            await self.check_servers()
+            reconnect = [connection for connection in self.connections
+                         if not connection.busy and not (connection.healthy and connection.is_alive())]
+            for connection in reconnect:
+                connection.reconnections += 1
+            await asyncio.gather(*[self.connect(connection) for connection in reconnect])
+            async with self.condition:
+                self.condition.notify_all()
+
+    """
+    Find two idle and healthy connections of the given play modes on the same server
+    Returns: the pair of connections, None if there is no such pair
+    """
+    def __find_pair(self, playmode: str, opp_playmode: str) -> Optional[Tuple[PooledConnection, PooledConnection]]:
+        servers = list(range(len(self.servers)))
+        random.shuffle(servers)
+        for server_index in servers:
+            idle = [connection for connection in self.connections
+                    if connection.server_index == server_index and not connection.busy and connection.healthy
+                    and connection.is_alive()]
+            player = next((connection for connection in idle if connection.playmode == playmode), None)
+            opponent = next((connection for connection in idle
+                             if connection.playmode == opp_playmode and connection is not player), None)
+            if player is not None and opponent is not None:
+                return player, opponent
+
+        return None
+
+    """
+    Wait until two connections of the given play modes are available on the same server and lease them
+    Parameters: playmode: the play mode of the challenger
+    Parameters: opp_playmode: the play mode of the opponent
+    Returns: the leased connections
+    """
+    async def lease(self, playmode: str, opp_playmode: str) -> Tuple[PooledConnection, PooledConnection]:
+        async with self.condition:
+            pair = self.__find_pair(playmode, opp_playmode)
+            while pair is None:
+                await self.condition.wait()
+                pair = self.__find_pair(playmode, opp_playmode)
+
+            for connection in pair:
+                connection.busy = True
+            return pair
+
+    async def release(self, connections: Tuple[PooledConnection, ...]) -> None:
+        async with self.condition:
+            for connection in connections:
+                connection.busy = False
+            self.condition.notify_all()
+
+
+"""
+Battle job of the shared queue
+Parameters: playmode: the play mode of the challenger
+Parameters: opp_playmode: the play mode of the opponent
+Parameters: n_battles: the number of battles
+Parameters: attempts: the number of times the job was already tried
+"""
+class BattleJob:
+
+    def __init__(self, playmode: str, opp_playmode: str, n_battles: int, attempts: int = 0):
+        self.playmode: str = playmode
+        self.opp_playmode: str = opp_playmode
+        self.n_battles: int = n_battles
+        self.attempts: int = attempts
+
+
+"""
+Play many battles between the play modes of a connection pool. The battles of each matchup are split in jobs no
+bigger than the max concurrent battles of a connection; the jobs are put in a shared queue consumed by as many
+workers as the pairs of connections the pool can lease at the same time
+Parameters: pool: the connection pool
+Parameters: job_timeout: the seconds after which a job is considered stuck and its connections are dropped
+Parameters: max_attempts: how many times a failed job is put back in the queue
+"""
+class PooledRunner:
+
+    def __init__(self, pool: ConnectionPool, job_timeout: float = 900, max_attempts: int = 3):
+        self.pool: ConnectionPool = pool
+        self.job_timeout: float = job_timeout
+        self.max_attempts: int = max_attempts
+        self.queue: Optional[asyncio.Queue] = None
+        self.results: Dict[Tuple[str, str], List[int]] = dict()
+
+    """
+    Play a job on a leased pair of connections and record its result. If the battles can't be completed the
+    connections are marked as unhealthy, so that the health check reconnects them, and the missing battles are put
+    back in the queue
+    Parameters: job: the job
+    """
+    async def play(self, job: BattleJob) -> None:
+        player, opponent = await self.pool.lease(job.playmode, job.opp_playmode)
+        won_before = player.player.n_won_battles
+        finished_before = player.player.n_finished_battles
+        try:
+            await asyncio.wait_for(player.player.battle_against(opponent.player, n_battles=job.n_battles),
+                                   self.job_timeout)
+        except Exception:
+            player.healthy = False
+            opponent.healthy = False
+        finally:
+            finished = player.player.n_finished_battles - finished_before
+            won = player.player.n_won_battles - won_before
+            result = self.results.setdefault((job.playmode, job.opp_playmode), [0, 0])
+            result[0] += won
+            result[1] += finished
+            await self.pool.release((player, opponent))
+
+        if finished < job.n_battles and job.attempts + 1 < self.max_attempts:
+            self.queue.put_nowait(BattleJob(job.playmode, job.opp_playmode, job.n_battles - finished,
+                                            job.attempts + 1))
+
+    async def worker(self) -> None:
+        while True:
+            job = await self.queue.get()
+            try:
+                await self.play(job)
+            finally:
+                self.queue.task_done()
+
+    """
+    Play the battles of every matchup
+    Parameters: matchups: the number of battles for each pair of play modes
+    Returns: the games won by the first play mode and the games played, for each matchup
+    """
+    async def run(self, matchups: Dict[Tuple[str, str], int]) -> Dict[Tuple[str, str], List[int]]:
+        self.queue = asyncio.Queue()
+        self.results = {matchup: [0, 0] for matchup in matchups}
+        for (playmode, opp_playmode), n_battles in matchups.items():
+            while n_battles > 0:
+                job_battles = min(n_battles, self.pool.max_battles_per_connection)
+                self.queue.put_nowait(BattleJob(playmode, opp_playmode, job_battles))
+                n_battles -= job_battles
+
+        # Each job leases two connections, the workers in excess just wait for a pair to be released
+        workers = [asyncio.create_task(self.worker()) for _ in range(len(self.pool.connections))]
+        await self.queue.join()
+        for worker in workers:
+            worker.cancel()
+
+        return self.results
+
+
+async def main(server_urls: List[str], playmodes: List[str], accounts: int, concurrency: int, battles: int) -> None:
+    servers = [ServerConfiguration(server_url, "https://play.pokemonshowdown.com/action.php?")
+               for server_url in server_urls]
+    pool = ConnectionPool(servers, playmodes, accounts, concurrency)
+    await pool.start()
+
+    matchups = {(playmodes[i], playmodes[j]): battles
+                for i in range(len(playmodes)) for j in range(i + 1, len(playmodes))}
+    results = await PooledRunner(pool).run(matchups)
+    await pool.stop()
+
+    table = [["agent", "opponent", "won", "played", "win rate"]]
+    for (playmode, opp_playmode), (won, played) in results.items():
+        table.append([playmode, opp_playmode, won, played, round(won / played, 3) if played > 0 else None])
+    print(tabulate(table))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Play battles with pooled accounts on several local servers")
+    parser.add_argument("--servers", nargs="+", default=["localhost:8000"])
+    parser.add_argument("--playmodes", nargs="+", default=["BPM", "DM", "MM"])
+    parser.add_argument("--accounts", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--battles", type=int, default=100)
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(main(args.servers, args.playmodes, args.accounts, args.concurrency, args.battles))
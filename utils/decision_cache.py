@@ -0,0 +1,167 @@
+from poke_env.environment import AbstractBattle, Pokemon
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+import atexit
+import hashlib
+import json
+import os
+import threading
+
+# Packages whose code decides the moves of the agents: a change to any of their files invalidates the cached decisions
+DECISION_PACKAGES = ["core", "mm", "players", "strategy"]
+
+# Caches shared by the whole process, by path
+__CACHES: Dict[Optional[str], "DecisionCache"] = dict()
+
+"""
+Compute the version of the code of the agents, a digest of the source files of the packages that decide the moves
+Returns: the version
+"""
+@lru_cache(maxsize=None)
+def code_version() -> str:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    digest = hashlib.sha1()
+    for package in DECISION_PACKAGES:
+        for directory, _, files in sorted(os.walk(os.path.join(root, package))):
+            for file in sorted(files):
+                if file.endswith(".py"):
+                    digest.update(file.encode())
+                    with open(os.path.join(directory, file), "rb") as source:
+                        digest.update(source.read())
+
+    return digest.hexdigest()[:12]
+
+"""
+Compute the hash of the configuration of an agent, which also includes the version of the code of the agents
+Parameters: config: the values that change the decisions of the agent
+Returns: the hash
+"""
+def config_hash(*config) -> str:
+    return hashlib.sha1(repr(config + (code_version(),)).encode()).hexdigest()[:12]
+
+"""
+Compute the canonical fingerprint of a position that is likely to repeat across battles: both active Pokémon at full
+health points, with no boosts, status or volatile effects, and no weather, terrain or side condition. The
+fingerprint contains everything the agents look at, so that two positions with the same fingerprint get the same
+decision
+Parameters: battle: current state of the battle
+Returns: the fingerprint, None if the position is not a canonical one
+"""
+def position_fingerprint(battle: AbstractBattle) -> Optional[str]:
+    bot_pokemon: Pokemon = battle.active_pokemon
+    opp_pokemon: Pokemon = battle.opponent_active_pokemon
+    if bot_pokemon is None or opp_pokemon is None or battle.weather or battle.fields or battle.side_conditions \
+            or battle.opponent_side_conditions:
+        return None
+    for pokemon in [bot_pokemon, opp_pokemon]:
+        if pokemon.current_hp_fraction != 1 or pokemon.status is not None or pokemon.effects \
+                or pokemon.is_dynamaxed or any(pokemon.boosts.values()):
+            return None
+
+    def pokemon_key(pokemon: Pokemon) -> Tuple:
+        return (pokemon.species, pokemon.level, pokemon.ability, pokemon.item, round(pokemon.current_hp_fraction, 2),
+                None if pokemon.status is None else pokemon.status.name, pokemon.fainted)
+
+    position = (pokemon_key(bot_pokemon), tuple(sorted(bot_pokemon.stats.items())),
+                tuple(move.id for move in battle.available_moves), battle.can_dynamax,
+                tuple(sorted(pokemon_key(pokemon) for pokemon in battle.team.values() if not pokemon.active)),
+                pokemon_key(opp_pokemon), tuple(sorted(opp_pokemon.moves.keys())),
+                tuple(sorted(pokemon_key(pokemon) for pokemon in battle.opponent_team.values() if not pokemon.active)))
+    return hashlib.sha1(repr(position).encode()).hexdigest()
+
+
+"""
+Bounded cache of the decisions taken in canonical positions, shared by the players of a process and kept on disk
+between runs. A decision is the id of the chosen move and whether it is a max move; it is stored under the hash of
+the configuration of the agent, so that a different agent, or a new version of the code, never gets it
+Parameters: path: the file the cache is loaded from and saved to, None to keep it in memory only
+Parameters: max_entries: the max number of decisions kept, the least recently used ones are evicted
+"""
+class DecisionCache:
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 100000):
+        self.path: Optional[str] = path
+        self.max_entries: int = max_entries
+        self.entries: OrderedDict[str, Tuple[str, bool]] = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.lock: threading.Lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    """
+    Retrieve the decision taken in a position
+    Parameters: config: the hash of the configuration of the agent
+    Parameters: fingerprint: the fingerprint of the position
+    Returns: a tuple made up of the id of the move and whether it is a max move, None if the position is not cached
+    """
+    def get(self, config: str, fingerprint: str) -> Optional[Tuple[str, bool]]:
+        key = config + ":" + fingerprint
+        with self.lock:
+            decision = self.entries.get(key)
+            if decision is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entries.move_to_end(key)
+
+        return decision
+
+    def put(self, config: str, fingerprint: str, move_id: str, max_move: bool = False) -> None:
+        with self.lock:
+            self.entries[config + ":" + fingerprint] = (move_id, max_move)
+            self.entries.move_to_end(config + ":" + fingerprint)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0
+
+    def load(self) -> None:
+        with open(self.path, "r") as file:
+            entries = json.load(file)
+        with self.lock:
+            for key, move_id, max_move in entries[-self.max_entries:]:
+                self.entries[key] = (move_id, max_move)
+
+    """
+    Save the cache on its file, from the least to the most recently used decision. The file is replaced only when
+    it is completely written
+    """
+    def save(self) -> None:
+        if self.path is None:
+            return
+
+        with self.lock:
+            entries = [[key, move_id, max_move] for key, (move_id, max_move) in self.entries.items()]
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with open(self.path + ".tmp", "w") as file:
+            json.dump(entries, file)
+        os.replace(self.path + ".tmp", self.path)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __repr__(self) -> str:
+        return "DecisionCache({0} entries, {1} hits, {2} misses)".format(len(self.entries), self.hits, self.misses)
+
+
+"""
+Retrieve the decision cache of the process for a file, creating it the first time. A cache with a file is saved when
+the process exits
+Parameters: path: the file of the cache, None for a cache kept in memory only
+Returns: the decision cache
+"""
+def get_decision_cache(path: Optional[str] = None) -> DecisionCache:
+    cache = __CACHES.get(path)
+    if cache is None:
+        cache = DecisionCache(path)
+        __CACHES[path] = cache
+        if path is not None:
+            atexit.register(cache.save)
+
+    return cache
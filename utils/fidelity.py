@@ -0,0 +1,220 @@
+from concurrent.futures import as_completed
+from utils.workers import worker_pool
+from utils.oracle import OracleProcess, damage_query, oracle_available
+from poke_env.environment import Pokemon, MoveCategory, Weather, Field, SideCondition
+from poke_env.data import GEN8_POKEDEX, to_id_str
+from collections import Counter
+from typing import Dict, Iterator, List, Tuple
+import argparse
+import json
+import random
+
+# Values the random cases are drawn from, besides the species and the moves of the random battle sets
+ITEMS = ["", "lifeorb", "choiceband", "choicespecs", "expertbelt", "leftovers", "heavydutyboots", "silkscarf",
+         "sharpbeak", "charcoal", "mysticwater", "magnet", "miracleseed", "assaultvest", "eviolite"]
+WEATHERS = [None, Weather.SUNNYDAY, Weather.RAINDANCE, Weather.SANDSTORM, Weather.HAIL]
+TERRAINS = [None, Field.ELECTRIC_TERRAIN, Field.GRASSY_TERRAIN, Field.MISTY_TERRAIN, Field.PSYCHIC_TERRAIN]
+CONDITIONS = [SideCondition.REFLECT, SideCondition.LIGHT_SCREEN, SideCondition.AURORA_VEIL]
+BOOSTED_STATS = ["atk", "def", "spa", "spd", "spe"]
+
+# Attributes of a case along which the mismatches are clustered
+CLUSTER_ATTRIBUTES = ["move", "move_category", "attacker_item", "attacker_ability", "defender_item",
+                      "defender_ability", "weather", "terrain", "conditions", "boosted"]
+
+"""
+Build a Pokémon of the random battles with its stats estimated, so that the damage computation can use it as the
+bot's one
+Parameters: species: the species of the Pokémon
+Parameters: level: the level of the Pokémon
+Parameters: item: the item of the Pokémon
+Parameters: ability: the ability of the Pokémon
+Returns: the Pokémon
+"""
+def case_pokemon(species: str, level: int, item: str, ability: str) -> Pokemon:
+    from core.stats import estimate_stat
+
+    details = "{0}, L{1}".format(GEN8_POKEDEX[species]["name"], level)
+    pokemon = Pokemon(details=details)
+    hp = estimate_stat(pokemon, "hp")
+    stats = {stat: estimate_stat(pokemon, stat) for stat in BOOSTED_STATS}
+    return Pokemon(request_pokemon={"ident": "p1: " + GEN8_POKEDEX[species]["name"], "details": details,
+                                    "condition": "{0}/{0}".format(hp), "active": False, "stats": stats, "moves": [],
+                                    "baseAbility": ability, "ability": ability, "item": item})
+
+"""
+Generate random damage cases from the sets of the random battles: two species, a damaging move of the attacker,
+items, abilities, field and boosts
+Parameters: n_cases: the number of cases
+Parameters: seed: the seed of the random generator
+Returns: an iterator over the cases, each one made up of the arguments of compute_damage and of its attributes
+"""
+def generate_cases(n_cases: int, seed: int = 0) -> Iterator[Tuple[Tuple, Dict]]:
+    from core.move_registry import get_move
+    from core.species_tables import RANDOM_BATTLE_DATA
+
+    rng = random.Random(seed)
+    with open(RANDOM_BATTLE_DATA, "r") as file:
+        sets = json.load(file)
+    moves: Dict[str, List] = dict()
+    for name, entry in sets.items():
+        if "level" in entry and name in GEN8_POKEDEX:
+            damaging = [get_move(move_id) for move_id in entry.get("moves", [])]
+            damaging = [move for move in damaging if move.category is not MoveCategory.STATUS and move.base_power > 0
+                        and move.expected_hits == 1]
+            if damaging:
+                moves[name] = damaging
+    species = sorted(moves.keys())
+
+    for _ in range(n_cases):
+        attacker_species, defender_species = rng.choice(species), rng.choice(species)
+        move = rng.choice(moves[attacker_species])
+        pokemon = []
+        for name in [attacker_species, defender_species]:
+            ability = to_id_str(rng.choice(list(GEN8_POKEDEX[name]["abilities"].values())))
+            pokemon.append(case_pokemon(name, sets[name]["level"], rng.choice(ITEMS), ability))
+        weather, terrain = rng.choice(WEATHERS), rng.choice(TERRAINS)
+        conditions = [condition for condition in CONDITIONS if rng.random() < 0.1]
+        boosts = []
+        for _ in pokemon:
+            boost = {stat: 0 for stat in BOOSTED_STATS + ["accuracy", "evasion"]}
+            if rng.random() < 0.3:
+                boost[rng.choice(BOOSTED_STATS)] = rng.randint(-2, 2)
+            boosts.append(boost)
+
+        arguments = (move, pokemon[0], pokemon[1], weather, [] if terrain is None else [terrain], conditions,
+                     boosts[0], boosts[1])
+        attributes = {"move": move.id, "move_category": move.category.name, "attacker_item": pokemon[0].item,
+                      "attacker_ability": pokemon[0].ability, "defender_item": pokemon[1].item,
+                      "defender_ability": pokemon[1].ability, "weather": None if weather is None else weather.name,
+                      "terrain": None if terrain is None else terrain.name,
+                      "conditions": ",".join(sorted(condition.name for condition in conditions)),
+                      "boosted": any(boosts[0].values()) or any(boosts[1].values()),
+                      "attacker": attacker_species, "defender": defender_species}
+        yield arguments, attributes
+
+"""
+Compare the damage computation with the oracle on a shard of random cases. The function runs in a worker process
+with its own oracle, and the cases are sent to it in batches
+Parameters: n_cases: the number of cases
+Parameters: seed: the seed of the cases
+Parameters: batch_size: the number of cases of a batch
+Parameters: tolerance: the relative difference under which two damage values match
+Parameters: max_examples: the max number of mismatching cases kept for each cluster
+Returns: the counters of the shard
+"""
+def compare_shard(n_cases: int, seed: int, batch_size: int = 1000, tolerance: float = 0.05,
+                  max_examples: int = 3) -> Dict:
+    from core.damage import compute_damage
+
+    stats = {"cases": 0, "errors": 0, "exact": 0, "matches": 0, "totals": Counter(), "mismatches": Counter(),
+             "examples": dict()}
+
+    def compare(batch: List[Tuple[Tuple, Dict]]) -> None:
+        results = oracle.query([damage_query(*arguments) for arguments, _ in batch])
+        for (arguments, attributes), result in zip(batch, results):
+            if "error" in result:
+                stats["errors"] += 1
+                continue
+
+            damage = compute_damage(*arguments, is_bot=True)
+            stats["cases"] += 1
+            exact = damage["lb"] == result["min"] and damage["ub"] == result["max"]
+            match = abs(damage["ub"] - result["max"]) <= tolerance * max(result["max"], 1)
+            stats["exact"] += int(exact)
+            stats["matches"] += int(match)
+            for attribute in CLUSTER_ATTRIBUTES:
+                key = "{0}={1}".format(attribute, attributes[attribute])
+                stats["totals"][key] += 1
+                if not match:
+                    stats["mismatches"][key] += 1
+                    examples = stats["examples"].setdefault(key, [])
+                    if len(examples) < max_examples:
+                        examples.append(dict(attributes, ours=[damage["lb"], damage["ub"]],
+                                             oracle=[result["min"], result["max"]]))
+
+    with OracleProcess() as oracle:
+        batch = []
+        for case in generate_cases(n_cases, seed):
+            batch.append(case)
+            if len(batch) == batch_size:
+                compare(batch)
+                batch = []
+        compare(batch)
+
+    return stats
+
+"""
+Rank the clusters of mismatches: the values of the attributes of the cases whose mismatch rate is higher than the
+overall one, by number of mismatches
+Parameters: stats: the counters of the comparison
+Parameters: min_cases: the min number of cases of a cluster
+Returns: the clusters, each one with its cases, its mismatches, its rate and some examples
+"""
+def mismatch_clusters(stats: Dict, min_cases: int = 20) -> List[Dict]:
+    overall = 1 - stats["matches"] / max(stats["cases"], 1)
+    clusters = []
+    for key, mismatches in stats["mismatches"].items():
+        cases = stats["totals"][key]
+        rate = mismatches / cases
+        if cases >= min_cases and rate > overall:
+            clusters.append({"cluster": key, "cases": cases, "mismatches": mismatches, "rate": rate,
+                             "examples": stats["examples"].get(key, [])})
+
+    clusters.sort(key=lambda cluster: (cluster["mismatches"] * (cluster["rate"] - overall)), reverse=True)
+    return clusters
+
+"""
+Compare the damage computation with the Showdown simulator on random cases, in parallel shards
+Parameters: n_cases: the number of cases
+Parameters: workers: the number of worker processes, each one with its own oracle
+Parameters: shard_size: the number of cases of a shard
+Parameters: batch_size: the number of cases of a batch sent to an oracle
+Parameters: tolerance: the relative difference under which two damage values match
+Parameters: seed: the seed of the first shard
+Returns: the report of the comparison
+"""
+def run_fidelity(n_cases: int, workers: int = 4, shard_size: int = 10000, batch_size: int = 1000,
+                 tolerance: float = 0.05, seed: int = 0) -> Dict:
+    if not oracle_available():
+        raise RuntimeError("The oracle needs Node.js and the simulator built with `node build` in pokemon-showdown")
+
+    total = {"cases": 0, "errors": 0, "exact": 0, "matches": 0, "totals": Counter(), "mismatches": Counter(),
+             "examples": dict()}
+    with worker_pool(workers) as executor:
+        futures = [executor.submit(compare_shard, min(shard_size, n_cases - start), seed + i, batch_size, tolerance)
+                   for i, start in enumerate(range(0, n_cases, shard_size))]
+        for future in as_completed(futures):
+            stats = future.result()
+            for key in ["cases", "errors", "exact", "matches"]:
+                total[key] += stats[key]
+            total["totals"].update(stats["totals"])
+            total["mismatches"].update(stats["mismatches"])
+            for key, examples in stats["examples"].items():
+                total["examples"].setdefault(key, []).extend(examples[:3 - len(total["examples"].get(key, []))])
+            print("{0} cases, {1:.2%} matching".format(total["cases"], total["matches"] / max(total["cases"], 1)))
+
+    return {"cases": total["cases"], "errors": total["errors"], "exact": total["exact"], "matches": total["matches"],
+            "tolerance": tolerance, "clusters": mismatch_clusters(total)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare the damage computation with the Showdown simulator")
+    parser.add_argument("--cases", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--shard-size", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--tolerance", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--report", default="results/fidelity.json")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    report = run_fidelity(args.cases, args.workers, args.shard_size, args.batch_size, args.tolerance, args.seed)
+    print("{0} cases, {1} exact, {2} within {3:.0%}, {4} errors".format(report["cases"], report["exact"],
+                                                                         report["matches"], report["tolerance"],
+                                                                         report["errors"]))
+    for cluster in report["clusters"][:args.top]:
+        print("{0:50} {1:6d}/{2:6d} {3:.1%}".format(cluster["cluster"], cluster["mismatches"], cluster["cases"],
+                                                      cluster["rate"]))
+    with open(args.report, "w") as file:
+        json.dump(report, file, indent=2)
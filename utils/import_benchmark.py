@@ -0,0 +1,82 @@
+from concurrent.futures import ProcessPoolExecutor
+from statistics import median
+from typing import List, Tuple
+from time import perf_counter
+import multiprocessing
+import subprocess
+import argparse
+import sys
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+"""
+Measure the time needed to import a module in a new interpreter, by using the "-X importtime" option of Python
+Parameters: module: the module to import
+Parameters: repeat: the number of measurements
+Returns: a tuple made up of the median wall time in seconds and the slowest imports of the last run, as pairs of
+cumulative time in microseconds and module name
+"""
+def import_time(module: str, repeat: int = 5) -> Tuple[float, List[Tuple[int, str]]]:
+    times = []
+    imports = []
+    for _ in range(repeat):
+        start = perf_counter()
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + module], cwd=ROOT,
+                                capture_output=True, text=True, check=True)
+        times.append(perf_counter() - start)
+
+        imports = []
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            _, cumulative, name = line[len("import time:"):].split("|")
+            imports.append((int(cumulative), name.strip()))
+
+    imports.sort(reverse=True)
+    return median(times), imports
+
+"""
+Task run by the workers: import the players and build a root move, as a worker does before its first battle
+Parameters: task_id: the index of the task
+Returns: the id of the worker process
+"""
+def worker_task(task_id: int) -> int:
+    import players.MiniMaxPlayer
+    from core.move_registry import get_move
+    get_move("splash")
+    return os.getpid()
+
+"""
+Measure the time needed to start a pool of worker processes and to run their first task
+Parameters: context: the multiprocessing context used to start the workers
+Parameters: workers: the number of workers
+Returns: the wall time in seconds
+"""
+def worker_start_time(context, workers: int) -> float:
+    start = perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        list(executor.map(worker_task, range(workers)))
+    return perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the import time and the worker start time")
+    parser.add_argument("--module", default="players.MiniMaxPlayer")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    wall_time, slowest = import_time(args.module, args.repeat)
+    print("import {0}: {1:.3f}s (median of {2})".format(args.module, wall_time, args.repeat))
+    for cumulative, name in slowest[:args.top]:
+        print("{0:10.1f} ms  {1}".format(cumulative / 1000, name))
+
+    from utils.workers import worker_context
+    print("spawn, {0} workers: {1:.3f}s".format(
+        args.workers, worker_start_time(multiprocessing.get_context("spawn"), args.workers)))
+    if "fork" in multiprocessing.get_all_start_methods():
+        import players.MiniMaxPlayer
+        print("fork with preloaded registry, {0} workers: {1:.3f}s".format(
+            args.workers, worker_start_time(worker_context(preload=True), args.workers)))
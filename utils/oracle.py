@@ -0,0 +1,388 @@
+from poke_env.environment import Pokemon, Move, Weather, Field, SideCondition
+from poke_env.data import GEN8_POKEDEX
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import atexit
+import json
+import os
+import shutil
+import struct
+import subprocess
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Node worker that answers the queries with the vendored Showdown simulator, and the build of the simulator it loads
+ORACLE_WORKER = os.path.join(ROOT, "oracle", "worker.js")
+SHOWDOWN_SIM = os.path.join(ROOT, "pokemon-showdown", "dist", "sim")
+
+# Names of the weathers, terrains and side conditions in the simulator
+WEATHER_IDS = {Weather.SUNNYDAY: "sunnyday", Weather.DESOLATELAND: "desolateland", Weather.RAINDANCE: "raindance",
+               Weather.PRIMORDIALSEA: "primordialsea", Weather.SANDSTORM: "sandstorm", Weather.HAIL: "hail",
+               Weather.DELTASTREAM: "deltastream"}
+TERRAIN_IDS = {Field.ELECTRIC_TERRAIN: "electricterrain", Field.GRASSY_TERRAIN: "grassyterrain",
+               Field.MISTY_TERRAIN: "mistyterrain", Field.PSYCHIC_TERRAIN: "psychicterrain"}
+CONDITION_IDS = {SideCondition.REFLECT: "reflect", SideCondition.LIGHT_SCREEN: "lightscreen",
+                 SideCondition.AURORA_VEIL: "auroraveil"}
+
+# Damage oracle shared by the whole process
+__ORACLE: Optional["DamageOracle"] = None
+
+"""
+Check whether the oracle can run: Node.js must be installed and the simulator built
+Returns: true if the oracle can be started, false otherwise
+"""
+def oracle_available() -> bool:
+    return shutil.which("node") is not None and os.path.isdir(SHOWDOWN_SIM)
+
+"""
+Describe a Pokémon for the oracle, as a set of the random battles: 84 EVs and 31 IVs in every stat and a neutral
+nature, the same assumptions of the stat estimation
+Parameters: pokemon: the Pokémon
+Parameters: boosts: the stat boosts of the Pokémon
+Returns: the description of the Pokémon
+"""
+def pokemon_spec(pokemon: Pokemon, boosts: Optional[Dict[str, int]] = None) -> Dict:
+    spec = {"species": GEN8_POKEDEX[pokemon.species]["name"] if pokemon.species in GEN8_POKEDEX else pokemon.species,
+            "level": pokemon.level, "item": pokemon.item or "", "ability": pokemon.ability or ""}
+    if boosts:
+        spec["boosts"] = {stat: value for stat, value in boosts.items() if value != 0}
+    if pokemon.status is not None:
+        spec["status"] = pokemon.status.name.lower()
+    return spec
+
+"""
+Build the damage query of a move, with the same parameters of compute_damage
+Returns: the query
+"""
+def damage_query(move: Move,
+                 attacker: Pokemon,
+                 defender: Pokemon,
+                 weather: Weather = None,
+                 terrains: List[Field] = None,
+                 defender_conditions: List[SideCondition] = None,
+                 attacker_boosts: Dict[str, int] = None,
+                 defender_boosts: Dict[str, int] = None) -> Dict:
+    terrain = next((TERRAIN_IDS[terrain] for terrain in terrains or [] if terrain in TERRAIN_IDS), None)
+    return {"type": "damage", "move": move.id, "attacker": pokemon_spec(attacker, attacker_boosts),
+            "defender": pokemon_spec(defender, defender_boosts), "weather": WEATHER_IDS.get(weather),
+            "terrain": terrain, "defender_conditions": [CONDITION_IDS[condition]
+                                                        for condition in defender_conditions or []
+                                                        if condition in CONDITION_IDS]}
+
+
+"""
+Compute the key of a query in the answer cache, its canonical JSON encoding
+Parameters: query: the query
+Returns: the key
+"""
+def query_key(query: Dict) -> str:
+    return json.dumps(query, sort_keys=True, separators=(",", ":"))
+
+
+"""
+Long-lived Node process that evaluates batches of damage and speed queries with the vendored Showdown simulator.
+A batch is a single message on the pipe, prefixed by its length, so its cost is one round trip whatever its size.
+The requests are pipelined: a batch is written as soon as it is submitted, without waiting for the answers of the
+previous ones, and a reader thread hands every answer to the future of its request. The process is started on the
+first batch
+"""
+class OracleProcess:
+
+    def __init__(self, worker: str = ORACLE_WORKER):
+        self.worker: str = worker
+        self.process: Optional[subprocess.Popen] = None
+        self.reader: Optional[threading.Thread] = None
+        self.lock: threading.Lock = threading.Lock()
+        self.pending: Dict[int, Future] = dict()
+        self.next_id: int = 0
+
+    def start(self) -> None:
+        with self.lock:
+            if self.process is None or self.process.poll() is not None:
+                self.process = subprocess.Popen(["node", self.worker], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                                cwd=ROOT)
+                # The requests of a process are failed by its own reader if it exits, so each one has its own
+                self.pending = dict()
+                self.reader = threading.Thread(target=self.read_responses, args=(self.process, self.pending),
+                                               daemon=True, name="oracle-reader")
+                self.reader.start()
+
+    """
+    Read the answers of a process until it exits, completing the futures of their requests. When the process exits
+    the requests still pending fail
+    Parameters: process: the process
+    Parameters: pending: the futures of the requests sent to the process, by id
+    """
+    def read_responses(self, process: subprocess.Popen, pending: Dict[int, Future]) -> None:
+        while True:
+            header = process.stdout.read(4)
+            if len(header) < 4:
+                break
+            response = json.loads(process.stdout.read(struct.unpack(">I", header)[0]))
+            with self.lock:
+                future = pending.pop(response.get("id"), None)
+            if future is None:
+                continue
+            if "results" in response:
+                future.set_result(response["results"])
+            else:
+                future.set_exception(RuntimeError("The oracle failed: {0}".format(response.get("error"))))
+
+        with self.lock:
+            failed = list(pending.values())
+            pending.clear()
+        for future in failed:
+            future.set_exception(RuntimeError("The oracle process exited"))
+
+    """
+    Send a batch of queries without waiting for its answer
+    Parameters: queries: the queries
+    Returns: the future of the results, in the same order, with an "error" field for the queries that failed
+    """
+    def submit(self, queries: List[Dict]) -> Future:
+        future = Future()
+        if len(queries) == 0:
+            future.set_result([])
+            return future
+
+        self.start()
+        with self.lock:
+            self.next_id += 1
+            request_id = self.next_id
+            self.pending[request_id] = future
+            body = json.dumps({"id": request_id, "queries": queries}).encode()
+            try:
+                self.process.stdin.write(struct.pack(">I", len(body)) + body)
+                self.process.stdin.flush()
+            except (BrokenPipeError, ValueError):
+                self.pending.pop(request_id)
+                future.set_exception(RuntimeError("The oracle process exited"))
+
+        return future
+
+    """
+    Evaluate a batch of queries
+    Parameters: queries: the queries
+    Returns: the results, in the same order, with an "error" field for the queries that failed
+    """
+    def query(self, queries: List[Dict]) -> List[Dict]:
+        return self.submit(queries).result()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self.pending)
+
+    def close(self) -> None:
+        if self.process is not None:
+            self.process.stdin.close()
+            self.process.wait()
+            self.reader.join()
+            self.process, self.reader = None, None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+"""
+Pool of oracle processes shared by the concurrent battles of the agents. Every batch goes to the process with the
+fewest batches in flight, so that a slow batch doesn't hold the ones of the other battles
+Parameters: size: the number of processes
+Parameters: worker: the Node worker of the processes
+"""
+class OraclePool:
+
+    def __init__(self, size: int = 2, worker: str = ORACLE_WORKER):
+        self.processes: List[OracleProcess] = [OracleProcess(worker) for _ in range(max(1, size))]
+
+    def submit(self, queries: List[Dict]) -> Future:
+        return min(self.processes, key=lambda process: process.in_flight).submit(queries)
+
+    def query(self, queries: List[Dict]) -> List[Dict]:
+        return self.submit(queries).result()
+
+    def close(self) -> None:
+        for process in self.processes:
+            process.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+"""
+Bounded cache of the answers of the oracle, by query. The answers of the simulator never change, so the cache is
+only bounded in size, the least recently used answers are evicted
+Parameters: max_entries: the max number of answers kept
+"""
+class OracleCache:
+
+    def __init__(self, max_entries: int = 200000):
+        self.max_entries: int = max_entries
+        self.entries: OrderedDict[str, Dict] = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.lock: threading.Lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self.lock:
+            result = self.entries.get(key)
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entries.move_to_end(key)
+
+        return result
+
+    def put(self, key: str, result: Dict) -> None:
+        with self.lock:
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __repr__(self) -> str:
+        return "OracleCache({0} entries, {1} hits, {2} misses)".format(len(self.entries), self.hits, self.misses)
+
+
+"""
+Exact-mechanics mode of the damage computation: the damage of the moves is asked to the pool of oracle processes,
+a batch of moves at a time, and the answers are cached. The queries answered by the cache are not sent, and the
+others go in a single batch, so that an exact damage costs at most one round trip per batch of moves. The battles
+await their batches on the event loop, so the batches of concurrent battles are in flight at the same time on the
+processes of the pool. When the oracle fails or doesn't answer in time, the damage falls back to compute_damage and
+the oracle is not used again
+Parameters: pool: the pool of oracle processes
+Parameters: cache: the cache of the answers
+Parameters: timeout: the max seconds to wait for the answers of a batch
+"""
+class DamageOracle:
+
+    def __init__(self, pool: OraclePool, cache: Optional[OracleCache] = None, timeout: float = 2.0):
+        self.pool: OraclePool = pool
+        self.cache: OracleCache = OracleCache() if cache is None else cache
+        self.timeout: float = timeout
+        self.failed: bool = False
+
+    """
+    Send a batch of queries, answering from the cache the ones it holds
+    Parameters: queries: the queries
+    Returns: the future of the results, in the same order, with an "error" field for the queries that failed
+    """
+    def submit(self, queries: List[Dict]) -> Future:
+        keys = [query_key(query) for query in queries]
+        results = [self.cache.get(key) for key in keys]
+        missing: Dict[str, int] = dict()
+        for i, (key, result) in enumerate(zip(keys, results)):
+            if result is None and key not in missing:
+                missing[key] = i
+
+        future = Future()
+        if not missing:
+            future.set_result(results)
+            return future
+
+        # The answers are cached even when the battle stopped waiting for them
+        def complete(sent: Future) -> None:
+            if sent.exception() is not None:
+                if not future.cancelled():
+                    future.set_exception(sent.exception())
+                return
+            answered = dict(zip(missing.keys(), sent.result()))
+            for key, result in answered.items():
+                if "error" not in result:
+                    self.cache.put(key, result)
+            if not future.cancelled():
+                future.set_result([answered[key] if result is None else result
+                                   for key, result in zip(keys, results)])
+
+        self.pool.submit([queries[i] for i in missing.values()]).add_done_callback(complete)
+        return future
+
+    def query(self, queries: List[Dict]) -> List[Dict]:
+        return self.submit(queries).result(self.timeout)
+
+    """
+    Compute the lowest and the highest damage of a batch of moves, waiting for the oracle
+    Parameters: cases: the arguments of compute_damage for each move, without is_bot
+    Parameters: is_bot: whether the bot is the attacking Pokémon
+    Returns: the damage of each move, in the same format of compute_damage
+    """
+    def damage(self, cases: List[Tuple], is_bot: bool = True) -> List[Dict[str, int]]:
+        results = None
+        if not self.failed:
+            try:
+                results = self.query([damage_query(*case) for case in cases])
+            except (RuntimeError, OSError, TimeoutError):
+                self.failed = True
+
+        return self.to_damage(cases, results, is_bot)
+
+    """
+    Compute the lowest and the highest damage of a batch of moves, awaiting the oracle without blocking the event loop
+    Parameters: cases: the arguments of compute_damage for each move, without is_bot
+    Parameters: is_bot: whether the bot is the attacking Pokémon
+    Returns: the damage of each move, in the same format of compute_damage
+    """
+    async def damage_async(self, cases: List[Tuple], is_bot: bool = True) -> List[Dict[str, int]]:
+        results = None
+        if not self.failed:
+            try:
+                future = self.submit([damage_query(*case) for case in cases])
+                results = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+            except (RuntimeError, OSError, TimeoutError):
+                self.failed = True
+
+        return self.to_damage(cases, results, is_bot)
+
+    """
+    Convert the answers of the oracle to the damage of the moves, computing with compute_damage the ones it couldn't
+    answer. The simulator answers with the damage of a single hit, while compute_damage multiplies it by the expected
+    hits of the move, so the answers are multiplied as well
+    Parameters: cases: the arguments of compute_damage for each move, without is_bot
+    Parameters: results: the answers of the oracle, None if it didn't answer
+    Parameters: is_bot: whether the bot is the attacking Pokémon
+    Returns: the damage of each move, in the same format of compute_damage
+    """
+    @staticmethod
+    def to_damage(cases: List[Tuple], results: Optional[List[Dict]], is_bot: bool) -> List[Dict[str, int]]:
+        from core.damage import compute_damage
+
+        results = [{"error": "no answer"}] * len(cases) if results is None else results
+        return [{"lb": result["min"] * int(case[0].expected_hits), "ub": result["max"] * int(case[0].expected_hits)}
+                if "error" not in result else compute_damage(*case, is_bot=is_bot)
+                for case, result in zip(cases, results)]
+
+    def close(self) -> None:
+        self.pool.close()
+
+    def __repr__(self) -> str:
+        return "DamageOracle({0} processes, {1})".format(len(self.pool.processes), self.cache)
+
+
+"""
+Retrieve the damage oracle of the process, creating it the first time. Its processes are closed when the process
+exits
+Parameters: processes: the number of oracle processes of the pool
+Returns: the damage oracle, None if the oracle can't run
+"""
+def get_damage_oracle(processes: int = 2) -> Optional[DamageOracle]:
+    global __ORACLE
+
+    if __ORACLE is None and oracle_available():
+        __ORACLE = DamageOracle(OraclePool(processes))
+        atexit.register(__ORACLE.close)
+
+    return __ORACLE
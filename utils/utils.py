@@ -1,17 +1,33 @@
 from poke_env.player import Player, cross_evaluate
 from poke_env.environment import Pokemon, PokemonType
-from typing import Union, List, Tuple, Dict
+from typing import Union, List, Tuple, Dict, Optional
 from tabulate import tabulate
+import asyncio
+import math
+import random
+import tracemalloc
 import pandas as pd
 
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
 """
 evaluate BPM-based agent, DM-based agent, MM-based agent offline
 Parameters agents: [BPM-based agent, DM-based agent, MM-based agent]
 Parameters matches: number of matches
 Parameters save_results: Save our offline results
+Parameters memory_report: Trace the memory allocations and print a report of the memory footprint at the end. The
+tracing slows the agents down for the whole evaluation, so it is off by default
 Returns: None
 """
-async def evaluate(agents: List[Player], matches: int = 100, save_results: bool = False) -> None:
+async def evaluate(agents: List[Player], matches: int = 100, save_results: bool = False,
+                   memory_report: bool = False) -> None:
+
+    trace_memory = memory_report and not tracemalloc.is_tracing()
+    if trace_memory:
+        tracemalloc.start()
 
     # local agents play against each other
     evaluation_results = await cross_evaluate(agents, n_challenges = matches)
@@ -28,6 +44,159 @@ async def evaluate(agents: List[Player], matches: int = 100, save_results: bool
         df_results = pd.DataFrame(evaluation_table[1:], columns=evaluation_table[0])
         df_results.to_csv("results/offline_evaluation_results_{0}_matches.csv".format(matches))
 
+    if memory_report:
+        print(memory_footprint(agents))
+    if trace_memory:
+        tracemalloc.stop()
+
+"""
+Compute the Wilson score interval of a win rate
+Parameters: wins: the number of won games
+Parameters: games: the number of games
+Parameters: z: the quantile of the normal distribution of the confidence level, 1.96 for 95%
+Returns: the lower and the upper bound of the interval
+"""
+def wilson_interval(wins: int, games: int, z: float = 1.96) -> Tuple[float, float]:
+    if games == 0:
+        return 0.0, 1.0
+
+    rate = wins / games
+    center = (rate + z ** 2 / (2 * games)) / (1 + z ** 2 / games)
+    margin = z / (1 + z ** 2 / games) * math.sqrt(rate * (1 - rate) / games + z ** 2 / (4 * games ** 2))
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+"""
+Sequential probability ratio test of a win rate: the hypothesis that the first agent wins with probability p0 against
+the one that it wins with probability p1, with p0 < 0.5 < p1 for a test of which agent is stronger
+Parameters: wins: the number of games won by the first agent
+Parameters: losses: the number of games lost by the first agent
+Parameters: p0: the win rate of the first hypothesis
+Parameters: p1: the win rate of the second hypothesis
+Parameters: alpha: the probability of accepting p1 when p0 is true
+Parameters: beta: the probability of accepting p0 when p1 is true
+Returns: "p1" or "p0" when the test accepts a hypothesis, None if more games are needed
+"""
+def sprt(wins: int, losses: int, p0: float = 0.45, p1: float = 0.55, alpha: float = 0.05,
+         beta: float = 0.05) -> Optional[str]:
+    llr = wins * math.log(p1 / p0) + losses * math.log((1 - p1) / (1 - p0))
+    if llr >= math.log((1 - beta) / alpha):
+        return "p1"
+    if llr <= math.log(beta / (1 - alpha)):
+        return "p0"
+    return None
+
+"""
+Evaluate the agents against each other, stopping every pair as soon as its result is settled instead of playing a
+fixed number of matches. The pairs play concurrently, each one with its own agents built by build_agent, in batches
+of battles; after every batch a pair stops when the SPRT decides which agent is stronger, when the confidence
+interval of its win rate is narrower than the precision, or when it reaches the max number of matches. Ties don't
+count as games
+Parameters: playmodes: the play modes of the agents
+Parameters: max_matches: the max number of matches of a pair
+Parameters: batch_size: the number of battles a pair plays between two tests
+Parameters: concurrency: max concurrent battles of each agent
+Parameters: p0: the win rate of the hypothesis that the first agent of a pair is weaker
+Parameters: p1: the win rate of the hypothesis that the first agent of a pair is stronger
+Parameters: alpha: the error rate of the test on the first hypothesis
+Parameters: beta: the error rate of the test on the second hypothesis
+Parameters: precision: the half width of the 95% confidence interval under which a pair stops, None to only stop on
+the SPRT and on the max number of matches
+Parameters: save_results: Save our offline results
+Returns: the results of each pair, by the play modes of its agents
+"""
+async def sequential_evaluate(playmodes: List[str], max_matches: int = 1000, batch_size: int = 10,
+                              concurrency: int = 10, p0: float = 0.45, p1: float = 0.55, alpha: float = 0.05,
+                              beta: float = 0.05, precision: Optional[float] = None,
+                              save_results: bool = False) -> Dict[Tuple[str, str], Dict]:
+    from players.agents import build_agent
+
+    async def play_pair(playmode: str, opp_playmode: str) -> Dict:
+        tag = random.randint(0, 100000)
+        agent = build_agent(playmode, concurrency, username="{0}vs{1}{2}".format(playmode, opp_playmode, tag),
+                            keep_battles=concurrency)
+        opponent = build_agent(opp_playmode, concurrency, username="{0}vs{1}{2}".format(opp_playmode, playmode, tag),
+                               keep_battles=concurrency)
+        decision = None
+        while decision is None and agent.n_finished_battles < max_matches:
+            await agent.battle_against(opponent, min(batch_size, max_matches - agent.n_finished_battles))
+            wins, losses = agent.n_won_battles, agent.n_lost_battles
+            decision = sprt(wins, losses, p0, p1, alpha, beta)
+            if decision is None and precision is not None and wins + losses > 0:
+                lower, upper = wilson_interval(wins, wins + losses)
+                decision = "precision" if (upper - lower) / 2 <= precision else None
+
+        return {"matches": agent.n_finished_battles, "wins": agent.n_won_battles, "losses": agent.n_lost_battles,
+                "decision": decision}
+
+    pairs = [(playmode, opp_playmode) for i, playmode in enumerate(playmodes) for opp_playmode in playmodes[i + 1:]]
+    pair_results = dict(zip(pairs, await asyncio.gather(*[play_pair(*pair) for pair in pairs])))
+
+    # Show the win rates in the same table of evaluate, and the games and the confidence interval of every pair
+    evaluation_table = [["agents\\agents"] + playmodes]
+    for playmode in playmodes:
+        row = [playmode]
+        for opp_playmode in playmodes:
+            if playmode == opp_playmode:
+                row.append(str(None))
+                continue
+            result = pair_results.get((playmode, opp_playmode))
+            wins, losses = (result["wins"], result["losses"]) if result is not None \
+                else (pair_results[(opp_playmode, playmode)]["losses"], pair_results[(opp_playmode, playmode)]["wins"])
+            row.append(str(round(wins / (wins + losses), 2)) if wins + losses > 0 else str(None))
+        evaluation_table.append(row)
+    print(tabulate(evaluation_table))
+
+    pairs_table = [["pair", "matches", "win rate", "95% interval", "stopped by"]]
+    for (playmode, opp_playmode), result in pair_results.items():
+        games = result["wins"] + result["losses"]
+        lower, upper = wilson_interval(result["wins"], games)
+        stopped_by = {"p1": "SPRT: {0} stronger".format(playmode), "p0": "SPRT: {0} stronger".format(opp_playmode),
+                      "precision": "precision", None: "max matches"}[result["decision"]]
+        pairs_table.append(["{0} vs {1}".format(playmode, opp_playmode), result["matches"],
+                            round(result["wins"] / games, 3) if games > 0 else None,
+                            "[{0:.3f}, {1:.3f}]".format(lower, upper), stopped_by])
+    print(tabulate(pairs_table))
+
+    if save_results:
+        df_results = pd.DataFrame(pairs_table[1:], columns=pairs_table[0])
+        df_results.to_csv("results/sequential_evaluation_results_{0}_max_matches.csv".format(max_matches))
+
+    return pair_results
+
+"""
+Build a report of the memory footprint of the process: the memory traced by tracemalloc, the peak resident memory,
+the battles retained by each agent and the lines that allocated most of the traced memory
+Parameters agents: the agents
+Parameters top: number of allocation sites in the report
+Returns: the report
+"""
+def memory_footprint(agents: List[Player], top: int = 10) -> str:
+    report = []
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        report.append("traced memory: {0:.1f} MiB, peak {1:.1f} MiB".format(current / 2 ** 20, peak / 2 ** 20))
+    if resource is not None:
+        # ru_maxrss is in KiB on Linux
+        report.append("peak resident memory: {0:.1f} MiB".format(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10))
+
+    agents_table = [["agent", "retained battles", "summaries", "finished battles"]]
+    for agent in agents:
+        agents_table.append([agent.username, len(agent.battles), len(getattr(agent, "battle_summaries", [])),
+                             agent.n_finished_battles])
+    report.append(tabulate(agents_table))
+
+    if tracemalloc.is_tracing():
+        snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+        sites_table = [["allocation site", "KiB", "blocks"]]
+        for stat in snapshot.statistics("lineno")[:top]:
+            frame = stat.traceback[0]
+            sites_table.append(["{0}:{1}".format(frame.filename, frame.lineno), round(stat.size / 2 ** 10, 1),
+                                stat.count])
+        report.append(tabulate(sites_table))
+
+    return "\n".join(report)
+
 """
 convert a Pokemon's types to a string
 Parameters: Pokemon_types: Pokemon under consideration or a tuple of types
@@ -0,0 +1,66 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.context import BaseContext
+from threading import Thread
+from typing import Optional
+import multiprocessing
+import asyncio
+import os
+
+__fork_hook_registered = False
+
+"""
+Run an event loop forever, it is the target of the thread that replaces the poke-env loop
+Parameters: loop: the event loop
+"""
+def __run_loop(loop: asyncio.AbstractEventLoop) -> None:
+    asyncio.set_event_loop(loop)
+    loop.run_forever()
+
+"""
+Replace the poke-env background event loop in a forked process. poke-env runs its websockets in a thread started at
+import time, and threads do not survive a fork: the child gets a new loop, running in a new thread, in every module
+that imported it
+"""
+def restart_poke_loop() -> None:
+    import poke_env.player as player
+    import poke_env.player.internals as internals
+    import poke_env.player.player_network_interface as player_network_interface
+    import poke_env.player.utils as player_utils
+    import poke_env.player.openai_api as openai_api
+
+    loop = asyncio.new_event_loop()
+    Thread(target=__run_loop, args=(loop,), daemon=True).start()
+    for module in [player, internals, player_network_interface, player_utils, openai_api]:
+        module.POKE_LOOP = loop
+
+"""
+Retrieve the multiprocessing context used to start worker processes. Where fork is available, the move registry is
+preloaded in the parent process so that the workers inherit it instead of building it again, and the poke-env loop
+is restarted in every forked worker; otherwise workers are spawned and import everything from scratch
+Parameters: preload: whether to preload the move registry before forking
+Returns: the multiprocessing context
+"""
+def worker_context(preload: bool = True) -> BaseContext:
+    global __fork_hook_registered
+
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+
+    if preload:
+        from core.move_registry import preload as preload_moves
+        preload_moves()
+
+    if not __fork_hook_registered:
+        os.register_at_fork(after_in_child=restart_poke_loop)
+        __fork_hook_registered = True
+
+    return multiprocessing.get_context("fork")
+
+"""
+Build a pool of worker processes started with the worker context
+Parameters: max_workers: the number of workers
+Parameters: preload: whether to preload the move registry before forking
+Returns: the pool of workers
+"""
+def worker_pool(max_workers: Optional[int] = None, preload: bool = True) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=worker_context(preload))